@@ -1,7 +1,8 @@
 import os
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
 # Import dotenv if available, otherwise provide a warning
 try:
@@ -18,6 +19,8 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
     Load environment variables from .env files.
     First loads from the central .env file in the project root,
     then loads from the agent-specific .env file which can override central values.
+    The result is cached per set of required variables, so the .env files are
+    only parsed once per process; call load_env_config.cache_clear() to reload.
     
     Args:
         required_vars (List[str], optional): List of required environment variables.
@@ -29,6 +32,20 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
     if required_vars is None:
         required_vars = ['OPENAI_API_KEY']
     
+    # Hand out a copy so callers cannot modify the cached result
+    return dict(_load_env_config(tuple(required_vars)))
+
+@lru_cache(maxsize=None)
+def _load_env_config(required_vars: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    Load environment variables from .env files (cached implementation of load_env_config).
+    
+    Args:
+        required_vars (Tuple[str, ...]): Required environment variables
+    
+    Returns:
+        Dict[str, str]: Dictionary of loaded environment variables
+    """
     loaded_vars = {}
     
     if not DOTENV_AVAILABLE:
@@ -67,6 +84,8 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
     
     return loaded_vars
 
+load_env_config.cache_clear = _load_env_config.cache_clear
+
 # Example usage
 if __name__ == "__main__":
     # Configure logging
@@ -1,19 +1,20 @@
 import logging
 import os
+import re
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 
-import sys
-import os
-
-# Add the parent directory to the path so we can import from tools
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The agent directory is expected on sys.path (example.py, the tests and the
+# orchestrator all arrange this), so tools resolves as a top-level package
 from tools import code_collector
 from tools import openai_client
 from tools import code_updater
 
 logger = logging.getLogger(__name__)
 
+# Matches Python file paths mentioned in a prompt, e.g. "utils/helper.py"
+_MENTIONED_FILE = re.compile(r"[\w/\\.\-]+\.py(?!\w)")
+
 class CoderAgent:
     """
     Agent for analyzing code and creating code changes based on natural language prompts.
@@ -31,7 +32,7 @@ class CoderAgent:
         self.openai = openai_client.OpenAIClient(api_key=api_key)
         logger.info("CoderAgent initialized")
     
-    def process_repo(self, repo_path: str, prompt: str, max_files: int = 5, max_total_lines: int = 2000) -> Dict[str, Any]:
+    def process_repo(self, repo_path: str, prompt: str, max_files: int = 5, max_total_lines: int = 2000, stream: bool = False) -> Dict[str, Any]:
         """
         Process a repository and generate code changes based on the prompt.
         
@@ -40,40 +41,60 @@ class CoderAgent:
             prompt (str): Natural language prompt for code changes
             max_files (int): Maximum number of files to include
             max_total_lines (int): Maximum total number of lines across all files
+            stream (bool): Stream the OpenAI response and write each file as soon as it is complete
             
         Returns:
             Dict[str, Any]: Results of the code changes
         """
         logger.info(f"Processing repository at {repo_path} with prompt: {prompt}")
         
-        # Step 1: Collect code context
-        code_bundle = code_collector.bundle_code_files(repo_path, max_files, max_total_lines)
+        # Step 1: Collect code context, limited to the files the prompt names (if any exist)
+        mentioned_files = set(_MENTIONED_FILE.findall(prompt))
+        code_bundle = code_collector.bundle_code_files(repo_path, max_files, max_total_lines, only=mentioned_files)
         if not code_bundle:
             error_msg = "No Python files found in the repository"
             logger.error(error_msg)
             return {"success": False, "error": error_msg}
         
-        # Step 2: Prompt OpenAI
-        try:
-            response = self.openai.generate_code_changes(code_bundle, prompt)
-            if not response:
-                error_msg = "No response received from OpenAI"
+        if stream:
+            # Steps 2 and 3 overlap: files are parsed and written while the response streams in
+            try:
+                chunks = self.openai.stream_code_changes(code_bundle, prompt)
+                file_changes, results = code_updater.apply_changes_stream(
+                    repo_path, code_updater.iter_file_changes(chunks)
+                )
+            except Exception as e:
+                error_msg = f"Error generating code changes: {str(e)}"
                 logger.error(error_msg)
                 return {"success": False, "error": error_msg}
-        except Exception as e:
-            error_msg = f"Error generating code changes: {str(e)}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
-        
-        # Step 3: Parse and apply changes
-        file_changes = code_updater.parse_file_changes(response)
-        if not file_changes:
-            error_msg = "No file changes found in the response"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
+            
+            if not file_changes:
+                error_msg = "No file changes found in the response"
+                logger.error(error_msg)
+                return {"success": False, "error": error_msg}
+        else:
+            # Step 2: Prompt OpenAI
+            try:
+                response = self.openai.generate_code_changes(code_bundle, prompt)
+                if not response:
+                    error_msg = "No response received from OpenAI"
+                    logger.error(error_msg)
+                    return {"success": False, "error": error_msg}
+            except Exception as e:
+                error_msg = f"Error generating code changes: {str(e)}"
+                logger.error(error_msg)
+                return {"success": False, "error": error_msg}
+            
+            # Step 3: Parse and apply changes
+            file_changes = code_updater.parse_file_changes(response)
+            if not file_changes:
+                error_msg = "No file changes found in the response"
+                logger.error(error_msg)
+                return {"success": False, "error": error_msg}
+            
+            results = code_updater.apply_changes(repo_path, file_changes)
         
-        results = code_updater.apply_changes(repo_path, file_changes)
-        summary = code_updater.generate_diff_summary(repo_path, file_changes)
+        summary = code_updater.generate_diff_summary(results)
         
         # Check if all changes were applied successfully
         all_success = all(result[1] for result in results)
@@ -106,7 +127,7 @@ class CoderAgent:
         
         if "results" in results:
             report += "\n=== DETAILED RESULTS ===\n"
-            for file_path, success, message in results["results"]:
+            for file_path, success, message, _ in results["results"]:
                 status = "✅ Success" if success else "❌ Failed"
                 report += f"{file_path}: {status} - {message}\n"
         
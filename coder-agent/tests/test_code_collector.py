@@ -0,0 +1,125 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the agent directory to the path so we can import from tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools import code_collector
+from tools.source_cache import SourceCache
+
+
+class TestCodeCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp(prefix="coder_agent_collector_")
+        self.cache_dir = tempfile.mkdtemp(prefix="coder_agent_cache_")
+        with open(os.path.join(self.repo_dir, "calculator.py"), "w") as f:
+            f.write("def add(a, b):\n    return a + b\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def test_collect_python_files_skips_ignored_dirs(self):
+        for skipped in (".git", "__pycache__", "venv", ".hidden"):
+            os.makedirs(os.path.join(self.repo_dir, skipped))
+            with open(os.path.join(self.repo_dir, skipped, "ignored.py"), "w") as f:
+                f.write("x = 1\n")
+        os.makedirs(os.path.join(self.repo_dir, "utils"))
+        with open(os.path.join(self.repo_dir, "utils", "helper.py"), "w") as f:
+            f.write("y = 2\n")
+
+        files = code_collector.collect_python_files(self.repo_dir, max_files=10)
+
+        relative = sorted(os.path.relpath(f, self.repo_dir) for f in files)
+        self.assertEqual(relative, ["calculator.py", os.path.join("utils", "helper.py")])
+
+    def test_collect_python_files_only_mentioned(self):
+        os.makedirs(os.path.join(self.repo_dir, "utils"))
+        with open(os.path.join(self.repo_dir, "utils", "helper.py"), "w") as f:
+            f.write("y = 2\n")
+
+        files = code_collector.collect_python_files(
+            self.repo_dir, only={"utils/helper.py", "missing.py", "../outside.py"}
+        )
+
+        self.assertEqual(files, [os.path.join(self.repo_dir, "utils/helper.py")])
+
+    def test_collect_python_files_falls_back_to_walk(self):
+        files = code_collector.collect_python_files(self.repo_dir, only={"missing.py"})
+
+        self.assertEqual(files, [os.path.join(self.repo_dir, "calculator.py")])
+
+    def test_bundle_code_files(self):
+        bundle = code_collector.bundle_code_files(self.repo_dir, use_cache=False)
+
+        self.assertTrue(bundle.startswith("=== FILE: calculator.py ==="))
+        self.assertIn("return a + b", bundle)
+
+    def test_bundle_code_files_respects_byte_budget(self):
+        with open(os.path.join(self.repo_dir, "big.py"), "w") as f:
+            f.write("x = 1\n" * 100)
+
+        bundle = code_collector.bundle_code_files(self.repo_dir, use_cache=False, max_total_bytes=100)
+
+        self.assertIn("calculator.py", bundle)
+        self.assertNotIn("big.py", bundle)
+
+    def test_bundle_code_files_keeps_walk_order(self):
+        big_file = os.path.join(self.repo_dir, "big.py")
+        with open(big_file, "w") as f:
+            f.write("x = 1\n" * 10)
+        small_file = os.path.join(self.repo_dir, "calculator.py")
+
+        with patch.object(code_collector, 'collect_python_files', return_value=[big_file, small_file]):
+            bundle = code_collector.bundle_code_files(self.repo_dir, use_cache=False)
+
+        self.assertLess(bundle.index("big.py"), bundle.index("calculator.py"))
+
+    def test_source_cache_hit_and_invalidation(self):
+        file_path = os.path.join(self.repo_dir, "calculator.py")
+
+        cache = SourceCache(self.cache_dir)
+        self.assertIsNone(cache.get(file_path))
+        cache.set(file_path, os.stat(file_path), b"cached content", 1)
+        self.assertEqual(cache.get(file_path), (b"cached content", 1))
+
+        # A changed file must not be served from the cache
+        with open(file_path, "a") as f:
+            f.write("# changed\n")
+        self.assertIsNone(cache.get(file_path))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.close()
+
+    def test_source_cache_file_changed_while_read(self):
+        file_path = os.path.join(self.repo_dir, "calculator.py")
+
+        # The file changes between the stat and the end of the read
+        cache = SourceCache(self.cache_dir)
+        stat = os.stat(file_path)
+        with open(file_path, "a") as f:
+            f.write("# changed\n")
+        cache.set(file_path, stat, b"stale content", 1)
+
+        self.assertIsNone(cache.get(file_path))
+        cache.close()
+
+    def test_source_cache_prunes_old_entries(self):
+        file_path = os.path.join(self.repo_dir, "calculator.py")
+        cache = SourceCache(self.cache_dir)
+        cache.set(file_path, os.stat(file_path), b"cached content", 1)
+        cache.close()
+
+        # Test reopening the cache once the entry is older than the maximum age
+        cache = SourceCache(self.cache_dir, max_age_seconds=-1)
+
+        # Verify
+        self.assertIsNone(cache.get(file_path))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add the agent directory to the path so we can import from tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools import code_updater
+
+
+class TestCodeUpdater(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp(prefix="coder_agent_updater_")
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+
+    def test_parse_file_changes(self):
+        response = (
+            "=== FILE: calculator.py ===\n"
+            "def add(a, b):\n"
+            "    return a + b\n"
+            "\n"
+            "=== FILE: utils/helper.py ===\n"
+            "def is_even(num):\n"
+            "    return num % 2 == 0\n"
+        )
+
+        file_changes = code_updater.parse_file_changes(response)
+
+        self.assertEqual(file_changes, {
+            "calculator.py": "def add(a, b):\n    return a + b",
+            "utils/helper.py": "def is_even(num):\n    return num % 2 == 0",
+        })
+
+    def test_parse_file_changes_json(self):
+        response = (
+            '{"files": ['
+            '{"path": "calculator.py", "content": "def add(a, b):\\n    return a + b\\n"}, '
+            '{"path": "empty.py", "content": ""}'
+            ']}'
+        )
+
+        self.assertEqual(
+            code_updater.parse_file_changes(response),
+            {"calculator.py": "def add(a, b):\n    return a + b\n"},
+        )
+
+    def test_parse_file_changes_invalid_json(self):
+        self.assertEqual(code_updater.parse_file_changes('{"files": ['), {})
+
+    def test_parse_file_changes_ignores_empty_blocks(self):
+        response = "=== FILE: empty.py ===\n\n=== FILE: full.py ===\nx = 1\n"
+
+        self.assertEqual(code_updater.parse_file_changes(response), {"full.py": "x = 1"})
+
+    def test_parse_file_changes_keeps_malformed_headers_in_body(self):
+        response = "=== FILE: a.py ===\nx = 1\n=== FILE: not a header\ny = 2\n"
+
+        self.assertEqual(
+            code_updater.parse_file_changes(response),
+            {"a.py": "x = 1\n=== FILE: not a header\ny = 2"},
+        )
+
+    def test_iter_file_changes_across_chunk_boundaries(self):
+        response = "=== FILE: a.py ===\nx = 1\n\n=== FILE: b.py ===\ny = 2\n"
+        chunks = [response[i:i + 5] for i in range(0, len(response), 5)]
+
+        changes = list(code_updater.iter_file_changes(chunks))
+
+        self.assertEqual(changes, [("a.py", "x = 1"), ("b.py", "y = 2")])
+        self.assertEqual(dict(changes), code_updater.parse_file_changes(response))
+
+    def test_apply_changes(self):
+        results = code_updater.apply_changes(self.repo_dir, {"pkg/module.py": "x = 1"})
+
+        self.assertEqual(results, [("pkg/module.py", True, "Success", False)])
+        with open(os.path.join(self.repo_dir, "pkg", "module.py")) as f:
+            self.assertEqual(f.read(), "x = 1")
+
+    def test_apply_changes_replaces_file_atomically(self):
+        file_path = os.path.join(self.repo_dir, "script.py")
+        with open(file_path, "w") as f:
+            f.write("x = 1")
+        os.chmod(file_path, 0o755)
+
+        results = code_updater.apply_changes(self.repo_dir, {"script.py": "x = 2"})
+
+        self.assertEqual(results, [("script.py", True, "Success", True)])
+        with open(file_path) as f:
+            self.assertEqual(f.read(), "x = 2")
+        self.assertEqual(os.stat(file_path).st_mode & 0o777, 0o755)
+        self.assertEqual(os.listdir(self.repo_dir), ["script.py"])
+
+    def test_apply_changes_skips_unchanged_files(self):
+        file_path = os.path.join(self.repo_dir, "module.py")
+        with open(file_path, "w") as f:
+            f.write("x = 1")
+        mtime_ns = os.stat(file_path).st_mtime_ns
+
+        results = code_updater.apply_changes(self.repo_dir, {"module.py": "x = 1"})
+
+        self.assertEqual(results, [("module.py", True, "Unchanged", True)])
+        self.assertEqual(os.stat(file_path).st_mtime_ns, mtime_ns)
+
+    def test_apply_changes_stream(self):
+        changes = iter([("a.py", "x = 1"), ("b.py", "y = 2"), ("a.py", "x = 3")])
+
+        file_changes, results = code_updater.apply_changes_stream(self.repo_dir, changes)
+
+        self.assertEqual(file_changes, {"a.py": "x = 3", "b.py": "y = 2"})
+        self.assertEqual([result[:2] for result in results], [("a.py", True), ("b.py", True)])
+        with open(os.path.join(self.repo_dir, "a.py")) as f:
+            self.assertEqual(f.read(), "x = 3")
+
+    def test_generate_diff_summary(self):
+        results = [
+            ("new.py", True, "Success", False),
+            ("old.py", True, "Success", True),
+            ("same.py", True, "Unchanged", True),
+            ("bad.py", False, "Error updating file bad.py", True),
+        ]
+
+        summary = code_updater.generate_diff_summary(results)
+
+        self.assertIn("Created: new.py\n", summary)
+        self.assertIn("Modified: old.py\n", summary)
+        self.assertIn("Unchanged: same.py\n", summary)
+        self.assertIn("Failed: bad.py\n", summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+# Add the agent directory to the path so we can import from tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools import openai_client
+
+BUNDLE = "=== FILE: a.py ===\nx = 1\n\n=== FILE: b.py ===\ny = 2"
+
+
+def completion(content: str) -> MagicMock:
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    return response
+
+
+class TestGenerateCodeChanges(unittest.TestCase):
+
+    def setUp(self):
+        patchers = [
+            patch.object(openai_client, 'OPENAI_AVAILABLE', True),
+            patch.object(openai_client, 'openai', create=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Every AsyncOpenAI() is its own client, entered with `async with`
+        self.async_clients = []
+        openai_client.openai.AsyncOpenAI.side_effect = self.make_async_client
+        self.create = AsyncMock()
+        self.client = openai_client.OpenAIClient(api_key="test-key", use_cache=False)
+
+    def make_async_client(self, **kwargs) -> MagicMock:
+        async_client = MagicMock()
+        async_client.__aenter__.return_value = async_client
+        async_client.chat.completions.create = self.create
+        self.async_clients.append(async_client)
+        return async_client
+
+    def test_new_async_client_per_call(self):
+        self.create.side_effect = lambda **kwargs: completion(json.dumps({"files": [{"path": "a.py", "content": ""}]}))
+
+        # Test two multi-file calls on the same client, each running its own event loop
+        self.client.generate_code_changes(BUNDLE, "prompt")
+        self.client.generate_code_changes(BUNDLE, "prompt")
+
+        # Verify
+        self.assertEqual(len(self.async_clients), 2)
+        for async_client in self.async_clients:
+            async_client.__aexit__.assert_awaited_once()
+
+    def test_failed_shard_keeps_others(self):
+        self.create.side_effect = [
+            completion(json.dumps({"files": [{"path": "a.py", "content": "x = 2"}]})),
+            RuntimeError("rate limited"),
+        ]
+
+        # Test
+        content = self.client.generate_code_changes(BUNDLE, "prompt", max_concurrency=1)
+
+        # Verify
+        self.assertEqual(json.loads(content), {"files": [{"path": "a.py", "content": "x = 2"}]})
+
+    def test_all_shards_failed(self):
+        self.create.side_effect = RuntimeError("rate limited")
+
+        # Test
+        with self.assertRaises(RuntimeError):
+            self.client.generate_code_changes(BUNDLE, "prompt")
+
+
+if __name__ == '__main__':
+    unittest.main()
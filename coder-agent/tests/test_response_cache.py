@@ -0,0 +1,54 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add the agent directory to the path so we can import from tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.response_cache import ResponseCache, make_cache_key
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="coder_agent_cache_")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_make_cache_key(self):
+        self.assertEqual(make_cache_key("gpt-4", "prompt"), make_cache_key("gpt-4", "prompt"))
+        self.assertNotEqual(make_cache_key("gpt-4", "a", "b"), make_cache_key("gpt-4", "ab", ""))
+
+    def test_get_and_set(self):
+        cache = ResponseCache(self.cache_dir)
+        key = make_cache_key("gpt-4", "prompt", "bundle")
+
+        self.assertIsNone(cache.get(key))
+        cache.set(key, "=== FILE: a.py ===\nx = 1")
+        self.assertEqual(cache.get(key), "=== FILE: a.py ===\nx = 1")
+        cache.close()
+
+    def test_expired_entries_are_ignored(self):
+        cache = ResponseCache(self.cache_dir, ttl_seconds=0)
+        cache.set("key", "response")
+
+        self.assertIsNone(cache.get("key"))
+        cache.close()
+
+    def test_expired_entries_are_deleted_on_open(self):
+        cache = ResponseCache(self.cache_dir)
+        cache.set("key", "response")
+        cache.close()
+
+        # Test reopening the cache once the entry has expired
+        cache = ResponseCache(self.cache_dir, ttl_seconds=0)
+
+        # Verify
+        self.assertEqual(cache.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0], 0)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
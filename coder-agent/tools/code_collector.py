@@ -1,11 +1,80 @@
 import os
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
+
+from .source_cache import SourceCache
+
+# aiofiles is optional; without it reads are offloaded to the default thread pool
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
-def collect_python_files(repo_path: str, max_files: int = 5, max_total_lines: int = 2000) -> List[str]:
+# Average bytes per line used to turn the line budget into a byte budget
+_AVG_LINE_BYTES = 80
+
+# Directories that never contain source worth bundling
+_SKIP_DIRS = frozenset({'.git', '__pycache__', 'venv', '.venv', 'node_modules'})
+
+def _iter_python_files(root: str):
+    """
+    Recursively yield Python file paths under a directory.
+    Files in a directory are yielded before descending into its subdirectories,
+    and hidden or skipped directories are pruned without being entered.
+    
+    Args:
+        root (str): Directory to scan
+        
+    Yields:
+        str: Path to a Python file
+    """
+    try:
+        with os.scandir(root) as entries:
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIP_DIRS and not entry.name.startswith('.'):
+                        subdirs.append(entry.path)
+                elif entry.name.endswith('.py'):
+                    yield entry.path
+    except OSError as e:
+        logger.warning(f"Unable to scan directory {root}: {str(e)}")
+        return
+    
+    for subdir in subdirs:
+        yield from _iter_python_files(subdir)
+
+def _resolve_mentioned_files(repo_path: str, only: Iterable[str]) -> List[str]:
+    """
+    Resolve repository-relative file paths to existing files inside the repository.
+    
+    Args:
+        repo_path (str): Path to the repository
+        only (Iterable[str]): Repository-relative file paths
+        
+    Returns:
+        List[str]: Paths of the files that exist, in sorted order
+    """
+    repo_root = os.path.realpath(repo_path)
+    resolved = []
+    
+    for relative_path in sorted(set(only)):
+        file_path = os.path.join(repo_path, relative_path.replace('\\', '/'))
+        # Ignore anything that points outside the repository
+        if os.path.commonpath([repo_root, os.path.realpath(file_path)]) != repo_root:
+            continue
+        if os.path.isfile(file_path):
+            resolved.append(file_path)
+    
+    return resolved
+
+def collect_python_files(repo_path: str, max_files: int = 5, max_total_lines: int = 2000,
+                         only: Optional[Iterable[str]] = None) -> List[str]:
     """
     Recursively collect Python files from a repository path.
     
@@ -13,50 +82,116 @@ def collect_python_files(repo_path: str, max_files: int = 5, max_total_lines: in
         repo_path (str): Path to the repository
         max_files (int): Maximum number of files to collect
         max_total_lines (int): Maximum total number of lines across all files
+        only (Optional[Iterable[str]]): Repository-relative paths to restrict the collection to.
+            If none of them exist, the whole repository is walked.
         
     Returns:
         List[str]: List of Python file paths
     """
+    if only:
+        mentioned_files = _resolve_mentioned_files(repo_path, only)
+        if mentioned_files:
+            logger.info(f"Collecting {len(mentioned_files)} requested Python files from {repo_path}")
+            return mentioned_files[:max_files]
+    
     logger.info(f"Collecting Python files from {repo_path} (max {max_files} files, {max_total_lines} lines)")
     
     python_files = []
     
-    for root, _, files in os.walk(repo_path):
-        # Skip hidden directories and __pycache__
-        if '/.git/' in root.replace('\\', '/') or '/__pycache__/' in root.replace('\\', '/') or '/venv/' in root.replace('\\', '/'):
-            continue
-            
-        for file in files:
-            if file.endswith('.py'):
-                file_path = os.path.join(root, file)
-                python_files.append(file_path)
-                
-                if len(python_files) >= max_files:
-                    logger.info(f"Reached maximum number of files ({max_files})")
-                    return python_files
+    for file_path in _iter_python_files(repo_path):
+        python_files.append(file_path)
+        
+        if len(python_files) >= max_files:
+            logger.info(f"Reached maximum number of files ({max_files})")
+            break
     
     return python_files
 
-def read_file_content(file_path: str) -> Tuple[str, int]:
+def read_file_content(file_path: str) -> Tuple[bytes, int]:
     """
-    Read the content of a file and return it along with the number of lines.
+    Read the raw content of a file and return it along with the number of lines.
+    The content is returned undecoded so that only files which end up in the
+    bundle pay for UTF-8 decoding.
     
     Args:
         file_path (str): Path to the file
         
     Returns:
-        Tuple[str, int]: File content and number of lines
+        Tuple[bytes, int]: Raw file content and number of lines
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'rb') as f:
             content = f.read()
-            line_count = content.count('\n') + 1
-            return content, line_count
+        return content, content.count(b'\n') + 1
+    except Exception as e:
+        logger.error(f"Error reading file {file_path}: {str(e)}")
+        return b"", 0
+
+async def _read_file_async(file_path: str) -> Tuple[bytes, int]:
+    """
+    Asynchronously read the raw content of a file and return it along with the number of lines.
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        Tuple[bytes, int]: Raw file content and number of lines
+    """
+    if not AIOFILES_AVAILABLE:
+        return await asyncio.to_thread(read_file_content, file_path)
+    
+    try:
+        async with aiofiles.open(file_path, 'rb') as f:
+            content = await f.read()
+        return content, content.count(b'\n') + 1
     except Exception as e:
         logger.error(f"Error reading file {file_path}: {str(e)}")
-        return "", 0
+        return b"", 0
+
+async def _read_files_async(file_paths: List[str]) -> List[Tuple[bytes, int]]:
+    """
+    Read several files concurrently so their I/O latencies overlap.
+    
+    Args:
+        file_paths (List[str]): Paths of the files to read
+        
+    Returns:
+        List[Tuple[bytes, int]]: Raw file content and number of lines, in the order of file_paths
+    """
+    return await asyncio.gather(*(_read_file_async(file_path) for file_path in file_paths))
+
+def _file_size(file_path: str) -> int:
+    """
+    Return the size of a file in bytes, or 0 if it cannot be determined.
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        int: File size in bytes
+    """
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+def _file_stat(file_path: str) -> Optional[os.stat_result]:
+    """
+    Stat a file, or return None if it cannot be accessed.
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        Optional[os.stat_result]: Stat of the file
+    """
+    try:
+        return os.stat(file_path)
+    except OSError:
+        return None
 
-def bundle_code_files(repo_path: str, max_files: int = 5, max_total_lines: int = 2000) -> str:
+def bundle_code_files(repo_path: str, max_files: int = 5, max_total_lines: int = 2000, use_cache: bool = True,
+                      max_total_bytes: Optional[int] = None, only: Optional[Iterable[str]] = None) -> str:
     """
     Bundle Python files from a repository into a single string with file separators.
     
@@ -64,18 +199,58 @@ def bundle_code_files(repo_path: str, max_files: int = 5, max_total_lines: int =
         repo_path (str): Path to the repository
         max_files (int): Maximum number of files to include
         max_total_lines (int): Maximum total number of lines across all files
+        use_cache (bool): Whether to reuse file contents from the on-disk source cache
+        max_total_bytes (Optional[int]): Maximum total size of the files, checked before reading them.
+            Defaults to max_total_lines * 80.
+        only (Optional[Iterable[str]]): Repository-relative paths to restrict the bundle to
         
     Returns:
         str: Bundled code with file separators
     """
-    python_files = collect_python_files(repo_path, max_files, max_total_lines)
+    python_files = collect_python_files(repo_path, max_files, max_total_lines, only)
+    
+    # Drop files that cannot fit the byte budget before spending any reads on them,
+    # keeping the smallest so more of them fit; the kept files stay in walk order
+    if max_total_bytes is None:
+        max_total_bytes = max_total_lines * _AVG_LINE_BYTES
+    sizes = {file_path: _file_size(file_path) for file_path in python_files}
+    kept_files = set()
+    total_bytes = 0
+    for file_path in sorted(python_files, key=sizes.__getitem__):
+        if total_bytes + sizes[file_path] > max_total_bytes:
+            logger.info(f"Reached maximum total size ({max_total_bytes} bytes)")
+            break
+        kept_files.add(file_path)
+        total_bytes += sizes[file_path]
+    python_files = [file_path for file_path in python_files if file_path in kept_files]
+    
+    # Serve unchanged files from the cache and only read the rest from disk
+    cache = SourceCache() if use_cache else None
+    file_contents = {}
+    if cache:
+        for file_path in python_files:
+            cached = cache.get(file_path)
+            if cached is not None:
+                file_contents[file_path] = cached
     
-    bundled_code = ""
+    # Read all remaining files concurrently, then apply the line budget in walk order
+    to_read = [file_path for file_path in python_files if file_path not in file_contents]
+    stats = {file_path: _file_stat(file_path) for file_path in to_read} if cache else {}
+    for file_path, (content, line_count) in zip(to_read, asyncio.run(_read_files_async(to_read))):
+        file_contents[file_path] = (content, line_count)
+        if cache and content and stats[file_path] is not None:
+            cache.set(file_path, stats[file_path], content, line_count)
+    
+    if cache:
+        logger.info(f"Source cache: {cache.hits} hits, {cache.misses} misses")
+        cache.close()
+    
+    parts = []
     total_lines = 0
     included_files = 0
     
     for file_path in python_files:
-        content, line_count = read_file_content(file_path)
+        content, line_count = file_contents[file_path]
         
         # Skip empty files
         if not content:
@@ -85,13 +260,22 @@ def bundle_code_files(repo_path: str, max_files: int = 5, max_total_lines: int =
         if total_lines + line_count > max_total_lines:
             logger.info(f"Reached maximum total lines ({max_total_lines})")
             break
+        
+        # Only decode files that fit in the budget
+        try:
+            text = content.decode('utf-8')
+        except UnicodeDecodeError as e:
+            logger.error(f"Error decoding file {file_path}: {str(e)}")
+            continue
             
         # Add file separator and content
         relative_path = os.path.relpath(file_path, repo_path)
-        bundled_code += f"\n=== FILE: {relative_path} ===\n{content}\n"
+        parts.append(f"\n=== FILE: {relative_path} ===\n")
+        parts.append(text)
+        parts.append("\n")
         
         total_lines += line_count
         included_files += 1
     
     logger.info(f"Bundled {included_files} files with a total of {total_lines} lines")
-    return bundled_code.strip()
+    return "".join(parts).strip()
@@ -1,13 +1,71 @@
 import os
+import json
+import shutil
 import logging
-import re
-from typing import Dict, List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# orjson is optional; it parses large responses several times faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Delimiters of a "=== FILE: path ===" header line in an OpenAI response
+_HEADER_PREFIX = "=== FILE: "
+_HEADER_SUFFIX = " ==="
+
+def _parse_header(line: str) -> Optional[str]:
+    """
+    Extract the file path from a "=== FILE: path ===" header line.
+    
+    Args:
+        line (str): A single line of the response
+        
+    Returns:
+        Optional[str]: The file path, or None if the line is not a header
+    """
+    line = line.rstrip()
+    if not (line.startswith(_HEADER_PREFIX) and line.endswith(_HEADER_SUFFIX)):
+        return None
+    return line[len(_HEADER_PREFIX):-len(_HEADER_SUFFIX)].strip() or None
+
+def _parse_json_file_changes(response: str) -> Dict[str, str]:
+    """
+    Parse a structured {"files": [{"path": ..., "content": ...}]} OpenAI response.
+    
+    Args:
+        response (str): JSON response from OpenAI
+        
+    Returns:
+        Dict[str, str]: Dictionary mapping file paths to modified content
+    """
+    try:
+        data = orjson.loads(response) if ORJSON_AVAILABLE else json.loads(response)
+        files = data.get("files", [])
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Error parsing JSON response: {str(e)}")
+        return {}
+    
+    file_changes = {}
+    for entry in files:
+        if not isinstance(entry, dict):
+            continue
+        file_path = entry.get("path")
+        content = entry.get("content")
+        if isinstance(file_path, str) and isinstance(content, str) and file_path.strip() and content.strip():
+            file_changes[file_path.strip()] = content
+    
+    return file_changes
+
 def parse_file_changes(response: str) -> Dict[str, str]:
     """
     Parse the OpenAI response to extract file changes.
+    Accepts both the structured JSON format and "=== FILE:" delimited text.
     
     Args:
         response (str): Response from OpenAI
@@ -15,76 +73,207 @@ def parse_file_changes(response: str) -> Dict[str, str]:
     Returns:
         Dict[str, str]: Dictionary mapping file paths to modified content
     """
-    file_changes = {}
+    if response.lstrip().startswith("{"):
+        file_changes = _parse_json_file_changes(response)
+        logger.info(f"Parsed {len(file_changes)} file changes from response")
+        return file_changes
     
-    # Regular expression to match file blocks
-    pattern = r"=== FILE: ([^\n]+) ===\n([\s\S]*?)(?=\n=== FILE:|$)"
-    
-    matches = re.finditer(pattern, response)
+    file_changes = {}
     
-    for match in matches:
-        file_path = match.group(1).strip()
-        content = match.group(2).strip()
-        
+    def add_change(file_path, body):
+        content = body.strip()
         if file_path and content:
             file_changes[file_path] = content
     
+    # Split on the header delimiter; each block starts with the rest of its header line
+    blocks = ("\n" + response).split("\n" + _HEADER_PREFIX)
+    file_path, body = None, ""
+    
+    for block in blocks[1:]:
+        header, _, rest = block.partition("\n")
+        next_path = _parse_header(_HEADER_PREFIX + header)
+        if next_path is None:
+            # Not a well-formed header, so it belongs to the current file's body
+            body += "\n" + _HEADER_PREFIX + block
+            continue
+        add_change(file_path, body)
+        file_path, body = next_path, rest
+    
+    add_change(file_path, body)
+    
     logger.info(f"Parsed {len(file_changes)} file changes from response")
     return file_changes
 
-def apply_changes(repo_path: str, file_changes: Dict[str, str]) -> List[Tuple[str, bool, str]]:
+def iter_file_changes(chunks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Incrementally parse a streamed OpenAI response into file changes.
+    Each file is yielded as soon as the next file header (or the end of the
+    stream) shows that its block is complete.
+    
+    Args:
+        chunks (Iterable[str]): Text chunks of the response, in order
+        
+    Yields:
+        Tuple[str, str]: File path and modified content
+    """
+    pending = ""
+    file_path = None
+    body_lines = []
+    
+    def finish_block():
+        content = "\n".join(body_lines).strip()
+        if file_path and content:
+            return file_path, content
+        return None
+    
+    def feed(line):
+        nonlocal file_path, body_lines
+        next_path = _parse_header(line)
+        if next_path is None:
+            if file_path is not None:
+                body_lines.append(line)
+            return None
+        block = finish_block()
+        file_path = next_path
+        body_lines = []
+        return block
+    
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            block = feed(line)
+            if block:
+                yield block
+    
+    block = feed(pending)
+    if block:
+        yield block
+    block = finish_block()
+    if block:
+        yield block
+
+def _write_file(repo_path: str, file_path: str, content: str) -> Tuple[str, bool, str, bool]:
+    """
+    Write the modified content of a single file.
+    
+    Args:
+        repo_path (str): Path to the repository
+        file_path (str): Path of the file relative to the repository
+        content (str): Modified content of the file
+        
+    Returns:
+        Tuple[str, bool, str, bool]: Tuple containing (file_path, success, message, existed)
+    """
+    existed = False
+    try:
+        # Construct absolute path
+        abs_path = os.path.join(repo_path, file_path)
+        
+        # Leave the file (and its mtime) untouched if the content is identical
+        data = content.encode('utf-8')
+        existed = os.path.isfile(abs_path)
+        if existed:
+            with open(abs_path, 'rb') as f:
+                if f.read() == data:
+                    logger.info(f"File unchanged, skipping write: {file_path}")
+                    return (file_path, True, "Unchanged", existed)
+        
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        
+        # Write to a temporary file next to the target and swap it in atomically,
+        # so a crash mid-write never leaves a truncated file behind
+        tmp_path = f"{abs_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            if existed:
+                shutil.copymode(abs_path, tmp_path)
+            os.replace(tmp_path, abs_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+            
+        logger.info(f"Successfully updated file: {file_path}")
+        return (file_path, True, "Success", existed)
+        
+    except Exception as e:
+        error_msg = f"Error updating file {file_path}: {str(e)}"
+        logger.error(error_msg)
+        return (file_path, False, error_msg, existed)
+
+def apply_changes(repo_path: str, file_changes: Dict[str, str]) -> List[Tuple[str, bool, str, bool]]:
     """
     Apply the changes to the files in the repository.
+    Files are written concurrently so per-file I/O latencies overlap.
     
     Args:
         repo_path (str): Path to the repository
         file_changes (Dict[str, str]): Dictionary mapping file paths to modified content
         
     Returns:
-        List[Tuple[str, bool, str]]: List of tuples containing (file_path, success, message)
+        List[Tuple[str, bool, str, bool]]: List of tuples containing (file_path, success, message, existed),
+            where existed tells whether the file was present before the change
     """
-    results = []
+    if not file_changes:
+        return []
     
-    for file_path, content in file_changes.items():
-        try:
-            # Construct absolute path
-            abs_path = os.path.join(repo_path, file_path)
-            
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-            
-            # Write the content to the file
-            with open(abs_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
-            logger.info(f"Successfully updated file: {file_path}")
-            results.append((file_path, True, "Success"))
-            
-        except Exception as e:
-            error_msg = f"Error updating file {file_path}: {str(e)}"
-            logger.error(error_msg)
-            results.append((file_path, False, error_msg))
+    with ThreadPoolExecutor(max_workers=min(32, len(file_changes))) as executor:
+        futures = [
+            executor.submit(_write_file, repo_path, file_path, content)
+            for file_path, content in file_changes.items()
+        ]
+        return [future.result() for future in futures]
+
+def apply_changes_stream(repo_path: str, changes: Iterable[Tuple[str, str]]) -> Tuple[Dict[str, str], List[Tuple[str, bool, str, bool]]]:
+    """
+    Apply file changes as they arrive, e.g. from iter_file_changes.
+    Each file is handed to a writer thread as soon as it is received, so
+    disk writes overlap with the rest of the response still streaming in.
+    
+    Args:
+        repo_path (str): Path to the repository
+        changes (Iterable[Tuple[str, str]]): File paths and modified content, in arrival order
+        
+    Returns:
+        Tuple[Dict[str, str], List[Tuple[str, bool, str, bool]]]: The received file changes and
+            the results as returned by apply_changes
+    """
+    file_changes = {}
+    futures = {}
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for file_path, content in changes:
+            # A repeated file replaces the earlier version once that write has finished
+            if file_path in futures:
+                futures.pop(file_path).result()
+            file_changes[file_path] = content
+            futures[file_path] = executor.submit(_write_file, repo_path, file_path, content)
+        
+        results = [futures[file_path].result() for file_path in file_changes]
     
-    return results
+    return file_changes, results
 
-def generate_diff_summary(repo_path: str, file_changes: Dict[str, str]) -> str:
+def generate_diff_summary(results: List[Tuple[str, bool, str, bool]]) -> str:
     """
     Generate a summary of the changes made to the files.
     
     Args:
-        repo_path (str): Path to the repository
-        file_changes (Dict[str, str]): Dictionary mapping file paths to modified content
+        results (List[Tuple[str, bool, str, bool]]): Results returned by apply_changes
         
     Returns:
         str: Summary of changes
     """
     summary = "\n=== CHANGES SUMMARY ===\n"
     
-    for file_path in file_changes.keys():
-        abs_path = os.path.join(repo_path, file_path)
-        
-        # Check if the file existed before
-        if os.path.exists(abs_path):
+    for file_path, success, message, existed in results:
+        if not success:
+            summary += f"Failed: {file_path}\n"
+        elif message == "Unchanged":
+            summary += f"Unchanged: {file_path}\n"
+        elif existed:
             summary += f"Modified: {file_path}\n"
         else:
             summary += f"Created: {file_path}\n"
@@ -1,10 +1,23 @@
 import os
+import re
+import asyncio
 import logging
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Union, Any
+
+from .response_cache import ResponseCache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
+# Matches a "=== FILE: path ===" header line in a code bundle
+_BUNDLE_HEADER = re.compile(r"^=== FILE: .+? ===[ \t]*$", re.MULTILINE)
+
+SYSTEM_PROMPT = "You are a code editor assistant. You receive source code and instructions for code improvements."
+
+# Response formats: structured JSON for complete responses, "=== FILE:" text for streamed ones
+JSON_FORMAT = "json"
+TEXT_FORMAT = "text"
+
 try:
     import openai
     OPENAI_AVAILABLE = True
@@ -17,12 +30,13 @@ class OpenAIClient:
     Client for interacting with the OpenAI API.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, use_cache: bool = True):
         """
         Initialize the OpenAI client.
         
         Args:
             api_key (Optional[str]): OpenAI API key. If not provided, will try to get from environment.
+            use_cache (bool): Whether to reuse responses for identical requests from the on-disk cache
         """
         if not OPENAI_AVAILABLE:
             raise ImportError("OpenAI package is not installed. Please install it with: pip install openai")
@@ -32,23 +46,36 @@ class OpenAIClient:
             raise ValueError("OpenAI API key not provided and not found in environment variables")
             
         self.client = openai.OpenAI(api_key=self.api_key)
+        self.cache = ResponseCache() if use_cache else None
         logger.info("OpenAI client initialized")
     
-    def generate_code_changes(self, code_bundle: str, prompt: str, model: str = "gpt-4") -> str:
+    def _build_messages(self, code_bundle: str, prompt: str, response_format: str = JSON_FORMAT) -> List[Dict[str, str]]:
         """
-        Generate code changes based on the provided code bundle and prompt.
+        Build the chat messages for a code change request.
         
         Args:
             code_bundle (str): Bundle of code files
             prompt (str): User prompt for code changes
-            model (str): OpenAI model to use
+            response_format (str): JSON_FORMAT for a {"files": [{"path", "content"}]} object,
+                TEXT_FORMAT for "=== FILE:" delimited blocks
             
         Returns:
-            str: Generated code changes
+            List[Dict[str, str]]: Messages for the chat completion
         """
-        system_prompt = "You are a code editor assistant. You receive source code and instructions for code improvements."
-        
-        user_message = f"""I need you to modify the following code according to these instructions: {prompt}
+        if response_format == JSON_FORMAT:
+            user_message = f"""I need you to modify the following code according to these instructions: {prompt}
+
+Here is the code:
+
+{code_bundle}
+
+Please respond with a JSON object containing the modified code for each file, in this shape:
+
+{{"files": [{{"path": "path/to/file.py", "content": "(complete modified code for that file)"}}]}}
+
+Only include files that you've modified. Do not include anything outside of the JSON object."""
+        else:
+            user_message = f"""I need you to modify the following code according to these instructions: {prompt}
 
 Here is the code:
 
@@ -61,26 +88,213 @@ Please respond with the modified code for each file. Format your response as fol
 
 Only include files that you've modified. Do not include any explanations or comments outside of the code blocks."""
         
-        try:
-            logger.info(f"Sending request to OpenAI API using model {model}")
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_message}
+        ]
+    
+    def _split_bundle(self, code_bundle: str) -> List[str]:
+        """
+        Split a code bundle into one shard per file, each keeping its file header.
+        
+        Args:
+            code_bundle (str): Bundle of code files
             
-            response = self.client.chat.completions.create(
+        Returns:
+            List[str]: Bundle shards
+        """
+        starts = [match.start() for match in _BUNDLE_HEADER.finditer(code_bundle)]
+        if len(starts) <= 1:
+            return [code_bundle]
+        
+        ends = starts[1:] + [len(code_bundle)]
+        return [code_bundle[start:end].strip() for start, end in zip(starts, ends)]
+    
+    async def _generate_for_shard(self, client: "openai.AsyncOpenAI", semaphore: asyncio.Semaphore,
+                                  shard: str, prompt: str, model: str) -> str:
+        """
+        Generate code changes for a single bundle shard.
+        
+        Args:
+            client (openai.AsyncOpenAI): Async client of the running event loop
+            semaphore (asyncio.Semaphore): Semaphore limiting concurrent requests
+            shard (str): Bundle shard containing a single file
+            prompt (str): User prompt for code changes
+            model (str): OpenAI model to use
+            
+        Returns:
+            str: Generated code changes for the shard
+        """
+        async with semaphore:
+            response = await client.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=self._build_messages(shard, prompt),
                 temperature=0.2,  # Lower temperature for more deterministic output
                 max_tokens=4096,  # Adjust based on your needs
+                response_format={"type": "json_object"},
             )
+        
+        if response.choices and len(response.choices) > 0:
+            return response.choices[0].message.content or ""
+        return ""
+    
+    async def _generate_sharded(self, shards: List[str], prompt: str, model: str,
+                                max_concurrency: int) -> List[Union[str, Exception]]:
+        """
+        Generate code changes for all shards concurrently.
+        
+        The async client is created for this call, since its connections belong to
+        the event loop they were opened in, and each call runs in a new loop.
+        A failed request does not cancel the others.
+        
+        Args:
+            shards (List[str]): Bundle shards, one file each
+            prompt (str): User prompt for code changes
+            model (str): OpenAI model to use
+            max_concurrency (int): Maximum number of requests in flight
             
-            # Extract the response content
-            if response.choices and len(response.choices) > 0:
-                return response.choices[0].message.content
+        Returns:
+            List[Union[str, Exception]]: Generated code changes, or the error of a failed
+                request, in shard order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        async with openai.AsyncOpenAI(api_key=self.api_key) as client:
+            return await asyncio.gather(
+                *(self._generate_for_shard(client, semaphore, shard, prompt, model) for shard in shards),
+                return_exceptions=True
+            )
+    
+    def _merge_json_responses(self, responses: List[str]) -> str:
+        """
+        Merge the JSON responses of several shards into a single response.
+        
+        Args:
+            responses (List[str]): JSON responses, each a {"files": [...]} object
+            
+        Returns:
+            str: A single {"files": [...]} JSON object, or an empty string if no files were returned
+        """
+        files = []
+        for response in responses:
+            if not response.strip():
+                continue
+            try:
+                files.extend(json.loads(response).get("files", []))
+            except (ValueError, AttributeError) as e:
+                logger.error(f"Ignoring malformed JSON response: {str(e)}")
+        
+        return json.dumps({"files": files}) if files else ""
+    
+    def generate_code_changes(self, code_bundle: str, prompt: str, model: str = "gpt-4o", max_concurrency: int = 4) -> str:
+        """
+        Generate code changes based on the provided code bundle and prompt.
+        The model is asked for structured JSON output ({"files": [{"path", "content"}]}).
+        Multi-file bundles are split per file and the requests are sent concurrently,
+        so each file gets its own token budget. Responses to identical requests are
+        served from the response cache.
+        
+        Args:
+            code_bundle (str): Bundle of code files
+            prompt (str): User prompt for code changes
+            model (str): OpenAI model to use
+            max_concurrency (int): Maximum number of concurrent requests for multi-file bundles
+            
+        Returns:
+            str: Generated code changes as a JSON object
+        """
+        cache_key = make_cache_key(model, JSON_FORMAT, SYSTEM_PROMPT, prompt, code_bundle)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached OpenAI response")
+                return cached
+        
+        shards = self._split_bundle(code_bundle)
+        errors = []
+        
+        try:
+            if len(shards) > 1:
+                logger.info(f"Sending {len(shards)} requests to OpenAI API using model {model} (max {max_concurrency} concurrent)")
+                results = asyncio.run(self._generate_sharded(shards, prompt, model, max_concurrency))
+                errors = [result for result in results if isinstance(result, Exception)]
+                if len(errors) == len(results):
+                    raise errors[0]
+                for error in errors:
+                    logger.error(f"Skipping a file whose request failed: {str(error)}")
+                content = self._merge_json_responses(
+                    [result for result in results if not isinstance(result, Exception)]
+                )
             else:
-                logger.error("No response received from OpenAI API")
-                return ""
+                logger.info(f"Sending request to OpenAI API using model {model}")
+                
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=self._build_messages(code_bundle, prompt),
+                    temperature=0.2,  # Lower temperature for more deterministic output
+                    max_tokens=4096,  # Adjust based on your needs
+                    response_format={"type": "json_object"},
+                )
+                
+                # Extract the response content
+                if response.choices and len(response.choices) > 0:
+                    content = response.choices[0].message.content
+                else:
+                    logger.error("No response received from OpenAI API")
+                    return ""
+            
+            # A partial result is returned, but not cached, so the failed files are requested again
+            if self.cache and content and not errors:
+                self.cache.set(cache_key, content)
+            return content
                 
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {str(e)}")
             raise
+    
+    def stream_code_changes(self, code_bundle: str, prompt: str, model: str = "gpt-4o") -> Iterator[str]:
+        """
+        Stream code changes based on the provided code bundle and prompt.
+        The whole bundle is sent as a single streaming request and the response
+        text is yielded as it arrives. Streamed responses use the "=== FILE:" text
+        format, which can be parsed incrementally. Cached responses are yielded in one piece.
+        
+        Args:
+            code_bundle (str): Bundle of code files
+            prompt (str): User prompt for code changes
+            model (str): OpenAI model to use
+            
+        Yields:
+            str: Chunks of the generated code changes
+        """
+        cache_key = make_cache_key(model, TEXT_FORMAT, SYSTEM_PROMPT, prompt, code_bundle)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached OpenAI response")
+                yield cached
+                return
+        
+        parts = []
+        try:
+            logger.info(f"Streaming response from OpenAI API using model {model}")
+            
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=self._build_messages(code_bundle, prompt, TEXT_FORMAT),
+                temperature=0.2,  # Lower temperature for more deterministic output
+                max_tokens=4096,  # Adjust based on your needs
+                stream=True,
+            )
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+                    
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
+            raise
+        
+        content = "".join(parts)
+        if self.cache and content:
+            self.cache.set(cache_key, content)
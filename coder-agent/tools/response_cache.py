@@ -0,0 +1,85 @@
+import time
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from .source_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Cached responses expire after one day by default
+DEFAULT_TTL_SECONDS = 86400
+
+def make_cache_key(*parts: str) -> str:
+    """
+    Build a cache key from the parts of a request.
+
+    Args:
+        *parts (str): Request parts, e.g. model, system prompt, prompt and code bundle
+
+    Returns:
+        str: SHA-256 hex digest of the NUL-separated parts
+    """
+    return hashlib.sha256("\x00".join(parts).encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    On-disk cache of OpenAI responses keyed by a hash of the request.
+    Expired responses are deleted when the cache is opened.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize the response cache.
+
+        Args:
+            cache_dir (Optional[Path]): Directory holding the cache database. Defaults to DEFAULT_CACHE_DIR.
+            ttl_seconds (int): Number of seconds a cached response stays valid
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.conn = sqlite3.connect(str(self.cache_dir / 'response_cache.sqlite3'))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created_at REAL, response TEXT)"
+        )
+        self.conn.execute("DELETE FROM responses WHERE created_at <= ?", (time.time() - ttl_seconds,))
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a response in the cache.
+
+        Args:
+            key (str): Cache key of the request
+
+        Returns:
+            Optional[str]: Cached response, or None if missing or expired
+        """
+        row = self.conn.execute(
+            "SELECT created_at, response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row and time.time() - row[0] < self.ttl_seconds:
+            return row[1]
+        return None
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response in the cache.
+
+        Args:
+            key (str): Cache key of the request
+            response (str): Response to store
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, time.time(), response)
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        self.conn.close()
@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _user_cache_dir() -> Path:
+    """
+    Return the platform's directory for per-user caches.
+
+    Returns:
+        Path: %LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache elsewhere
+    """
+    if os.name == 'nt':
+        return Path(os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local')
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+
+# Default location of the on-disk caches, shared by all checkouts of the agent
+DEFAULT_CACHE_DIR = _user_cache_dir() / 'coder-agent'
+
+# Entries are dropped this many seconds after they were stored. Sandboxes get a new
+# path for every clone, so most entries are never looked up again.
+DEFAULT_MAX_AGE_SECONDS = 7 * 86400
+
+class SourceCache:
+    """
+    On-disk cache of file contents used when bundling code.
+    Entries are keyed by absolute path and validated against the file's
+    mtime and size, so unchanged files are never re-read. Entries older than
+    max_age_seconds are deleted when the cache is opened.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS):
+        """
+        Initialize the source cache.
+
+        Args:
+            cache_dir (Optional[Path]): Directory holding the cache database. Defaults to DEFAULT_CACHE_DIR.
+            max_age_seconds (int): Number of seconds an entry is kept after it was stored
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.cache_dir / 'source_cache.sqlite3'))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+            "content BLOB, line_count INTEGER, stored_at REAL)"
+        )
+        self.conn.execute("DELETE FROM files WHERE stored_at < ?", (time.time() - max_age_seconds,))
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_path: str) -> Optional[Tuple[bytes, int]]:
+        """
+        Look up a file in the cache.
+
+        Args:
+            file_path (str): Path to the file
+
+        Returns:
+            Optional[Tuple[bytes, int]]: Cached raw content and number of lines, or None on a miss
+        """
+        abs_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            self.misses += 1
+            return None
+
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, content, line_count FROM files WHERE path = ?", (abs_path,)
+        ).fetchone()
+        if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            self.hits += 1
+            return row[2], row[3]
+
+        self.misses += 1
+        return None
+
+    def set(self, file_path: str, stat: os.stat_result, content: bytes, line_count: int) -> None:
+        """
+        Store a file's content in the cache.
+
+        The stat must be taken before the content is read: if the file changes
+        during the read, the entry then no longer matches and is never served.
+
+        Args:
+            file_path (str): Path to the file
+            stat (os.stat_result): Stat of the file taken before reading it
+            content (bytes): Raw content of the file
+            line_count (int): Number of lines in the file
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, content, line_count, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, content, line_count, time.time())
+        )
+
+    def close(self) -> None:
+        """
+        Commit pending entries and close the underlying database connection.
+        """
+        self.conn.commit()
+        self.conn.close()
@@ -1,15 +1,16 @@
 import logging
-import os
 from pathlib import Path
 from typing import Dict, Optional, Union, Tuple
 
-# Use absolute imports instead of relative imports
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The agent directory is expected on sys.path (example.py, the tests and the
+# orchestrator all arrange this), so tools resolves as a top-level package
 from tools import git_ops, sandbox_manager
 
 logger = logging.getLogger(__name__)
 
+# Ways clone_repository can get the repository; the first four download least to most
+CLONE_MODES = ("treeless", "shallow", "blobless", "full", "worktree")
+
 class GitCloneAgent:
     """
     Agent for cloning Git repositories into a sandbox environment.
@@ -22,15 +23,16 @@ class GitCloneAgent:
     - Providing status and path information
     """
     
-    def __init__(self, working_dir: Optional[Path] = None):
+    def __init__(self, working_dir: Optional[Union[str, Path]] = None):
         """
         Initialize the GitCloneAgent.
         
         Args:
-            working_dir (Path, optional): Custom working directory. If not provided,
+            working_dir (str or Path, optional): Custom working directory. If not provided,
                                          the application-sandbox directory will be used.
         """
-        self.working_dir = working_dir
+        # Normalize once so the rest of the agent can rely on Path operators
+        self.working_dir = Path(working_dir) if working_dir else None
         self.clone_dir = None
         self.repo_url = None
         self.branch = None
@@ -57,27 +59,54 @@ class GitCloneAgent:
         """
         if self.clone_dir and not self.working_dir:
             # Only clean up if we created the directory (not if a custom working_dir was provided)
+            try:
+                # A worktree is also unregistered from the mirror, so its path can be checked out again
+                if git_ops.remove_worktree(self.clone_dir):
+                    logger.info(f"Removed worktree at {self.clone_dir}")
+                    return
+            except RuntimeError as e:
+                logger.warning(f"Failed to remove worktree, deleting the directory: {str(e)}")
             sandbox_manager.cleanup_clone_directory(self.clone_dir)
             logger.info(f"Cleaned up clone directory at {self.clone_dir}")
     
     def clone_repository(self, repo_url: str, branch: Optional[str] = None, 
-                       repo_name: Optional[str] = None, git_config: Optional[Dict[str, str]] = None) -> Tuple[bool, Path]:
+                       repo_name: Optional[str] = None, git_config: Optional[Dict[str, str]] = None,
+                       shallow: bool = True, use_mirror: bool = False, depth: int = 1,
+                       clone_mode: Optional[str] = None) -> Tuple[bool, Path]:
         """
         Clone a repository into the sandbox environment.
         
         Args:
             repo_url (str): URL of the repository to clone
-            branch (str, optional): Branch to checkout after cloning
+            branch (str, optional): Branch to check out
             repo_name (str, optional): Name to use for the clone directory
             git_config (Dict[str, str], optional): Git configuration to set up (e.g., user.name, user.email)
+            shallow (bool): Make a shallow, partial, single-branch clone (the default).
+                Set to False for a full clone with all branches and history.
+            use_mirror (bool): Keep a bare mirror of the repository in the sandbox cache and
+                copy objects from it, so repeated clones only download what changed
+            depth (int): Number of commits to fetch for a shallow clone
+            clone_mode (str, optional): One of CLONE_MODES, overriding shallow:
+                - "treeless": fetch commits only and check out just the top-level files
+                - "shallow": fetch the last `depth` commits, file contents on demand
+                - "blobless": fetch all commits and trees of the branch, file contents on demand
+                - "full": fetch everything on all branches
+                - "worktree": check out a linked worktree of the cached mirror, sharing its
+                  objects; only what changed since the last run is downloaded. Leaving the
+                  context manager removes it with `git worktree remove`.
         
         Returns:
             Tuple[bool, Path]: Success status and path to the cloned repository
         """
         self.repo_url = repo_url
         self.branch = branch
+        if clone_mode is None:
+            clone_mode = "shallow" if shallow else "full"
         
         try:
+            if clone_mode not in CLONE_MODES:
+                raise ValueError(f"Unknown clone mode {clone_mode!r}, expected one of {CLONE_MODES}")
+            
             # Determine the clone directory
             if self.working_dir:
                 self.clone_dir = self.working_dir
@@ -99,13 +128,35 @@ class GitCloneAgent:
                     except RuntimeError as e:
                         logger.warning(f"Failed to set Git config {key}: {str(e)}")
             
-            # Clone the repository
-            git_ops.clone_repo(repo_url, self.clone_dir)
-            logger.info(f"Successfully cloned {repo_url} to {self.clone_dir}")
+            if clone_mode == "worktree":
+                mirror_dir = git_ops.ensure_mirror(repo_url, sandbox_manager.MIRROR_CACHE_DIR)
+                git_ops.add_worktree(mirror_dir, self.clone_dir, branch or "HEAD")
+                logger.info(f"Successfully checked out {repo_url} at {self.clone_dir}")
+                self.success = True
+                return True, self.clone_dir
             
-            # Checkout the specified branch if provided
-            if branch and self.clone_dir.exists():
-                git_ops.run_git_command(["checkout", branch], cwd=self.clone_dir)
+            reference = None
+            if use_mirror:
+                try:
+                    reference = git_ops.ensure_mirror(repo_url, sandbox_manager.MIRROR_CACHE_DIR)
+                except RuntimeError as e:
+                    # The mirror only saves downloads, so clone without it
+                    logger.warning(f"Failed to update mirror, cloning without it: {str(e)}")
+            
+            # Clone the repository, checking out the requested branch directly
+            if clone_mode == "treeless":
+                git_ops.clone_repo(repo_url, self.clone_dir, branch=branch, depth=None,
+                                   filter="tree:0", reference=reference, no_checkout=True)
+                git_ops.checkout_root_only(self.clone_dir)
+            elif clone_mode == "shallow":
+                git_ops.clone_repo(repo_url, self.clone_dir, branch=branch, depth=depth, reference=reference)
+            elif clone_mode == "blobless":
+                git_ops.clone_repo(repo_url, self.clone_dir, branch=branch, depth=None, reference=reference)
+            else:
+                git_ops.clone_repo(repo_url, self.clone_dir, branch=branch, depth=None,
+                                   filter=None, single_branch=False, reference=reference)
+            logger.info(f"Successfully cloned {repo_url} to {self.clone_dir}")
+            if branch:
                 logger.info(f"Checked out branch {branch}")
             
             self.success = True
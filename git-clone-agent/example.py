@@ -1,10 +1,12 @@
 import logging
 import sys
-import os
 from pathlib import Path
 
+# Directory containing this script, resolved once at import
+_HERE = Path(__file__).resolve().parent
+
 # Add the current directory to the path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(_HERE))
 
 # Import the GitCloneAgent
 from core.agent import GitCloneAgent
@@ -23,9 +23,9 @@ logging.basicConfig(
 def test_clone_agent():
     print("\n===== TESTING GIT CLONE AGENT =====\n")
     
-    # Step 1: Initialize the sandbox root
-    print("Step 1: Initializing sandbox root...")
-    sandbox_manager.initialize_sandbox_root()
+    # Step 1: Reset the sandbox root
+    print("Step 1: Resetting sandbox root...")
+    sandbox_manager.reset_sandbox_root()
     print(f"Sandbox root initialized at: {sandbox_manager.ROOT_SANDBOX_DIR}")
     
     # Step 2: Clone a repository
@@ -43,23 +43,20 @@ def test_clone_agent():
             
             # List the contents of the cloned repository
             print("\nContents of the cloned repository:")
-            for item in clone_dir.iterdir():
-                if item.is_dir():
-                    print(f"  Directory: {item.name}")
-                else:
-                    print(f"  File: {item.name}")
+            with os.scandir(clone_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        print(f"  Directory: {entry.name}")
+                    else:
+                        print(f"  File: {entry.name}")
                     
             # Verify that the README.md file exists
             readme_path = clone_dir / "README.md"
             if readme_path.exists():
                 print(f"\nREADME.md exists at {readme_path}")
                 print("First 5 lines of README.md:")
-                with open(readme_path, 'r') as f:
-                    for i, line in enumerate(f):
-                        if i < 5:
-                            print(f"  {line.strip()}")
-                        else:
-                            break
+                for line in readme_path.read_text(errors="replace").splitlines()[:5]:
+                    print(f"  {line}")
             else:
                 print(f"\nREADME.md does not exist at {readme_path}")
         else:
@@ -0,0 +1,60 @@
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the agent directory to the path so we can import core and tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.agent import GitCloneAgent
+from tools import sandbox_manager
+
+
+class TestWorktreeClone(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(os.path.realpath(tempfile.mkdtemp(prefix="clone_agent_worktree_")))
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.repo_url = str(self.root / "origin")
+        subprocess.run(["git", "init", "-q", self.repo_url], check=True)
+        subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com",
+                        "commit", "-q", "--allow-empty", "-m", "Initial commit"], cwd=self.repo_url, check=True)
+        sandbox_dir = self.root / "sandbox"
+        patchers = [
+            patch.object(sandbox_manager, 'ROOT_SANDBOX_DIR', sandbox_dir),
+            patch.object(sandbox_manager, 'ROOT_PREFIX', os.fspath(sandbox_dir) + os.sep),
+            patch.object(sandbox_manager, 'MIRROR_CACHE_DIR', sandbox_dir / '.cache'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def clone(self) -> GitCloneAgent:
+        agent = GitCloneAgent()
+        success, _ = agent.clone_repository(self.repo_url, repo_name="origin", clone_mode="worktree")
+        self.assertTrue(success, agent.error_message)
+        return agent
+
+    def test_worktree_checked_out_again_after_context_exit(self):
+        # Test two runs at the same path, each removing its worktree on exit
+        for _ in range(2):
+            with self.clone() as agent:
+                self.assertTrue((agent.clone_dir / '.git').is_file())
+
+        # Verify
+        self.assertFalse(agent.clone_dir.exists())
+
+    def test_worktree_checked_out_again_after_directory_deleted(self):
+        # Test a worktree whose directory was deleted without git knowing
+        shutil.rmtree(self.clone().clone_dir)
+        agent = self.clone()
+
+        # Verify
+        self.assertTrue((agent.clone_dir / '.git').is_file())
+
+
+if __name__ == '__main__':
+    unittest.main()
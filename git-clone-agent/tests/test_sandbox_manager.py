@@ -0,0 +1,108 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the agent directory to the path so we can import from tools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools import sandbox_manager
+
+
+class TestSandboxManager(unittest.TestCase):
+
+    def setUp(self):
+        self.root = Path(os.path.realpath(tempfile.mkdtemp(prefix="clone_agent_sandbox_")))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def make_tree(self, name: str) -> Path:
+        tree = self.root / name
+        (tree / ".git" / "objects").mkdir(parents=True)
+        (tree / ".git" / "objects" / "pack").write_text("data")
+        (tree / "README.md").write_text("# repo")
+        return tree
+
+    def test_fast_rmtree_native(self):
+        tree = self.make_tree("native")
+
+        sandbox_manager._fast_rmtree(tree)
+
+        self.assertFalse(tree.exists())
+
+    def test_fast_rmtree_python_fallback(self):
+        tree = self.make_tree("fallback")
+
+        with patch.object(sandbox_manager, "USE_NATIVE_RM", False):
+            sandbox_manager._fast_rmtree(tree)
+
+        self.assertFalse(tree.exists())
+
+    def test_rmtree_scandir_removes_nested_tree_without_following_symlinks(self):
+        tree = self.make_tree("nested")
+        outside = self.root / "outside"
+        outside.mkdir()
+        (outside / "keep.txt").write_text("keep")
+        (tree / "link").symlink_to(outside, target_is_directory=True)
+        (tree / ".git" / "objects" / "pack").chmod(0o444)
+
+        sandbox_manager._rmtree_scandir(tree)
+
+        self.assertFalse(tree.exists())
+        self.assertTrue((outside / "keep.txt").exists())
+
+    def test_rmtree_scandir_without_dir_fd_support(self):
+        tree = self.make_tree("paths")
+
+        with patch.object(sandbox_manager, "_DIR_FD_REMOVAL", False):
+            sandbox_manager._rmtree_scandir(tree)
+
+        self.assertFalse(tree.exists())
+
+    def test_cleanup_clone_directory_deletes_in_background(self):
+        tree = self.make_tree("repo-example")
+
+        with patch.object(sandbox_manager, "ROOT_SANDBOX_DIR", self.root), \
+                patch.object(sandbox_manager, "ROOT_PREFIX", str(self.root) + os.sep):
+            sandbox_manager.cleanup_clone_directory(tree)
+            self.assertFalse(tree.exists())
+            sandbox_manager.wait_for_pending_cleanups()
+
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_cleanup_clone_directory_ignores_paths_outside_root(self):
+        sandbox = self.make_tree("sandbox")
+        outside = self.make_tree("sandbox-other")
+
+        with patch.object(sandbox_manager, "ROOT_SANDBOX_DIR", sandbox), \
+                patch.object(sandbox_manager, "ROOT_PREFIX", str(sandbox) + os.sep):
+            sandbox_manager.cleanup_clone_directory(outside)
+
+        self.assertTrue(outside.exists())
+
+    def test_reset_sandbox_root_empties_directory(self):
+        self.make_tree("repo-example")
+        (self.root / "stray.txt").write_text("stray")
+
+        with patch.object(sandbox_manager, "ROOT_SANDBOX_DIR", self.root):
+            sandbox_manager.reset_sandbox_root()
+
+        self.assertTrue(self.root.exists())
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_create_clone_directory_keeps_other_sandboxes(self):
+        other = self.make_tree("repo-other")
+
+        with patch.object(sandbox_manager, "ROOT_SANDBOX_DIR", self.root):
+            path = sandbox_manager.create_clone_directory("https://github.com/org/example.git")
+
+        self.assertEqual(path, self.root / "repo-example")
+        self.assertFalse(path.exists())
+        self.assertTrue((other / "README.md").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
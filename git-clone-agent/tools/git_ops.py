@@ -1,38 +1,203 @@
+import os
+import hashlib
 import subprocess
+import threading
 from pathlib import Path
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-def run_git_command(args: list, cwd: Path):
+# Verbs that fetch objects and benefit from git's parallelism settings
+_PARALLEL_VERBS = frozenset({"clone", "fetch", "submodule"})
+
+def _parallel_config() -> list:
+    """
+    Build the "-c" options that let git fetch submodules and index packs on all cores.
+    
+    Returns:
+        list: git config arguments to place before the verb
+    """
+    jobs = os.cpu_count() or 1
+    return [
+        "-c", f"submodule.fetchJobs={jobs}",
+        "-c", f"pack.threads={jobs}",
+        "-c", f"fetch.parallel={jobs}",
+        "-c", "index.threads=0",  # 0 lets git pick the thread count
+    ]
+
+# Amount of stderr kept for error messages when output is not captured
+_STDERR_TAIL_BYTES = 64 * 1024
+
+def _drain_tail(stream, tail: bytearray):
+    """
+    Read a stream to EOF, keeping only its last _STDERR_TAIL_BYTES bytes.
+    
+    Args:
+        stream: Binary stream to read
+        tail (bytearray): Buffer receiving the end of the stream
+    """
+    for chunk in iter(lambda: stream.read(8192), b""):
+        tail += chunk
+        if len(tail) > _STDERR_TAIL_BYTES:
+            del tail[:-_STDERR_TAIL_BYTES]
+
+def _run_streaming(command: list, cwd: Path):
+    """
+    Run a command without buffering its output.
+    stdout is read line by line and discarded, stderr is drained on a
+    background thread into a bounded buffer.
+    
+    Args:
+        command (list): Command and arguments to run
+        cwd (Path): Working directory for the command
+        
+    Returns:
+        tuple: Return code, last line of stdout, tail of stderr
+    """
+    stderr_tail = bytearray()
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    drain = threading.Thread(target=_drain_tail, args=(process.stderr, stderr_tail), daemon=True)
+    drain.start()
+    
+    last_line = b""
+    for line in process.stdout:
+        if line.strip():
+            last_line = line
+    
+    returncode = process.wait()
+    drain.join()
+    process.stdout.close()
+    process.stderr.close()
+    return (returncode, last_line.decode("utf-8", errors="replace").strip(),
+            stderr_tail.decode("utf-8", errors="replace"))
+
+def run_git_command(args: list, cwd: Path, parallel: bool = True, capture: bool = True):
     """
     Run a git command in the specified directory.
     
     Args:
         args (list): List of git command arguments
         cwd (Path): Working directory for the command
+        parallel (bool): Whether to enable git's parallel fetch/index settings
+            for clone, fetch and submodule commands
+        capture (bool): Whether to capture the full output. Long-running commands
+            such as clone and push pass False to stream their output instead.
         
     Returns:
-        str: Command output
+        str: Command output, or only its last line when capture is False
         
     Raises:
         RuntimeError: If the git command fails
     """
-    logger.info(f"Running git command: git {' '.join(args)} in {cwd}")
-    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
-    if result.returncode != 0:
-        error_msg = f"Git command failed: {result.stderr}"
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Running git command: git %s in %s", " ".join(args), cwd)
+    if parallel and args and args[0] in _PARALLEL_VERBS:
+        args = _parallel_config() + args
+    
+    if capture:
+        result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+        returncode, output, stderr = result.returncode, result.stdout.strip(), result.stderr
+    else:
+        returncode, output, stderr = _run_streaming(["git"] + args, cwd)
+    
+    if returncode != 0:
+        error_msg = f"Git command failed: {stderr}"
         logger.error(error_msg)
         raise RuntimeError(error_msg)
-    return result.stdout.strip()
+    return output
 
-def clone_repo(repo_url: str, target_dir: Path):
+def ensure_mirror(repo_url: str, cache_dir: Path) -> Path:
+    """
+    Create or update a local bare mirror of a repository, for use as a clone reference.
+    The first call downloads the mirror; later calls only fetch what changed.
+    
+    Args:
+        repo_url (str): URL of the repository to mirror
+        cache_dir (Path): Directory holding the mirrors, keyed by a hash of the URL
+        
+    Returns:
+        Path: Path to the bare mirror
+        
+    Raises:
+        RuntimeError: If the mirror cannot be created or updated
+    """
+    mirror_dir = cache_dir / f"{hashlib.sha1(repo_url.encode('utf-8')).hexdigest()}.git"
+    if mirror_dir.exists():
+        logger.info("Updating mirror of %s at %s", repo_url, mirror_dir)
+        run_git_command(["fetch", "--prune"], cwd=mirror_dir, capture=False)
+        # Forget worktrees whose directories were deleted, so their paths can be used again
+        run_git_command(["worktree", "prune"], cwd=mirror_dir)
+    else:
+        logger.info("Creating mirror of %s at %s", repo_url, mirror_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        run_git_command(["clone", "--mirror", "--filter=blob:none", repo_url, str(mirror_dir)],
+                        cwd=cache_dir, capture=False)
+        # Keep fetching every ref, but let worktrees push single branches to origin
+        run_git_command(["config", "--unset", "remote.origin.mirror"], cwd=mirror_dir)
+    return mirror_dir
+
+def add_worktree(mirror_dir: Path, target_dir: Path, ref: str = "HEAD"):
+    """
+    Check out a commit of a local mirror into target_dir as a linked worktree.
+    The worktree shares the mirror's object store, so nothing is copied or downloaded
+    except file contents the mirror has not fetched yet.
+    
+    Args:
+        mirror_dir (Path): Bare repository to add the worktree to (e.g. from ensure_mirror)
+        target_dir (Path): Directory for the worktree; it must not exist yet or be empty
+        ref (str): Commit or branch to check out, detached
+        
+    Returns:
+        str: Command output
+        
+    Raises:
+        RuntimeError: If the worktree cannot be added
+    """
+    logger.info("Adding worktree of %s at %s", mirror_dir, target_dir)
+    return run_git_command(["worktree", "add", "--detach", str(target_dir), ref], cwd=mirror_dir)
+
+def remove_worktree(path: Path) -> bool:
+    """
+    Remove a linked worktree and its record in the mirror it belongs to.
+    
+    Args:
+        path (Path): Directory of the worktree
+        
+    Returns:
+        bool: True if the worktree was removed, False if path is not a linked worktree
+        
+    Raises:
+        RuntimeError: If the worktree cannot be removed
+    """
+    # A linked worktree has a .git file pointing at its repository instead of a .git directory
+    if not (path / '.git').is_file():
+        return False
+    common_dir = (path / run_git_command(["rev-parse", "--git-common-dir"], cwd=path)).resolve()
+    logger.info("Removing worktree at %s", path)
+    run_git_command(["worktree", "remove", "--force", str(path)], cwd=common_dir)
+    return True
+
+def clone_repo(repo_url: str, target_dir: Path, branch: Optional[str] = None, depth: Optional[int] = 1,
+               filter: Optional[str] = "blob:none", single_branch: bool = True, jobs: Optional[int] = None,
+               reference: Optional[Path] = None, no_checkout: bool = False):
     """
     Clone a git repository into the target directory.
+    git creates the directory itself; it must not exist yet or be empty.
+    By default this is a shallow, partial, single-branch clone: only the tip commit
+    is fetched and file contents are downloaded on demand at checkout.
     
     Args:
         repo_url (str): URL of the repository to clone
         target_dir (Path): Directory to clone the repository into
+        branch (str, optional): Branch to clone. Defaults to the remote's default branch.
+        depth (int, optional): Number of commits to fetch. None fetches the full history.
+        filter (str, optional): Partial clone filter spec (e.g. "blob:none"). None disables filtering.
+        single_branch (bool): Whether to fetch only the cloned branch
+        jobs (int, optional): Number of submodules fetched in parallel
+        reference (Path, optional): Local repository (e.g. from ensure_mirror) to copy
+            objects from instead of downloading them. The clone does not depend on it afterwards.
+        no_checkout (bool): Whether to skip checking out the working tree
         
     Returns:
         str: Command output
@@ -40,16 +205,44 @@ def clone_repo(repo_url: str, target_dir: Path):
     Raises:
         RuntimeError: If the clone operation fails
     """
-    # We expect target_dir to be an empty directory that already exists
-    if not target_dir.exists():
-        raise RuntimeError(f"Target directory {target_dir} does not exist")
+    args = ["clone"]
+    if depth is not None:
+        args += ["--depth", str(depth)]
+    if filter:
+        args += ["--filter", filter]
+    if single_branch:
+        args.append("--single-branch")
+    if branch:
+        args += ["--branch", branch]
+    if jobs:
+        args += ["--jobs", str(jobs)]
+    if reference:
+        args += ["--reference-if-able", str(reference), "--dissociate"]
+    if no_checkout:
+        args.append("--no-checkout")
+    args += [repo_url, str(target_dir)]
     
-    # Check if the directory is empty
-    if any(target_dir.iterdir()):
-        raise RuntimeError(f"Target directory {target_dir} is not empty")
+    logger.info("Cloning repository %s into %s", repo_url, target_dir)
+    return run_git_command(args, cwd=target_dir.parent, capture=False)
+
+def checkout_root_only(cwd: Path):
+    """
+    Check out only the files at the top level of a clone made with no_checkout.
+    Subdirectories stay out of the working tree, so a treeless clone never has to
+    fetch their trees or blobs.
     
-    logger.info(f"Cloning repository {repo_url} into {target_dir}")
-    return run_git_command(["clone", repo_url, "."], cwd=target_dir)
+    Args:
+        cwd (Path): Git repository directory
+        
+    Returns:
+        str: Command output
+        
+    Raises:
+        RuntimeError: If the sparse checkout fails
+    """
+    logger.info("Checking out top-level files only in %s", cwd)
+    run_git_command(["sparse-checkout", "set", "--cone"], cwd=cwd)
+    return run_git_command(["checkout"], cwd=cwd)
 
 def create_branch(branch_name: str, cwd: Path):
     """
@@ -65,7 +258,7 @@ def create_branch(branch_name: str, cwd: Path):
     Raises:
         RuntimeError: If the branch creation fails
     """
-    logger.info(f"Creating branch {branch_name} in {cwd}")
+    logger.info("Creating branch %s in %s", branch_name, cwd)
     return run_git_command(["checkout", "-b", branch_name], cwd=cwd)
 
 def commit_all(message: str, cwd: Path):
@@ -82,7 +275,7 @@ def commit_all(message: str, cwd: Path):
     Raises:
         RuntimeError: If the commit operation fails
     """
-    logger.info(f"Committing all changes in {cwd} with message: {message}")
+    logger.info("Committing all changes in %s with message: %s", cwd, message)
     run_git_command(["add", "."], cwd=cwd)
     return run_git_command(["commit", "-m", message], cwd=cwd)
 
@@ -100,5 +293,5 @@ def push_branch(branch_name: str, cwd: Path):
     Raises:
         RuntimeError: If the push operation fails
     """
-    logger.info(f"Pushing branch {branch_name} from {cwd}")
-    return run_git_command(["push", "-u", "origin", branch_name], cwd=cwd)
+    logger.info("Pushing branch %s from %s", branch_name, cwd)
+    return run_git_command(["push", "-u", "origin", branch_name], cwd=cwd, capture=False)
@@ -1,55 +1,199 @@
 import shutil
 import os
+import stat
 import uuid
+import atexit
 import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-# Root directory for all sandboxes
-ROOT_SANDBOX_DIR = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'application-sandbox')))
+# Root directory for all sandboxes, resolved once at import
+ROOT_SANDBOX_DIR = Path(os.path.realpath(os.path.join(os.path.dirname(__file__), '..', '..', 'application-sandbox')))
+# String prefix of every path inside the sandbox root, for cheap containment checks
+ROOT_PREFIX = os.fspath(ROOT_SANDBOX_DIR) + os.sep
+# Bare mirrors reused as clone references across sandboxes
+MIRROR_CACHE_DIR = ROOT_SANDBOX_DIR / '.cache'
 
-def initialize_sandbox_root() -> None:
+# Delete directory trees with the platform's native tool instead of walking them from Python.
+# Set to False to always use the Python implementation (_rmtree_scandir).
+USE_NATIVE_RM = True
+
+# Clone directories are renamed out of the way and deleted on this worker,
+# so cleanup returns as soon as the rename is done
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sandbox-cleanup")
+
+def wait_for_pending_cleanups() -> None:
+    """
+    Block until all background deletions scheduled by cleanup_clone_directory have finished.
+    """
+    # The single worker runs tasks in order, so this completes after everything queued before it
+    _cleanup_executor.submit(lambda: None).result()
+
+atexit.register(_cleanup_executor.shutdown, wait=True)
+
+def _native_rm_command(path: Path) -> list:
+    """
+    Build the native command that removes a directory tree, if one is available.
+    
+    Args:
+        path (Path): Directory to remove
+    
+    Returns:
+        list: Command arguments, or an empty list if no native tool is available
+    """
+    if os.name == 'nt':
+        return ["cmd", "/c", "rd", "/s", "/q", str(path)] if shutil.which("cmd") else []
+    return ["rm", "-rf", str(path)] if shutil.which("rm") else []
+
+# Whether files can be removed relative to an open directory descriptor (unlinkat),
+# which saves resolving the full path of every file in a large .git tree
+_DIR_FD_REMOVAL = (
+    os.scandir in os.supports_fd
+    and os.unlink in os.supports_dir_fd
+    and os.open in os.supports_dir_fd
+)
+
+def _unlink(path: str, dir_fd: int = None) -> None:
+    """
+    Remove a file or symlink, clearing the read-only flag if needed (e.g. git objects on Windows).
+    
+    Args:
+        path (str): Path to remove, relative to dir_fd if given
+        dir_fd (int, optional): Descriptor of the directory containing the file
+    """
+    try:
+        os.unlink(path, dir_fd=dir_fd)
+    except PermissionError:
+        if dir_fd is not None:
+            raise
+        os.chmod(path, stat.S_IWRITE)
+        os.unlink(path)
+
+def _remove_entries(dir_path: str) -> list:
+    """
+    Remove the files and symlinks in a directory and return its subdirectories.
+    Files are unlinked relative to an open descriptor of the directory where supported.
+    
+    Args:
+        dir_path (str): Directory to empty
+    
+    Returns:
+        list: Paths of the subdirectories, which still need to be removed
+    """
+    subdirs = []
+    dir_fd = os.open(dir_path, os.O_RDONLY) if _DIR_FD_REMOVAL else None
+    try:
+        with os.scandir(dir_fd if dir_fd is not None else dir_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(os.path.join(dir_path, entry.name))
+                    else:
+                        _unlink(entry.name if dir_fd is not None else entry.path, dir_fd=dir_fd)
+                except OSError as e:
+                    logger.debug("Failed to remove %s: %s", os.path.join(dir_path, entry.name), e)
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    return subdirs
+
+def _rmtree_scandir(root: Path) -> None:
+    """
+    Remove a directory tree iteratively using os.scandir.
+    Entry types come from the cached DirEntry data (no extra stat calls), files are
+    unlinked relative to their directory's descriptor where supported, symlinks are
+    removed rather than followed, and an explicit stack replaces recursion.
+    Errors are logged at debug level and skipped, like shutil.rmtree(ignore_errors=True).
+    
+    Args:
+        root (Path): Directory to remove
+    """
+    # Each item is (directory, children_removed); a directory is removed on its second visit
+    stack = [(str(root), False)]
+    while stack:
+        dir_path, children_removed = stack.pop()
+        if children_removed:
+            try:
+                os.rmdir(dir_path)
+            except OSError as e:
+                logger.debug("Failed to remove directory %s: %s", dir_path, e)
+            continue
+        
+        stack.append((dir_path, True))
+        try:
+            stack.extend((subdir, False) for subdir in _remove_entries(dir_path))
+        except OSError as e:
+            logger.debug("Failed to scan directory %s: %s", dir_path, e)
+
+def _fast_rmtree(path: Path) -> None:
     """
-    Initializes the root application-sandbox directory.
+    Remove a directory tree, preferring the native rm -rf / rd /s /q over a Python walk.
+    Errors are logged rather than raised, matching shutil.rmtree(ignore_errors=True).
+    
+    Args:
+        path (Path): Directory to remove
+    """
+    command = _native_rm_command(path) if USE_NATIVE_RM else []
+    if command:
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning("Native removal of %s failed, falling back to Python removal: %s", path, e)
+    
+    _rmtree_scandir(path)
+
+def ensure_sandbox_root() -> None:
+    """
+    Creates the root application-sandbox directory if it doesn't exist.
+    Existing sandboxes are left untouched.
+    """
+    os.makedirs(ROOT_SANDBOX_DIR, exist_ok=True)
+
+def reset_sandbox_root() -> None:
+    """
+    Resets the root application-sandbox directory.
     If the directory doesn't exist, it creates it.
-    If the directory already exists, it deletes all files and folders inside it.
+    If the directory already exists, it deletes all files and folders inside it,
+    including the sandboxes of any other running agent.
     """
     if ROOT_SANDBOX_DIR.exists():
-        logger.info(f"Cleaning up existing application-sandbox directory at {ROOT_SANDBOX_DIR}")
+        logger.info("Cleaning up existing application-sandbox directory at %s", ROOT_SANDBOX_DIR)
         # Remove all contents but keep the directory
-        for item in ROOT_SANDBOX_DIR.iterdir():
-            if item.is_dir():
-                shutil.rmtree(item, ignore_errors=True)
-            else:
-                item.unlink()
-        logger.info(f"Cleaned up application-sandbox directory at {ROOT_SANDBOX_DIR}")
+        with os.scandir(ROOT_SANDBOX_DIR) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    _fast_rmtree(Path(entry.path))
+                else:
+                    _unlink(entry.path)
+        logger.info("Cleaned up application-sandbox directory at %s", ROOT_SANDBOX_DIR)
     else:
-        logger.info(f"Creating application-sandbox directory at {ROOT_SANDBOX_DIR}")
+        logger.info("Creating application-sandbox directory at %s", ROOT_SANDBOX_DIR)
         os.makedirs(ROOT_SANDBOX_DIR, exist_ok=True)
-        logger.info(f"Created application-sandbox directory at {ROOT_SANDBOX_DIR}")
+        logger.info("Created application-sandbox directory at %s", ROOT_SANDBOX_DIR)
 
 def create_clone_directory(repo_name: str = None) -> Path:
     """
-    Creates a directory for cloning a repository within the application-sandbox directory.
-    Ensures the directory is empty before returning it.
+    Picks the directory for cloning a repository within the application-sandbox directory.
+    Any existing directory at that path is removed; the directory itself is left
+    for `git clone` to create.
     
     Args:
         repo_name (str, optional): Name of the repository. If not provided, a UUID will be used.
     
     Returns:
-        Path: Path to the created directory
+        Path: Path to the clone directory
     """
-    # Initialize the root sandbox directory
-    initialize_sandbox_root()
+    # Make sure the root sandbox directory exists
+    ensure_sandbox_root()
     
     # Create a directory name based on the repo name or a UUID
     if repo_name:
         # Extract just the repo name from the URL if a full URL was provided
-        if '/' in repo_name:
-            repo_name = repo_name.split('/')[-1]
-        if '.git' in repo_name:
-            repo_name = repo_name.replace('.git', '')
+        repo_name = os.path.basename(repo_name).removesuffix('.git')
         
         dir_name = f"repo-{repo_name}"
     else:
@@ -61,32 +205,37 @@ def create_clone_directory(repo_name: str = None) -> Path:
     
     # If the directory exists, clean it up first
     if path.exists():
-        logger.info(f"Cleaning up existing clone directory at {path}")
-        shutil.rmtree(path, ignore_errors=True)
-        # Ensure it's completely removed before proceeding
+        logger.info("Cleaning up existing clone directory at %s", path)
+        _fast_rmtree(path)
+        # Read-only files are already handled during removal, so anything left is a real error
         if path.exists():
-            logger.warning(f"Failed to remove directory {path}, retrying...")
-            import time
-            time.sleep(0.5)  # Give the system a moment
-            shutil.rmtree(path, ignore_errors=True)
-    
-    # Create a fresh directory
-    os.makedirs(path, exist_ok=False)  # Should fail if directory still exists
+            raise RuntimeError(f"Failed to remove existing clone directory {path}")
     
-    logger.info(f"Created clone directory at {path}")
+    logger.info("Using clone directory at %s", path)
     return path
 
 def cleanup_clone_directory(path: Path) -> None:
     """
     Cleans up a clone directory.
+    The directory is atomically renamed to a hidden trash directory in the sandbox
+    root and deleted in the background; use wait_for_pending_cleanups() to wait
+    for the deletion to finish.
     
     Args:
         path (Path): Path to the directory to clean up
     """
-    if path.exists() and path.is_relative_to(ROOT_SANDBOX_DIR):
-        logger.info(f"Cleaning up clone directory at {path}")
-        shutil.rmtree(path, ignore_errors=True)
-    elif not path.is_relative_to(ROOT_SANDBOX_DIR):
-        logger.warning(f"Attempted to clean up directory outside of sandbox root: {path}")
+    inside_root = os.path.realpath(path).startswith(ROOT_PREFIX)
+    if inside_root and path.exists():
+        logger.info("Cleaning up clone directory at %s", path)
+        trash_path = ROOT_SANDBOX_DIR / f".trash-{uuid.uuid4().hex}"
+        try:
+            os.replace(path, trash_path)
+        except OSError as e:
+            logger.warning("Could not move %s aside, deleting it in place: %s", path, e)
+            _fast_rmtree(path)
+            return
+        _cleanup_executor.submit(_fast_rmtree, trash_path)
+    elif not inside_root:
+        logger.warning("Attempted to clean up directory outside of sandbox root: %s", path)
     else:
-        logger.warning(f"Attempted to clean up non-existent directory at {path}")
+        logger.warning("Attempted to clean up non-existent directory at %s", path)
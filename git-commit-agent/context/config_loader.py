@@ -1,7 +1,8 @@
 import os
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
 # Import dotenv if available, otherwise provide a warning
 try:
@@ -13,11 +14,32 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Central .env file in the project root and the agent-specific one that overrides it
+CENTRAL_ENV_PATH = Path(__file__).resolve().parent.parent.parent / '.env'
+AGENT_ENV_PATH = Path(__file__).resolve().parent.parent / '.env'
+
+def _env_mtime(path: Path) -> Optional[int]:
+    """
+    Get the modification time of an .env file.
+    
+    Args:
+        path (Path): Path to the .env file
+    
+    Returns:
+        Optional[int]: Modification time in nanoseconds, or None if the file does not exist
+    """
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
 def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]:
     """
     Load environment variables from .env files.
     First loads from the central .env file in the project root,
     then loads from the agent-specific .env file which can override central values.
+    The result is cached until either .env file changes; call
+    load_env_config.cache_clear() to force a reload.
     
     Args:
         required_vars (List[str], optional): List of required environment variables.
@@ -29,6 +51,23 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
     if required_vars is None:
         required_vars = ['GITHUB_TOKEN', 'GIT_AUTHOR_NAME', 'GIT_AUTHOR_EMAIL']
     
+    # Hand out a copy so callers cannot modify the cached result
+    return dict(_load_env_config(tuple(required_vars), _env_mtime(CENTRAL_ENV_PATH), _env_mtime(AGENT_ENV_PATH)))
+
+@lru_cache(maxsize=4)
+def _load_env_config(required_vars: Tuple[str, ...], central_mtime: Optional[int],
+                     agent_mtime: Optional[int]) -> Dict[str, str]:
+    """
+    Load environment variables from .env files (cached implementation of load_env_config).
+    
+    Args:
+        required_vars (Tuple[str, ...]): Required environment variables
+        central_mtime (Optional[int]): Modification time of the central .env file, part of the cache key
+        agent_mtime (Optional[int]): Modification time of the agent-specific .env file, part of the cache key
+    
+    Returns:
+        Dict[str, str]: Dictionary of loaded environment variables
+    """
     loaded_vars = {}
     
     if not DOTENV_AVAILABLE:
@@ -36,7 +75,7 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
         return loaded_vars
     
     # Load from central .env file first
-    central_env_path = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '.env')))
+    central_env_path = CENTRAL_ENV_PATH
     if central_env_path.exists():
         logger.info(f"Loading environment variables from central .env file: {central_env_path}")
         load_dotenv(central_env_path)
@@ -45,7 +84,7 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
         logger.warning(f"Central .env file not found at {central_env_path}")
     
     # Then load from agent-specific .env file (which can override central values)
-    agent_env_path = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env')))
+    agent_env_path = AGENT_ENV_PATH
     if agent_env_path.exists():
         logger.info(f"Loading environment variables from agent-specific .env file: {agent_env_path}")
         load_dotenv(agent_env_path, override=True)
@@ -69,6 +108,8 @@ def load_env_config(required_vars: Optional[List[str]] = None) -> Dict[str, str]
     
     return loaded_vars
 
+load_env_config.cache_clear = _load_env_config.cache_clear
+
 # Example usage
 if __name__ == "__main__":
     # Configure logging
@@ -34,6 +34,7 @@ class GitCommitAgent:
         self.error_message = None
         self.commit_hash = None
         self.branch_name = None
+        self.git_session = None
         
         # Validate that the directory exists and is a Git repository
         self._validate_repo()
@@ -63,9 +64,28 @@ class GitCommitAgent:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
-        Context manager exit point.
+        Context manager exit point. Stops the git helper process if one was started.
         """
-        pass
+        self.close()
+    
+    def close(self) -> None:
+        """
+        Stop the git helper process if one was started.
+        """
+        if self.git_session:
+            self.git_session.close()
+            self.git_session = None
+    
+    def _get_session(self) -> "git_ops.GitSession":
+        """
+        Get the git session used for read-only queries, creating it on first use.
+        
+        Returns:
+            git_ops.GitSession: The session for this repository
+        """
+        if self.git_session is None:
+            self.git_session = git_ops.GitSession.for_repo(self.repo_dir)
+        return self.git_session
     
     def stage_files(self, files: List[str]) -> bool:
         """
@@ -117,9 +137,9 @@ class GitCommitAgent:
         try:
             output = git_ops.commit_changes(message, self.repo_dir)
             self.success = True
-            # Extract commit hash from output if possible
+            # Record the new commit and the branch it landed on
             try:
-                self.commit_hash = git_ops.get_commit_hash(self.repo_dir)
+                self.commit_hash, self.branch_name = self._get_session().head_info()
             except RuntimeError:
                 # If we can't get the hash, it's not a critical error
                 logger.warning("Could not retrieve commit hash")
@@ -130,22 +150,24 @@ class GitCommitAgent:
             logger.error(f"Failed to commit changes: {str(e)}")
             return False
     
-    def commit_all(self, message: str) -> bool:
+    def commit_all(self, message: str, include_untracked: bool = False) -> bool:
         """
-        Stage all changes and create a commit.
+        Stage all changes to tracked files and create a commit.
         
         Args:
             message (str): Commit message
+            include_untracked (bool, optional): Whether to also stage and commit new, untracked files.
+                Defaults to False, which commits with a single `git commit -a`.
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            output = git_ops.commit_all(message, self.repo_dir)
+            output = git_ops.commit_all(message, self.repo_dir, include_untracked)
             self.success = True
-            # Extract commit hash from output if possible
+            # Record the new commit and the branch it landed on
             try:
-                self.commit_hash = git_ops.get_commit_hash(self.repo_dir)
+                self.commit_hash, self.branch_name = self._get_session().head_info()
             except RuntimeError:
                 # If we can't get the hash, it's not a critical error
                 logger.warning("Could not retrieve commit hash")
@@ -213,7 +235,7 @@ class GitCommitAgent:
         try:
             # Get current branch if not specified
             if branch is None:
-                branch = git_ops.get_current_branch(self.repo_dir)
+                branch = self._get_session().current_branch()
             
             self.branch_name = branch
             output = git_ops.push_branch(branch, self.repo_dir, remote)
@@ -243,7 +265,8 @@ class GitCommitAgent:
 # Simplified function to stage, commit, and push changes
 def commit_and_push(repo_dir: Path, commit_message: str, push: bool = True, 
                    branch: Optional[str] = None, create_branch: bool = False,
-                   base_branch: Optional[str] = None, remote: str = "origin") -> Dict[str, Union[bool, str, None]]:
+                   base_branch: Optional[str] = None, remote: str = "origin",
+                   include_untracked: bool = True) -> Dict[str, Union[bool, str, None]]:
     """
     Stage all changes, commit, and optionally push to remote.
     
@@ -255,6 +278,8 @@ def commit_and_push(repo_dir: Path, commit_message: str, push: bool = True,
         create_branch (bool, optional): Whether to create a new branch. Defaults to False.
         base_branch (str, optional): Base branch to create from. Only used if create_branch is True.
         remote (str, optional): Remote name. Defaults to "origin".
+        include_untracked (bool, optional): Whether to include new, untracked files. Defaults to True.
+            Pass False to commit only tracked files with a single git command.
         
     Returns:
         Dict: Status information including success, commit hash, and error message if any
@@ -266,7 +291,7 @@ def commit_and_push(repo_dir: Path, commit_message: str, push: bool = True,
                 return agent.get_status()
         
         # Stage and commit all changes
-        if not agent.commit_all(commit_message):
+        if not agent.commit_all(commit_message, include_untracked):
             return agent.get_status()
         
         # Push changes if requested
@@ -1,15 +1,21 @@
 import logging
 import os
+import stat
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add the current directory to the path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+_HERE = Path(__file__).resolve().parent
+_BASE_SANDBOX = (_HERE / '..' / 'application-sandbox').resolve()
+sys.path.append(str(_HERE))
 
 # Import the config loader and GitCommitAgent
 from context.config_loader import load_env_config
 from core.agent import GitCommitAgent, commit_and_push
+from tools import git_ops
+from tools.git_config_cache import set_config
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +29,70 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def write_files_batched(files, append=False):
+    """
+    Write each file's content in a single write call.
+    
+    Args:
+        files (list): (path, bytes) pairs to write
+        append (bool): Whether to append to the files instead of overwriting them
+    """
+    mode = 'ab' if append else 'wb'
+    for path, content in files:
+        with open(path, mode, buffering=512 * 1024) as f:
+            f.write(content)
+
+def _unlink_batch(paths):
+    """
+    Remove a batch of files, clearing the read-only flag if needed (e.g. git objects on Windows).
+    
+    Args:
+        paths (list): Paths of the files to remove
+    """
+    for path in paths:
+        try:
+            os.unlink(path)
+        except PermissionError:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+
+def fast_rmtree(path, max_workers=8, batch_size=1024):
+    """
+    Remove a directory tree, unlinking files on a thread pool.
+    Per-file unlink latency dominates for .git trees (especially on Windows)
+    and the GIL is released during the syscall, so the unlinks overlap.
+    
+    Args:
+        path: Directory to remove
+        max_workers (int): Number of threads unlinking files
+        batch_size (int): Number of files handed to a thread at once
+    """
+    directories = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        batch = []
+        stack = [os.fspath(path)]
+        while stack:
+            directory = stack.pop()
+            directories.append(directory)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        batch.append(entry.path)
+                        if len(batch) >= batch_size:
+                            futures.append(executor.submit(_unlink_batch, batch))
+                            batch = []
+        if batch:
+            futures.append(executor.submit(_unlink_batch, batch))
+        for future in futures:
+            future.result()  # Re-raise the first error
+    
+    # Parents are listed before their children, so remove directories in reverse order
+    for directory in reversed(directories):
+        os.rmdir(directory)
+
 def main():
     print("\n===== GIT COMMIT AGENT EXAMPLE =====\n")
     
@@ -41,8 +111,6 @@ def main():
     try:
         import uuid
         import datetime
-        import subprocess
-        import shutil
         
         # Create a unique sandbox directory with timestamp and UUID
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -50,12 +118,9 @@ def main():
         sandbox_name = f"sandbox_{timestamp}_{unique_id}"
         
         # Create the unique sandbox directory inside application-sandbox
-        base_sandbox_dir = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'application-sandbox')))
-        if not os.path.exists(base_sandbox_dir):
-            os.makedirs(base_sandbox_dir)
-            
-        sandbox_path = Path(os.path.join(base_sandbox_dir, sandbox_name))
-        os.makedirs(sandbox_path)
+        _BASE_SANDBOX.mkdir(parents=True, exist_ok=True)
+        sandbox_path = _BASE_SANDBOX / sandbox_name
+        sandbox_path.mkdir()
         print(f"Created new sandbox at: {sandbox_path}")
         
     except Exception as e:
@@ -69,28 +134,31 @@ def main():
         repo_url = env_vars.get('DEFAULT_REPO_URL', "https://github.com/cr-nattress/ai-devops-lab.git")
         print(f"Using repository: {repo_url}")
         
-        # Change to the sandbox directory
-        os.chdir(sandbox_path)
+        # Clone the repository. Only the tip of the default branch is needed for one
+        # commit, so make a shallow, partial clone unless FULL_HISTORY=1 is set.
+        print(f"Cloning {repo_url} to {sandbox_path}...")
+        clone_args = ["clone", "--progress"]
+        if os.environ.get("FULL_HISTORY") != "1":
+            clone_args += ["--depth=1", "--filter=blob:none", "--single-branch"]
+        try:
+            # Progress is logged as it arrives rather than buffered until git exits
+            git_ops.run_git_command_streaming(clone_args + [repo_url, "."], cwd=sandbox_path)
+        except RuntimeError as clone_err:
+            print(f"Failed to clone repository: {str(clone_err)}")
+            raise RuntimeError("Failed to clone repository")
+        
+        print("Repository cloned successfully")
         
-        # Set Git configuration
+        # Set Git configuration in the sandbox repository only, leaving the user's
+        # global configuration alone (only keys whose value differs are written)
+        set_config(git_config, "local", cwd=sandbox_path)
         for key, value in git_config.items():
-            subprocess.run(["git", "config", "--global", key, value], check=True)
             print(f"Set Git config {key}={value}")
         
-        # Clone the repository
-        print(f"Cloning {repo_url} to {sandbox_path}...")
-        result = subprocess.run(["git", "clone", repo_url, "."], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("Repository cloned successfully")
-            
-            # List the contents of the cloned repository
-            print("\nContents of the cloned repository:")
-            for item in os.listdir(sandbox_path):
-                print(f"  - {item}")
-        else:
-            print(f"Failed to clone repository: {result.stderr}")
-            raise RuntimeError("Failed to clone repository")
+        # List the contents of the cloned repository
+        print("\nContents of the cloned repository:")
+        with os.scandir(sandbox_path) as entries:
+            sys.stdout.write("".join(f"  - {entry.name}\n" for entry in entries))
             
     except Exception as e:
         print(f"Error cloning repository: {str(e)}")
@@ -115,18 +183,20 @@ def main():
     
     # Step 4: Make changes to the repository
     print("\nStep 4: Making changes to the repository...")
+    # Files written in this step, so only these need to be staged
+    touched_paths = []
     try:
         # Create a new file in the repository
-        new_file_path = os.path.join(sandbox_path, 'hello_from_commit_agent.txt')
-        with open(new_file_path, 'w') as f:
-            f.write(f"Hello from the Git Commit Agent!\nThis file was created at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        new_file_path = sandbox_path / 'hello_from_commit_agent.txt'
+        write_files_batched([(new_file_path, f"Hello from the Git Commit Agent!\nThis file was created at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n".encode())])
+        touched_paths.append(new_file_path)
         print(f"Created new file: {new_file_path}")
         
         # Modify an existing file
-        readme_path = os.path.join(sandbox_path, 'README.md')
-        if os.path.exists(readme_path):
-            with open(readme_path, 'a') as f:
-                f.write("\n\n## Changes by Git Commit Agent\n\nThis repository was modified by the Git Commit Agent.\n")
+        readme_path = sandbox_path / 'README.md'
+        if readme_path.exists():
+            write_files_batched([(readme_path, b"\n\n## Changes by Git Commit Agent\n\nThis repository was modified by the Git Commit Agent.\n")], append=True)
+            touched_paths.append(readme_path)
             print(f"Modified file: {readme_path}")
     except Exception as e:
         print(f"Error making changes: {str(e)}")
@@ -135,8 +205,9 @@ def main():
     # Step 5: Stage and commit the changes
     print("\nStep 5: Staging and committing changes...")
     try:
-        # Stage all changes
-        if commit_agent.stage_all():
+        # Stage only the files written above instead of scanning the whole working tree
+        staged = commit_agent.stage_files(touched_paths) if touched_paths else commit_agent.stage_all()
+        if staged:
             print("Successfully staged all changes")
         else:
             print(f"Failed to stage changes: {commit_agent.error_message}")
@@ -154,76 +225,64 @@ def main():
         print(f"Error committing changes: {str(e)}")
         return
     
-    # Step 6: Push the changes
-    print("\nStep 6: Pushing changes...\n(Note: This will likely fail without proper authentication)")
-    try:
-        # Push the changes
-        if commit_agent.push():
-            print("Successfully pushed changes to remote repository")
-        else:
-            print(f"Failed to push changes: {commit_agent.error_message}")
-            print("\nNote: This is expected without proper authentication.")
-            print("To push changes in a real scenario, you would need:")
-            print("1. Proper GitHub authentication")
-            print("2. Write access to the repository")
-            print("3. Possibly a personal access token or SSH key")
-    except Exception as e:
-        print(f"Error pushing changes: {str(e)}")
-    
-    # Step 7: Demonstrate the simplified commit_and_push function
-    print("\nStep 7: Demonstrating simplified commit_and_push function...")
+    # Step 6: Demonstrate the simplified commit_and_push function.
+    # The push is deferred so both commits go out in a single push in step 7.
+    print("\nStep 6: Demonstrating simplified commit_and_push function...")
     try:
         # Create another file for the second commit
-        second_file_path = os.path.join(sandbox_path, 'second_commit.txt')
-        with open(second_file_path, 'w') as f:
-            f.write(f"This is a second commit test.\nCreated at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        second_file_path = sandbox_path / 'second_commit.txt'
+        write_files_batched([(second_file_path, f"This is a second commit test.\nCreated at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n".encode())])
         print(f"Created new file: {second_file_path}")
         
-        # Use the simplified function to commit and push in one call
+        # Use the simplified function to commit in one call
         commit_message = "Add second_commit.txt"
         result = commit_and_push(
             repo_dir=sandbox_path,
             commit_message=commit_message,
-            push=True
+            push=False
         )
         
         if result["success"]:
-            print(f"Successfully committed and pushed changes with message: '{commit_message}'")
+            print(f"Successfully committed changes with message: '{commit_message}'")
             print(f"Commit hash: {result['commit_hash']}")
         else:
             print(f"Failed in commit_and_push: {result['error']}")
     except Exception as e:
         print(f"Error in commit_and_push: {str(e)}")
     
-    # Step 8: Wait for 5 seconds before cleanup
-    print("\nStep 8: Waiting for 5 seconds before cleanup...")
-    for i in range(5, 0, -1):
-        print(f"Cleaning up in {i} seconds...", end="\r")
-        time.sleep(1)
-    print("\nWait complete.")
+    # Step 7: Push both commits with a single push
+    print("\nStep 7: Pushing changes...\n(Note: This will likely fail without proper authentication)")
+    try:
+        # Push the changes
+        if commit_agent.push():
+            print("Successfully pushed changes to remote repository")
+        else:
+            print(f"Failed to push changes: {commit_agent.error_message}")
+            print("\nNote: This is expected without proper authentication.")
+            print("To push changes in a real scenario, you would need:")
+            print("1. Proper GitHub authentication")
+            print("2. Write access to the repository")
+            print("3. Possibly a personal access token or SSH key")
+    except Exception as e:
+        print(f"Error pushing changes: {str(e)}")
+    
+    # Step 8: Optionally wait before cleanup (e.g. to inspect the sandbox).
+    # git has released its locks once the commands above return, so no wait is needed by default.
+    cleanup_wait = 0 if os.environ.get("SKIP_CLEANUP_WAIT") else int(os.environ.get("CLEANUP_WAIT", "0"))
+    if cleanup_wait > 0:
+        print(f"\nStep 8: Waiting for {cleanup_wait} seconds before cleanup...")
+        time.sleep(cleanup_wait)
+        print("Wait complete.")
     
     # Step 9: Clean up the sandbox
     print("\nStep 9: Cleaning up sandbox...")
     try:
-        # Clean up function to handle read-only files
-        def handle_remove_readonly(func, path, exc):
-            excvalue = exc[1]
-            if func in (os.rmdir, os.remove, os.unlink) and excvalue.errno == errno.EACCES:
-                # Change the file to be readable, writable, and executable
-                os.chmod(path, os.stat.S_IRWXU | os.stat.S_IRWXG | os.stat.S_IRWXO)
-                # Retry the operation
-                func(path)
-            else:
-                print(f"Failed to remove {path}: {excvalue}")
-        
         # First try to remove the .git directory separately (common source of issues)
-        git_dir = os.path.join(sandbox_path, '.git')
-        if os.path.exists(git_dir):
+        git_dir = sandbox_path / '.git'
+        if git_dir.exists():
             print(f"Removing Git directory: {git_dir}")
             try:
-                # Try to force Git to release locks
-                os.chdir(os.path.dirname(sandbox_path))  # Move out of the directory
-                shutil.rmtree(git_dir, onerror=handle_remove_readonly)
+                fast_rmtree(git_dir)
                 print("Git directory removed successfully")
             except Exception as git_err:
                 print(f"Warning: Could not fully remove Git directory: {str(git_err)}")
@@ -232,7 +291,7 @@ def main():
         # Now try to remove the entire sandbox directory
         print(f"Removing sandbox directory: {sandbox_path}")
         try:
-            shutil.rmtree(sandbox_path, onerror=handle_remove_readonly)
+            fast_rmtree(sandbox_path)
             print("Sandbox cleaned up successfully.")
         except Exception as rm_err:
             print(f"Warning: Could not fully remove sandbox: {str(rm_err)}")
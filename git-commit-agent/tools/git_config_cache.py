@@ -0,0 +1,78 @@
+import logging
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from .git_ops import GIT, git_env, run_git_command
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _read_config(scope: str, cwd: Optional[str]) -> Dict[str, str]:
+    """
+    Read all git configuration of a scope with a single git command (cached).
+
+    Args:
+        scope (str): Configuration scope ("global", "system" or "local")
+        cwd (Optional[str]): Repository directory, used by the "local" scope
+
+    Returns:
+        Dict[str, str]: Configuration values by key (the last value wins for multi-valued keys)
+    """
+    result = subprocess.run(
+        [GIT, "config", "--list", "--null", f"--{scope}"], cwd=cwd, capture_output=True, text=True, env=git_env()
+    )
+    if result.returncode != 0:
+        # git fails when the scope's config file does not exist yet
+        logger.info(f"No {scope} git configuration found")
+        return {}
+
+    config = {}
+    for entry in result.stdout.split("\0"):
+        if entry:
+            key, _, value = entry.partition("\n")
+            config[key] = value
+    return config
+
+def get_all_config(scope: str = "global", cwd: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Get all git configuration of a scope.
+    The configuration is read once and cached; set_config keeps the cache up to date.
+
+    Args:
+        scope (str): Configuration scope ("global", "system" or "local")
+        cwd (Optional[Path]): Repository directory, required for the "local" scope
+
+    Returns:
+        Dict[str, str]: Configuration values by key
+    """
+    # Hand out a copy so callers cannot modify the cached result
+    return dict(_read_config(scope, str(cwd) if cwd else None))
+
+def set_config(values: Dict[str, str], scope: str = "global", cwd: Optional[Path] = None) -> None:
+    """
+    Set git configuration values, skipping those that already have the requested value.
+    When nothing differs, no git process is started beyond the one cached read.
+
+    Args:
+        values (Dict[str, str]): Configuration values by key (e.g. user.name, user.email)
+        scope (str): Configuration scope ("global", "system" or "local")
+        cwd (Optional[Path]): Repository directory, required for the "local" scope
+
+    Raises:
+        RuntimeError: If a git config command fails
+    """
+    current = _read_config(scope, str(cwd) if cwd else None)
+    changed = {key: value for key, value in values.items() if current.get(key) != value}
+    if not changed:
+        logger.info(f"Git {scope} configuration already up to date")
+        return
+
+    try:
+        for key, value in changed.items():
+            run_git_command(["config", f"--{scope}", key, value], cwd=cwd)
+    finally:
+        _read_config.cache_clear()
+
+get_all_config.cache_clear = _read_config.cache_clear
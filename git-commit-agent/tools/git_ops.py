@@ -1,16 +1,55 @@
+import os
+import shutil
+import weakref
 import subprocess
+from collections import deque
 from pathlib import Path
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-def run_git_command(args: list, cwd: Path):
+# Absolute path of the git executable, resolved once instead of searching PATH on every spawn
+GIT = shutil.which("git") or "git"
+
+# Environment overrides for every git process: never prompt for credentials (which would
+# hang on a captured pipe) and skip optional index lock/refresh work on read-only commands
+_GIT_ENV_OVERRIDES = {"GIT_TERMINAL_PROMPT": "0", "GIT_OPTIONAL_LOCKS": "0"}
+
+def git_env() -> dict:
+    """
+    Build the environment for a git process.
+    It is derived from os.environ on every call, so variables loaded later
+    (e.g. GIT_AUTHOR_NAME from a .env file) are still passed to git.
+    
+    Returns:
+        dict: Environment variables for the git process
+    """
+    return {**os.environ, **_GIT_ENV_OVERRIDES}
+
+# Live GitSession objects by resolved repository path, so one-shot queries can reuse their helper
+_sessions = weakref.WeakValueDictionary()
+
+def _live_session(cwd: Path):
+    """
+    Get the live GitSession for a repository, if any agent currently holds one.
+    
+    Args:
+        cwd (Path): Git repository directory
+        
+    Returns:
+        GitSession: The session, or None if there is none
+    """
+    return _sessions.get(str(Path(cwd).resolve()))
+
+def run_git_command(args: list, cwd: Path, input: Optional[str] = None):
     """
     Run a git command in the specified directory.
     
     Args:
         args (list): List of git command arguments
         cwd (Path): Working directory for the command
+        input (str, optional): Data to send to the command's stdin
         
     Returns:
         str: Command output
@@ -19,16 +58,53 @@ def run_git_command(args: list, cwd: Path):
         RuntimeError: If the git command fails
     """
     logger.info(f"Running git command: git {' '.join(args)} in {cwd}")
-    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+    result = subprocess.run([GIT] + args, cwd=cwd, input=input, capture_output=True, text=True, env=git_env())
     if result.returncode != 0:
         error_msg = f"Git command failed: {result.stderr}"
         logger.error(error_msg)
         raise RuntimeError(error_msg)
     return result.stdout.strip()
 
+def run_git_command_streaming(args: list, cwd: Path, tail_lines: int = 20):
+    """
+    Run a long-running git command (clone, push, ...), logging its progress
+    output line by line as it arrives instead of buffering all of it.
+    
+    Args:
+        args (list): List of git command arguments
+        cwd (Path): Working directory for the command
+        tail_lines (int): Number of trailing output lines kept for the result and error message
+        
+    Returns:
+        str: The last lines of the command's output
+        
+    Raises:
+        RuntimeError: If the git command fails
+    """
+    logger.info(f"Running git command: git {' '.join(args)} in {cwd}")
+    process = subprocess.Popen(
+        [GIT] + args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=git_env()
+    )
+    # Text mode splits progress updates on "\r" as well as "\n"
+    tail = deque(maxlen=tail_lines)
+    for line in process.stderr:
+        line = line.rstrip()
+        if line:
+            logger.info(line)
+            tail.append(line)
+    process.stderr.close()
+    
+    if process.wait() != 0:
+        error_msg = "Git command failed: " + "\n".join(tail)
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+    return "\n".join(tail)
+
 def stage_changes(files: list, cwd: Path):
     """
     Stage specific files for commit.
+    The paths are passed NUL-separated on stdin to a single `git add`, so any
+    number of files (including names with spaces or newlines) is staged in one process.
     
     Args:
         files (list): List of files to stage
@@ -41,7 +117,11 @@ def stage_changes(files: list, cwd: Path):
         RuntimeError: If the staging operation fails
     """
     logger.info(f"Staging files {files} in {cwd}")
-    return run_git_command(["add"] + files, cwd=cwd)
+    return run_git_command(
+        ["add", "--pathspec-from-file=-", "--pathspec-file-nul"],
+        cwd=cwd,
+        input="\0".join(str(f) for f in files),
+    )
 
 def stage_all(cwd: Path):
     """
@@ -76,13 +156,16 @@ def commit_changes(message: str, cwd: Path):
     logger.info(f"Committing changes in {cwd} with message: {message}")
     return run_git_command(["commit", "-m", message], cwd=cwd)
 
-def commit_all(message: str, cwd: Path):
+def commit_all(message: str, cwd: Path, include_untracked: bool = True):
     """
     Stage all changes and create a commit.
+    Without untracked files this is a single `git commit -a` (see commit_tracked).
     
     Args:
         message (str): Commit message
         cwd (Path): Git repository directory
+        include_untracked (bool, optional): Whether to also stage new, untracked files,
+            which needs a separate `git add`. Defaults to True.
         
     Returns:
         str: Command output
@@ -90,10 +173,31 @@ def commit_all(message: str, cwd: Path):
     Raises:
         RuntimeError: If the commit operation fails
     """
+    if not include_untracked:
+        return commit_tracked(message, cwd)
+    
     logger.info(f"Committing all changes in {cwd} with message: {message}")
     stage_all(cwd)
     return commit_changes(message, cwd)
 
+def commit_tracked(message: str, cwd: Path):
+    """
+    Stage changes to tracked files and create a commit in a single git command.
+    Untracked files are not included; use commit_all for those.
+    
+    Args:
+        message (str): Commit message
+        cwd (Path): Git repository directory
+        
+    Returns:
+        str: Command output
+        
+    Raises:
+        RuntimeError: If the commit operation fails
+    """
+    logger.info(f"Committing tracked changes in {cwd} with message: {message}")
+    return run_git_command(["commit", "-a", "-m", message], cwd=cwd)
+
 def push_branch(branch_name: str, cwd: Path, remote: str = "origin"):
     """
     Push a branch to the remote repository.
@@ -110,7 +214,26 @@ def push_branch(branch_name: str, cwd: Path, remote: str = "origin"):
         RuntimeError: If the push operation fails
     """
     logger.info(f"Pushing branch {branch_name} to {remote} from {cwd}")
-    return run_git_command(["push", remote, branch_name], cwd=cwd)
+    return push_batched([branch_name], cwd, remote)
+
+def push_batched(refs: List[str], cwd: Path, remote: str = "origin"):
+    """
+    Push several refs to the remote in a single atomic push, so all commits
+    and branches go out over one connection and either all or none are updated.
+    
+    Args:
+        refs (List[str]): Refs or refspecs to push (e.g. branch names)
+        cwd (Path): Git repository directory
+        remote (str, optional): Name of the remote. Defaults to "origin".
+        
+    Returns:
+        str: Command output
+        
+    Raises:
+        RuntimeError: If the push operation fails
+    """
+    logger.info(f"Pushing {', '.join(refs)} to {remote} from {cwd}")
+    return run_git_command_streaming(["push", "--atomic", "--progress", remote] + list(refs), cwd=cwd)
 
 def get_current_branch(cwd: Path):
     """
@@ -126,6 +249,9 @@ def get_current_branch(cwd: Path):
         RuntimeError: If the git command fails
     """
     logger.info(f"Getting current branch in {cwd}")
+    session = _live_session(cwd)
+    if session is not None:
+        return session.current_branch()
     return run_git_command(["rev-parse", "--abbrev-ref", "HEAD"], cwd=cwd)
 
 def get_commit_hash(cwd: Path):
@@ -142,8 +268,33 @@ def get_commit_hash(cwd: Path):
         RuntimeError: If the git command fails
     """
     logger.info(f"Getting latest commit hash in {cwd}")
+    session = _live_session(cwd)
+    if session is not None:
+        return session.resolve("HEAD")
     return run_git_command(["rev-parse", "HEAD"], cwd=cwd)
 
+def get_head_info(cwd: Path):
+    """
+    Get the hash of the latest commit and the name of the current branch
+    with a single git command.
+    
+    Args:
+        cwd (Path): Git repository directory
+        
+    Returns:
+        tuple: Commit hash and current branch name
+        
+    Raises:
+        RuntimeError: If the git command fails
+    """
+    logger.info(f"Getting HEAD commit and branch in {cwd}")
+    session = _live_session(cwd)
+    if session is not None:
+        return session.head_info()
+    output = run_git_command(["rev-parse", "HEAD", "--abbrev-ref", "HEAD"], cwd=cwd)
+    commit_hash, branch = output.splitlines()
+    return commit_hash, branch
+
 def create_branch(branch_name: str, cwd: Path, base_branch: str = None):
     """
     Create a new branch and switch to it.
@@ -185,3 +336,166 @@ def checkout_branch(branch_name: str, cwd: Path):
     """
     logger.info(f"Checking out branch {branch_name} in {cwd}")
     return run_git_command(["checkout", branch_name], cwd=cwd)
+
+class GitSession:
+    """
+    Long-running git helper for cheap read-only queries against one repository.
+    
+    Object lookups go through a single persistent `git cat-file --batch-check`
+    process instead of spawning `git rev-parse` for every query, and the current
+    branch is read straight from HEAD. Mutating operations (commit, push, ...)
+    still use run_git_command.
+    
+    Use GitSession.for_repo to share one helper per repository; while such a
+    session is alive, get_commit_hash, get_current_branch and get_head_info
+    answer from it instead of spawning git.
+    """
+    
+    def __init__(self, cwd: Path):
+        """
+        Initialize the session. The helper process is started on first use.
+        
+        Args:
+            cwd (Path): Git repository directory
+        """
+        self.cwd = Path(cwd)
+        self._process = None
+        self._git_dir = None
+    
+    @classmethod
+    def for_repo(cls, cwd: Path) -> "GitSession":
+        """
+        Get the shared session for a repository, creating it if none is alive.
+        
+        Args:
+            cwd (Path): Git repository directory
+            
+        Returns:
+            GitSession: The session for this repository
+        """
+        key = str(Path(cwd).resolve())
+        session = _sessions.get(key)
+        if session is None:
+            session = cls(cwd)
+            _sessions[key] = session
+        return session
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _get_process(self) -> subprocess.Popen:
+        """
+        Start the `git cat-file --batch-check` helper if it is not running.
+        
+        Returns:
+            subprocess.Popen: The helper process
+        """
+        if self._process is None or self._process.poll() is not None:
+            logger.info(f"Starting git cat-file helper in {self.cwd}")
+            self._process = subprocess.Popen(
+                [GIT, "cat-file", "--batch-check"],
+                cwd=self.cwd,
+                env=git_env(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+            )
+        return self._process
+    
+    def resolve(self, revision: str) -> str:
+        """
+        Resolve a revision (e.g. "HEAD") to an object hash.
+        
+        Args:
+            revision (str): Revision to resolve
+            
+        Returns:
+            str: Full object hash
+            
+        Raises:
+            RuntimeError: If the revision cannot be resolved
+        """
+        process = self._get_process()
+        try:
+            process.stdin.write(f"{revision}\n")
+            process.stdin.flush()
+            line = process.stdout.readline().strip()
+        except (OSError, ValueError) as e:
+            self.close()
+            raise RuntimeError(f"Git cat-file helper failed: {str(e)}")
+        
+        # Output is "<hash> <type> <size>", or "<revision> missing"
+        parts = line.split()
+        if len(parts) != 3:
+            raise RuntimeError(f"Could not resolve {revision}: {line or 'no output'}")
+        return parts[0]
+    
+    def _get_git_dir(self) -> Path:
+        """
+        Locate the repository's git directory, following a `gitdir:` file for worktrees.
+        
+        Returns:
+            Path: The git directory
+        """
+        if self._git_dir is None:
+            git_path = self.cwd / ".git"
+            if git_path.is_file():
+                content = git_path.read_text().strip()
+                if content.startswith("gitdir:"):
+                    git_path = (self.cwd / content[len("gitdir:"):].strip()).resolve()
+            self._git_dir = git_path
+        return self._git_dir
+    
+    def current_branch(self) -> str:
+        """
+        Get the name of the current branch by reading HEAD directly.
+        
+        Returns:
+            str: Current branch name, or "HEAD" when detached (like `git rev-parse --abbrev-ref HEAD`)
+            
+        Raises:
+            RuntimeError: If HEAD cannot be read
+        """
+        try:
+            head = (self._get_git_dir() / "HEAD").read_text().strip()
+        except OSError as e:
+            raise RuntimeError(f"Could not read HEAD in {self.cwd}: {str(e)}")
+        
+        if head.startswith("ref: refs/heads/"):
+            return head[len("ref: refs/heads/"):]
+        return "HEAD"
+    
+    def head_info(self) -> tuple:
+        """
+        Get the hash of the latest commit and the name of the current branch.
+        
+        Returns:
+            tuple: Commit hash and current branch name (like `get_head_info`)
+            
+        Raises:
+            RuntimeError: If HEAD cannot be resolved
+        """
+        return self.resolve("HEAD"), self.current_branch()
+    
+    def close(self) -> None:
+        """
+        Stop the helper process.
+        """
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
@@ -10,8 +10,12 @@ from pathlib import Path
 import datetime
 import uuid
 
+# Directory of this script, resolved once
+_HERE = Path(__file__).resolve().parent
+_BASE_SANDBOX = (_HERE / '..' / 'application-sandbox').resolve()
+
 # Add the current directory to the path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(_HERE))
 
 # Import the config loader
 from context.config_loader import load_env_config
@@ -27,13 +31,14 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def run_git_command(args, cwd):
+def run_git_command(args, cwd, env=None):
     """
     Run a git command in the specified directory.
     
     Args:
         args (list): List of git command arguments
         cwd (Path): Working directory for the command
+        env (dict, optional): Environment for git. Defaults to this process's environment.
         
     Returns:
         str: Command output
@@ -42,7 +47,7 @@ def run_git_command(args, cwd):
         RuntimeError: If the git command fails
     """
     logger.info(f"Running git command: git {' '.join(args)} in {cwd}")
-    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+    result = subprocess.run(["git"] + args, cwd=cwd, env=env, capture_output=True, text=True)
     if result.returncode != 0:
         error_msg = f"Git command failed: {result.stderr}"
         logger.error(error_msg)
@@ -66,16 +71,32 @@ def main():
     }
     print(f"Using Git config: {git_config}")
     
+    # Pass the identity to git through its environment variables, instead of
+    # running `git config --global` once per setting and changing the user's config
+    git_env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": git_config["user.name"],
+        "GIT_AUTHOR_EMAIL": git_config["user.email"],
+        "GIT_COMMITTER_NAME": git_config["user.name"],
+        "GIT_COMMITTER_EMAIL": git_config["user.email"],
+        "GIT_CONFIG_COUNT": str(len(git_config)),
+    }
+    for index, (key, value) in enumerate(git_config.items()):
+        git_env[f"GIT_CONFIG_KEY_{index}"] = key
+        git_env[f"GIT_CONFIG_VALUE_{index}"] = value
+    
     # Generate a unique ID for this workflow run
     unique_id = str(uuid.uuid4())[:8]  # Use first 8 chars of UUID
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Take the time once; both the ID and the file content are formatted from it
+    now = datetime.datetime.now()
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
     workflow_id = f"{timestamp}_{unique_id}"
     print(f"Workflow ID: {workflow_id}")
     
     # Create branch name and file content
     branch_name = f"feature/orchestrator-workflow-{unique_id}"
     file_name = f"orchestrator_test_{unique_id}.txt"
-    file_content = f"This file was created by the Git Orchestrator Agent.\nWorkflow ID: {workflow_id}\nTimestamp: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    file_content = f"This file was created by the Git Orchestrator Agent.\nWorkflow ID: {workflow_id}\nTimestamp: {now:%Y-%m-%d %H:%M:%S}\n"
     commit_message = f"Add test file via orchestrator workflow {unique_id}"
     
     # Step 1: Create a sandbox environment
@@ -85,7 +106,7 @@ def main():
         sandbox_name = f"sandbox_{timestamp}_{unique_id}"
         
         # Create the unique sandbox directory inside application-sandbox
-        base_sandbox_dir = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'application-sandbox')))
+        base_sandbox_dir = _BASE_SANDBOX
         if not os.path.exists(base_sandbox_dir):
             os.makedirs(base_sandbox_dir)
             
@@ -100,25 +121,19 @@ def main():
     # Step 2: Clone the repository
     print("\nStep 2: Cloning repository...")
     try:
-        # Change to the sandbox directory
-        os.chdir(sandbox_path)
-        
-        # Set Git configuration
-        for key, value in git_config.items():
-            subprocess.run(["git", "config", "--global", key, value], check=True)
-            print(f"Set Git config {key}={value}")
-        
         # Clone the repository
         print(f"Cloning {repo_url} to {sandbox_path}...")
-        clone_result = subprocess.run(["git", "clone", repo_url, "."], capture_output=True, text=True)
+        # Only stderr is read, on failure; --quiet also drops the progress meter
+        clone_result = subprocess.run(["git", "clone", "--quiet", repo_url, str(sandbox_path)],
+                                      cwd=sandbox_path.parent, env=git_env, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.PIPE, text=True)
         
         if clone_result.returncode == 0:
             print("Repository cloned successfully")
             
             # List the contents of the cloned repository
             print("\nContents of the cloned repository:")
-            for item in os.listdir(sandbox_path):
-                print(f"  - {item}")
+            print("\n".join(f"  - {item}" for item in os.listdir(sandbox_path)))
         else:
             print(f"Failed to clone repository: {clone_result.stderr}")
             raise RuntimeError("Failed to clone repository")
@@ -137,7 +152,7 @@ def main():
     print("\nStep 3: Creating a new branch...")
     try:
         # Create and checkout a new branch
-        branch_output = run_git_command(["checkout", "-b", branch_name], sandbox_path)
+        branch_output = run_git_command(["checkout", "-b", branch_name], sandbox_path, git_env)
         print(f"Created and checked out branch: {branch_name}")
     except Exception as e:
         print(f"Error creating branch: {str(e)}")
@@ -158,7 +173,7 @@ def main():
     # Step 5: Stage the changes
     print("\nStep 5: Staging changes...")
     try:
-        stage_output = run_git_command(["add", "."], sandbox_path)
+        stage_output = run_git_command(["add", "."], sandbox_path, git_env)
         print("Changes staged successfully")
     except Exception as e:
         print(f"Error staging changes: {str(e)}")
@@ -167,8 +182,8 @@ def main():
     # Step 6: Commit the changes
     print("\nStep 6: Committing changes...")
     try:
-        commit_output = run_git_command(["commit", "-m", commit_message], sandbox_path)
-        commit_hash = run_git_command(["rev-parse", "HEAD"], sandbox_path)
+        commit_output = run_git_command(["commit", "-m", commit_message], sandbox_path, git_env)
+        commit_hash = run_git_command(["rev-parse", "HEAD"], sandbox_path, git_env)
         print(f"Changes committed successfully with message: '{commit_message}'")
         print(f"Commit hash: {commit_hash}")
     except Exception as e:
@@ -178,7 +193,7 @@ def main():
     # Step 7: Push the changes
     print("\nStep 7: Pushing changes...")
     try:
-        push_output = run_git_command(["push", "origin", branch_name], sandbox_path)
+        push_output = run_git_command(["push", "origin", branch_name], sandbox_path, git_env)
         print("Changes pushed successfully")
     except Exception as e:
         print(f"Error pushing changes: {str(e)}")
@@ -214,8 +229,6 @@ def main():
         if os.path.exists(git_dir):
             print(f"Removing Git directory: {git_dir}")
             try:
-                # Try to force Git to release locks
-                os.chdir(os.path.dirname(sandbox_path))  # Move out of the directory
                 shutil.rmtree(git_dir, onerror=handle_remove_readonly)
                 print("Git directory removed successfully")
             except Exception as git_err:
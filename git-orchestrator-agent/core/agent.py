@@ -1,12 +1,20 @@
+import asyncio
+import compileall
 import logging
 import os
-import sys
-import importlib.util
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 
+from workflow_steps.utils import load_agent_class
+
 logger = logging.getLogger(__name__)
 
+# Directory of this module; the agent module paths below are relative to it
+_CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class GitOrchestratorAgent:
     """
     Orchestrator agent that coordinates the execution of other Git agents.
@@ -18,64 +26,103 @@ class GitOrchestratorAgent:
     - Does NOT directly perform Git operations or file system management
     """
     
+    # Agent modules by name: path relative to this file and the agent class to load
+    _AGENT_MODULES = {
+        'git_clone_agent': ('../../git-clone-agent/core/agent.py', 'GitCloneAgent'),
+        'git_branch_agent': ('../../git-branch-agent/core/agent.py', 'GitBranchAgent'),
+        'git_commit_agent': ('../../git-commit-agent/core/agent.py', 'GitCommitAgent'),
+        'git_pr_agent': ('../../git-pr-agent/core/agent.py', 'GitPrAgent'),
+        'git_sandbox_agent': ('../../git-sandbox-agent/core/agent.py', 'GitSandboxAgent'),
+    }
+    
+    # Agent classes loaded so far, shared by all orchestrators (None if loading failed)
+    _AGENT_CACHE: Dict[str, Optional[type]] = {}
+    _AGENT_CACHE_LOCK = threading.Lock()
+    
     def __init__(self):
         """
-        Initialize the GitOrchestratorAgent.
+        Initialize the GitOrchestratorAgent. Agents are loaded on first use.
         """
         self.state = {}
-        self.agents = {}
-        self._load_agents()
+        # Serializes workflows on a shared orchestrator, since they all use self.state
+        self._run_lock = threading.Lock()
+    
+    @classmethod
+    def _get_agent(cls, agent_name: str) -> Optional[type]:
+        """
+        Get an agent class, loading its module on first use.
+        
+        Loaded classes are cached at class level, so each agent module is
+        executed at most once per process.
         
-    def _load_agents(self):
+        Args:
+            agent_name (str): Name of the agent (e.g. 'git_clone_agent')
+            
+        Returns:
+            Optional[type]: The agent class, or None if it could not be loaded
         """
-        Dynamically load the available Git agents.
+        with cls._AGENT_CACHE_LOCK:
+            if agent_name not in cls._AGENT_CACHE:
+                cls._AGENT_CACHE[agent_name] = cls._load_agent(agent_name)
+            return cls._AGENT_CACHE[agent_name]
+    
+    @classmethod
+    def precompile_agents(cls) -> bool:
         """
-        # Define the agents to load
-        agent_modules = [
-            ('git_clone_agent', '../../git-clone-agent/core/agent.py', 'GitCloneAgent'),
-            ('git_branch_agent', '../../git-branch-agent/core/agent.py', 'GitBranchAgent'),
-            ('git_commit_agent', '../../git-commit-agent/core/agent.py', 'GitCommitAgent'),
-            ('git_pr_agent', '../../git-pr-agent/core/agent.py', 'GitPrAgent'),
-            ('git_sandbox_agent', '../../git-sandbox-agent/core/agent.py', 'GitSandboxAgent')
-        ]
+        Compile the bytecode of all agent packages ahead of time.
         
-        # Attempt to load each agent
-        for agent_name, agent_path, agent_class in agent_modules:
-            try:
-                # Construct the absolute path to the agent module
-                module_path = os.path.abspath(os.path.join(os.path.dirname(__file__), agent_path))
-                
-                if os.path.exists(module_path):
-                    # Add the agent's directory to the Python path temporarily
-                    agent_dir = os.path.dirname(os.path.dirname(module_path))
-                    if agent_dir not in sys.path:
-                        sys.path.insert(0, agent_dir)
-                        logger.info(f"Added {agent_dir} to Python path")
-                    
-                    try:
-                        # Load the module dynamically
-                        spec = importlib.util.spec_from_file_location(agent_name, module_path)
-                        if spec and spec.loader:
-                            module = importlib.util.module_from_spec(spec)
-                            sys.modules[agent_name] = module  # Register the module
-                            spec.loader.exec_module(module)
-                            
-                            # Get the agent class
-                            if hasattr(module, agent_class):
-                                self.agents[agent_name] = getattr(module, agent_class)
-                                logger.info(f"Loaded agent: {agent_name}")
-                            else:
-                                logger.warning(f"Agent class {agent_class} not found in {module_path}")
-                    except Exception as e:
-                        logger.warning(f"Error loading module {agent_name}: {str(e)}")
-                        # If there was an error, remove the agent's directory from path
-                        if agent_dir in sys.path:
-                            sys.path.remove(agent_dir)
-                            logger.info(f"Removed {agent_dir} from Python path due to error")
-                else:
-                    logger.warning(f"Agent module not found: {module_path}")
-            except Exception as e:
-                logger.warning(f"Failed to load agent {agent_name}: {str(e)}")
+        Meant for install or build time: later processes then load the agents
+        from __pycache__ instead of parsing and compiling their sources. Files
+        whose bytecode is already up to date are skipped.
+        
+        Returns:
+            bool: True if every agent package compiled successfully
+        """
+        success = True
+        for agent_path, _ in cls._AGENT_MODULES.values():
+            agent_dir = os.path.normpath(os.path.join(_CORE_DIR, agent_path, '..', '..'))
+            if not os.path.isdir(agent_dir):
+                logger.warning(f"Agent directory not found: {agent_dir}")
+                continue
+            for package in ('core', 'tools', 'context'):
+                package_dir = os.path.join(agent_dir, package)
+                if os.path.isdir(package_dir):
+                    success = compileall.compile_dir(package_dir, quiet=1) and success
+        return success
+    
+    @classmethod
+    def _load_agent(cls, agent_name: str) -> Optional[type]:
+        """
+        Load an agent class from its module file.
+        
+        The module is loaded with workflow_steps.utils.load_agent_class, which binds
+        `tools` to the agent's own tools package, so agents loaded one after another
+        never pick up each other's helpers.
+        
+        Args:
+            agent_name (str): Name of the agent (e.g. 'git_clone_agent')
+            
+        Returns:
+            Optional[type]: The agent class, or None if it could not be loaded
+        """
+        agent_path, agent_class = cls._AGENT_MODULES[agent_name]
+        # Construct the absolute path to the agent module
+        module_path = os.path.normpath(os.path.join(_CORE_DIR, agent_path))
+        if not os.path.exists(module_path):
+            logger.warning(f"Agent module not found: {module_path}")
+            return None
+        
+        agent_dir_name = os.path.basename(os.path.dirname(os.path.dirname(module_path)))
+        try:
+            agent_cls = load_agent_class(agent_dir_name, agent_class)
+        except AttributeError:
+            logger.warning(f"Agent class {agent_class} not found in {module_path}")
+        except Exception as e:
+            logger.warning(f"Failed to load agent {agent_name}: {str(e)}")
+        else:
+            logger.info(f"Loaded agent: {agent_name}")
+            return agent_cls
+        return None
     
     def run_git_workflow(self, repo_url: str, branch_name: str, 
                          file_content: str, commit_message: str, 
@@ -84,6 +131,34 @@ class GitOrchestratorAgent:
         """
         Run a complete Git workflow by orchestrating the other agents.
         
+        Args:
+            repo_url (str): URL of the repository to clone
+            branch_name (str): Name of the branch to create
+            file_content (str): Content to write to the test file
+            commit_message (str): Commit message
+            pr_title (str): Pull request title
+            pr_description (str): Pull request description
+            github_token (str, optional): GitHub API token
+            
+        Returns:
+            Dict[str, Any]: Workflow results including status and PR URL
+        """
+        # Concurrent calls on the same orchestrator run one after the other;
+        # use separate orchestrators (see run_git_workflows) to run them in parallel
+        with self._run_lock:
+            self.state = {}
+            return self._run_git_workflow(
+                repo_url, branch_name, file_content, commit_message,
+                pr_title, pr_description, github_token
+            )
+    
+    def _run_git_workflow(self, repo_url: str, branch_name: str, 
+                          file_content: str, commit_message: str, 
+                          pr_title: str, pr_description: str, 
+                          github_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run the Git workflow steps (implementation of run_git_workflow).
+        
         Args:
             repo_url (str): URL of the repository to clone
             branch_name (str): Name of the branch to create
@@ -104,12 +179,14 @@ class GitOrchestratorAgent:
         }
         
         sandbox_path = None
+        sandbox_agent = None
         
         try:
             # Step 1: Create a sandbox using the GitSandboxAgent
             logger.info("Step 1: Creating sandbox environment")
-            if 'git_sandbox_agent' in self.agents:
-                sandbox_agent = self.agents['git_sandbox_agent']()
+            sandbox_agent_class = self._get_agent('git_sandbox_agent')
+            if sandbox_agent_class:
+                sandbox_agent = sandbox_agent_class()
                 sandbox_path = sandbox_agent.setup_sandbox()
                 result["steps"].append({"step": "create_sandbox", "success": True, "path": str(sandbox_path)})
                 self.state["sandbox_path"] = sandbox_path
@@ -121,8 +198,9 @@ class GitOrchestratorAgent:
             
             # Step 2: Clone the repository using the GitCloneAgent
             logger.info(f"Step 2: Cloning repository {repo_url}")
-            if 'git_clone_agent' in self.agents:
-                clone_agent = self.agents['git_clone_agent']()
+            clone_agent_class = self._get_agent('git_clone_agent')
+            if clone_agent_class:
+                clone_agent = clone_agent_class()
                 success, clone_dir = clone_agent.clone_repository(repo_url, working_dir=sandbox_path)
                 if success:
                     result["steps"].append({"step": "clone_repo", "success": True, "path": str(clone_dir)})
@@ -140,8 +218,9 @@ class GitOrchestratorAgent:
             
             # Step 3: Create a branch using the GitBranchAgent
             logger.info(f"Step 3: Creating branch {branch_name}")
-            if 'git_branch_agent' in self.agents:
-                branch_agent = self.agents['git_branch_agent']()
+            branch_agent_class = self._get_agent('git_branch_agent')
+            if branch_agent_class:
+                branch_agent = branch_agent_class()
                 success, branch_info = branch_agent.create_branch(branch_name, repo_dir=self.state["repo_dir"])
                 if success:
                     result["steps"].append({"step": "create_branch", "success": True, "branch": branch_name})
@@ -159,8 +238,9 @@ class GitOrchestratorAgent:
             
             # Step 4: Create a test file and commit changes using the GitCommitAgent
             logger.info("Step 4: Creating test file and committing changes")
-            if 'git_commit_agent' in self.agents:
-                commit_agent = self.agents['git_commit_agent']()
+            commit_agent_class = self._get_agent('git_commit_agent')
+            if commit_agent_class:
+                commit_agent = commit_agent_class()
                 file_path = self.state["repo_dir"] / "test_file.txt"
                 success, commit_info = commit_agent.commit_changes(
                     repo_dir=self.state["repo_dir"],
@@ -183,8 +263,9 @@ class GitOrchestratorAgent:
             
             # Step 5: Push the branch and create a PR using the GitPrAgent
             logger.info("Step 5: Creating pull request")
-            if 'git_pr_agent' in self.agents:
-                pr_agent = self.agents['git_pr_agent']()
+            pr_agent_class = self._get_agent('git_pr_agent')
+            if pr_agent_class:
+                pr_agent = pr_agent_class()
                 success, pr_info = pr_agent.create_pull_request(
                     repo_dir=self.state["repo_dir"],
                     base_branch="main",  # Assuming main is the default branch
@@ -217,7 +298,7 @@ class GitOrchestratorAgent:
             result["error"] = error_msg
         finally:
             # Clean up the sandbox if it was created
-            if sandbox_path and 'git_sandbox_agent' in self.agents:
+            if sandbox_path and sandbox_agent is not None:
                 try:
                     logger.info(f"Cleaning up sandbox at {sandbox_path}")
                     sandbox_agent.cleanup_sandbox()
@@ -228,6 +309,16 @@ class GitOrchestratorAgent:
         
         return result
 
+@lru_cache(maxsize=1)
+def _get_orchestrator() -> GitOrchestratorAgent:
+    """
+    Get the orchestrator shared by the module-level run_git_workflow.
+    
+    Returns:
+        GitOrchestratorAgent: The shared orchestrator
+    """
+    return GitOrchestratorAgent()
+
 # Simplified function to run the workflow
 def run_git_workflow(repo_url: str, branch_name: str, file_content: str, 
                     commit_message: str, pr_title: str, pr_description: str, 
@@ -235,7 +326,8 @@ def run_git_workflow(repo_url: str, branch_name: str, file_content: str,
     """
     Run a complete Git workflow by orchestrating the other agents.
     
-    This is a simplified function that creates an orchestrator agent and runs the workflow.
+    This is a simplified function that runs the workflow on a shared orchestrator agent.
+    Calls from several threads are serialized; use run_git_workflows to run workflows in parallel.
     
     Args:
         repo_url (str): URL of the repository to clone
@@ -249,8 +341,7 @@ def run_git_workflow(repo_url: str, branch_name: str, file_content: str,
     Returns:
         Dict[str, Any]: Workflow results including status and PR URL
     """
-    orchestrator = GitOrchestratorAgent()
-    return orchestrator.run_git_workflow(
+    return _get_orchestrator().run_git_workflow(
         repo_url=repo_url,
         branch_name=branch_name,
         file_content=file_content,
@@ -259,3 +350,56 @@ def run_git_workflow(repo_url: str, branch_name: str, file_content: str,
         pr_description=pr_description,
         github_token=github_token
     )
+
+def run_git_workflows(workflows: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run several Git workflows concurrently, e.g. for multiple repositories.
+    
+    Each workflow gets its own orchestrator, so workflow state is never shared.
+    The workflows are dominated by network-bound clones and pushes, so they run
+    on a thread pool; concurrency is capped to avoid overloading the remote.
+    
+    Args:
+        workflows (List[Dict[str, Any]]): Keyword arguments for run_git_workflow, one dict per workflow
+        max_workers (int, optional): Maximum number of concurrent workflows.
+            Defaults to min(4, os.cpu_count()).
+        
+    Returns:
+        List[Dict[str, Any]]: Workflow results, in the order of the workflows
+    """
+    if not workflows:
+        return []
+    if max_workers is None:
+        max_workers = min(4, os.cpu_count() or 1)
+    
+    # Orchestrators are cheap to create; agent classes are loaded once and shared
+    orchestrators = [GitOrchestratorAgent() for _ in workflows]
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(workflows))) as executor:
+        return list(executor.map(
+            lambda orchestrator, workflow: orchestrator.run_git_workflow(**workflow),
+            orchestrators, workflows
+        ))
+
+async def run_many(workflows: List[Dict[str, Any]], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+    """
+    Run several Git workflows concurrently from asyncio code.
+    
+    Each workflow gets its own orchestrator and runs in a worker thread, so the
+    event loop stays free while clones and pushes wait on the network. A
+    semaphore caps how many workflows (and therefore git processes) run at once.
+    
+    Args:
+        workflows (List[Dict[str, Any]]): Keyword arguments for run_git_workflow, one dict per workflow
+        max_concurrency (int): Maximum number of workflows running at the same time
+        
+    Returns:
+        List[Dict[str, Any]]: Workflow results, in the order of the workflows
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_one(workflow: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(GitOrchestratorAgent().run_git_workflow, **workflow)
+    
+    return await asyncio.gather(*(run_one(workflow) for workflow in workflows))
@@ -1,29 +1,47 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 import time
-import errno
+import hashlib
+import shlex
 import subprocess
 import shutil
-import stat
+import threading
 from pathlib import Path
 import datetime
 import uuid
 
+# Directory of this script, resolved once
+_HERE = Path(__file__).resolve().parent
+_BASE_SANDBOX = (_HERE / '..' / 'application-sandbox').resolve()
+
 # Add the current directory to the path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(_HERE))
 
 # Import the config loader
 from context.config_loader import load_env_config
+from workflow_steps.git_cat_file import GitCatFileSession
+from workflow_steps.utils import fast_rmtree
 
-# Configure logging
+# Configure logging; the log file is written by a background thread so logging never waits on disk,
+# and records reach it in batches of 256 (errors are written at once)
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.handlers.MemoryHandler(
+    capacity=256, flushLevel=logging.ERROR, target=logging.FileHandler("orchestrator_direct_workflow.log", encoding='utf-8')
+))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_log_handlers = [logging.handlers.QueueHandler(_log_queue)]
+if sys.stdout.isatty():
+    # Only echo log records to a terminal; piped output gets the prints alone
+    _log_handlers.append(logging.StreamHandler(sys.stdout))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("orchestrator_direct_workflow.log")
-    ]
+    handlers=_log_handlers
 )
 
 logger = logging.getLogger(__name__)
@@ -50,6 +68,111 @@ def run_git_command(args, cwd):
         raise RuntimeError(error_msg)
     return result.stdout.strip()
 
+# Printed between the commands of a batch to split their outputs apart
+_BATCH_SEPARATOR = "__GIT_BATCH_SEPARATOR__"
+
+def run_git_batch(commands, cwd):
+    """
+    Run several git commands in the specified directory with a single shell process.
+    The commands are chained with &&, so the batch stops at the first failure.
+    
+    Args:
+        commands (list): List of git argument lists, run in order
+        cwd (Path): Working directory for the commands
+        
+    Returns:
+        list: Output of each command, in order
+        
+    Raises:
+        RuntimeError: If any git command fails
+    """
+    # Quote for the shell that subprocess uses with shell=True (cmd.exe on Windows)
+    quote = subprocess.list2cmdline if os.name == 'nt' else shlex.join
+    script = f" && echo {_BATCH_SEPARATOR} && ".join(quote(["git"] + args) for args in commands)
+    logger.info(f"Running git batch: {script} in {cwd}")
+    result = subprocess.run(script, cwd=cwd, shell=True, capture_output=True, text=True)
+    outputs = [output.strip() for output in result.stdout.split(_BATCH_SEPARATOR)]
+    if result.returncode != 0:
+        # Every command before the failing one printed a separator
+        failed = commands[min(len(outputs), len(commands)) - 1]
+        error_msg = f"Git command failed (git {' '.join(failed)}): {result.stderr}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+    return outputs
+
+def ensure_mirror(repo_url, cache_dir):
+    """
+    Create or update a local bare mirror of a repository, for use as a clone reference.
+    
+    Args:
+        repo_url (str): URL of the repository to mirror
+        cache_dir (Path): Directory holding the mirrors, keyed by a hash of the URL
+        
+    Returns:
+        Path: Path to the bare mirror
+        
+    Raises:
+        RuntimeError: If the mirror cannot be created or updated
+    """
+    mirror_dir = cache_dir / f"{hashlib.sha1(repo_url.encode('utf-8')).hexdigest()}.git"
+    if mirror_dir.exists():
+        run_git_command(["fetch", "--prune"], mirror_dir)
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        run_git_command(["clone", "--mirror", "--filter=blob:none", repo_url, str(mirror_dir)], cache_dir)
+    return mirror_dir
+
+def write_local_config(repo_path, config):
+    """
+    Add settings to a repository's own .git/config with a single file write,
+    instead of starting one `git config` process per setting.
+    
+    Args:
+        repo_path (Path): Path to the git repository
+        config (dict): Settings by dotted key (e.g. user.name, user.email)
+    """
+    lines = []
+    for key, value in config.items():
+        section, _, name = key.rpartition('.')
+        section, _, subsection = section.partition('.')
+        lines.append(f'[{section} "{subsection}"]' if subsection else f'[{section}]')
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        lines.append(f'\t{name} = "{escaped}"')
+    with open(os.path.join(repo_path, '.git', 'config'), 'a', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def _do_cleanup(sandbox_path):
+    """
+    Remove a sandbox directory, starting with its .git directory.
+    
+    Args:
+        sandbox_path (Path): Path to the sandbox directory
+    """
+    try:
+        # First try to remove the .git directory separately (common source of issues)
+        git_dir = os.path.join(sandbox_path, '.git')
+        if os.path.exists(git_dir):
+            print(f"Removing Git directory: {git_dir}")
+            try:
+                fast_rmtree(git_dir)
+                print("Git directory removed successfully")
+            except Exception as git_err:
+                print(f"Warning: Could not fully remove Git directory: {str(git_err)}")
+                print("Continuing with cleanup...")
+        
+        # Now try to remove the entire sandbox directory
+        print(f"Removing sandbox directory: {sandbox_path}")
+        try:
+            fast_rmtree(sandbox_path)
+            print("Sandbox cleaned up successfully.")
+        except Exception as rm_err:
+            print(f"Warning: Could not fully remove sandbox: {str(rm_err)}")
+            print("Some files may remain and need manual cleanup.")
+            
+    except Exception as e:
+        print(f"Error during cleanup: {str(e)}")
+        print("Sandbox may need manual cleanup.")
+
 def main():
     print("\n===== GIT ORCHESTRATOR DIRECT WORKFLOW EXAMPLE =====\n")
     
@@ -58,26 +181,24 @@ def main():
     
     # Get the repository URL from environment or use default
     repo_url = env_vars.get('DEFAULT_REPO_URL', "https://github.com/cr-nattress/ai-devops-lab.git")
-    print(f"Using repository: {repo_url}")
     
     # Get Git configuration from environment
     git_config = {
         "user.name": env_vars.get('GIT_AUTHOR_NAME', "GANON"),
         "user.email": env_vars.get('GIT_AUTHOR_EMAIL', "your.email@example.com")
     }
-    print(f"Using Git config: {git_config}")
     
     # Generate a unique ID for this workflow run
     unique_id = str(uuid.uuid4())[:8]  # Use first 8 chars of UUID
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Take the time once; both the ID and the file content are formatted from it
+    now = datetime.datetime.now()
+    timestamp = now.strftime('%Y%m%d_%H%M%S')
     workflow_id = f"{timestamp}_{unique_id}"
-    print(f"Workflow ID: {workflow_id}")
+    print(f"Using repository: {repo_url}\nUsing Git config: {git_config}\nWorkflow ID: {workflow_id}")
     
-    # Create branch name and file content
+    # Create branch and file names (the file content is prepared while the clone runs)
     branch_name = f"feature/orchestrator-workflow-{unique_id}"
     file_name = f"orchestrator_test_{unique_id}.txt"
-    file_content = f"This file was created by the Git Orchestrator Agent.\nWorkflow ID: {workflow_id}\nTimestamp: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    commit_message = f"Add test file via orchestrator workflow {unique_id}"
     
     # Step 1: Create a sandbox environment
     print("\nStep 1: Creating sandbox environment...")
@@ -86,11 +207,10 @@ def main():
         sandbox_name = f"sandbox_{timestamp}_{unique_id}"
         
         # Create the unique sandbox directory inside application-sandbox
-        base_sandbox_dir = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'application-sandbox')))
-        if not os.path.exists(base_sandbox_dir):
-            os.makedirs(base_sandbox_dir)
-            
-        sandbox_path = Path(os.path.join(base_sandbox_dir, sandbox_name))
+        base_sandbox_dir = _BASE_SANDBOX
+        os.makedirs(base_sandbox_dir, exist_ok=True)
+        
+        sandbox_path = base_sandbox_dir / sandbox_name
         os.makedirs(sandbox_path)
         print(f"Sandbox created at: {sandbox_path}")
         
@@ -101,27 +221,39 @@ def main():
     # Step 2: Clone the repository
     print("\nStep 2: Cloning repository...")
     try:
-        # Change to the sandbox directory
-        os.chdir(sandbox_path)
-        
-        # Set Git configuration
-        for key, value in git_config.items():
-            subprocess.run(["git", "config", "--global", key, value], check=True)
-            print(f"Set Git config {key}={value}")
+        # Objects already in the local mirror (from earlier runs) are copied instead of downloaded
+        clone_args = ["git", "clone", "--depth", "1", "--filter=blob:none", "--single-branch"]
+        try:
+            mirror_dir = ensure_mirror(repo_url, base_sandbox_dir / '.cache')
+            clone_args += ["--reference-if-able", str(mirror_dir), "--dissociate"]
+        except RuntimeError as e:
+            print(f"Mirror unavailable, cloning without it: {str(e)}")
         
-        # Clone the repository
+        # Start a shallow, partial, single-branch clone without waiting for it;
+        # file contents are only downloaded for the checked out commit
         print(f"Cloning {repo_url} to {sandbox_path}...")
-        result = subprocess.run(["git", "clone", repo_url, "."], capture_output=True, text=True)
+        clone_process = subprocess.Popen(
+            clone_args + [repo_url, "."], cwd=sandbox_path,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        
+        # Prepare the file content and commit message while the clone downloads
+        file_content = f"This file was created by the Git Orchestrator Agent.\nWorkflow ID: {workflow_id}\nTimestamp: {now:%Y-%m-%d %H:%M:%S}\n"
+        commit_message = f"Add test file via orchestrator workflow {unique_id}"
         
-        if result.returncode == 0:
-            print("Repository cloned successfully")
+        _, clone_stderr = clone_process.communicate()
+        if clone_process.returncode == 0:
+            # Set the Git identity for this repository only, leaving the global config alone
+            write_local_config(sandbox_path, git_config)
             
-            # List the contents of the cloned repository
-            print("\nContents of the cloned repository:")
-            for item in os.listdir(sandbox_path):
-                print(f"  - {item}")
+            # Report the clone, the config and the contents of the cloned repository in one write
+            lines = ["Repository cloned successfully"]
+            lines += [f"Set Git config {key}={value}" for key, value in git_config.items()]
+            lines.append("\nContents of the cloned repository:")
+            lines += [f"  - {item}" for item in os.listdir(sandbox_path)]
+            print("\n".join(lines))
         else:
-            print(f"Failed to clone repository: {result.stderr}")
+            print(f"Failed to clone repository: {clone_stderr}")
             raise RuntimeError("Failed to clone repository")
             
     except Exception as e:
@@ -134,107 +266,80 @@ def main():
             print(f"Error cleaning up sandbox: {str(cleanup_error)}")
         return
     
-    # Step 3: Create a new branch
-    print("\nStep 3: Creating a new branch...")
+    # Step 3: Create a new file
+    print("\nStep 3: Creating a new file...")
     try:
-        # Create and checkout a new branch
-        run_git_command(["checkout", "-b", branch_name], sandbox_path)
-        print(f"Created and checked out branch: {branch_name}")
-    except Exception as e:
-        print(f"Error creating branch: {str(e)}")
-        return
-    
-    # Step 4: Create a new file
-    print("\nStep 4: Creating a new file...")
-    try:
-        # Create a new file in the repository
-        file_path = os.path.join(sandbox_path, file_name)
-        with open(file_path, 'w') as f:
-            f.write(file_content)
+        # Create a new file in the repository (an untracked file is carried over by checkout -b)
+        file_path = sandbox_path / file_name
+        file_path.write_text(file_content, encoding='utf-8')
         print(f"Created new file: {file_path}")
     except Exception as e:
         print(f"Error creating file: {str(e)}")
         return
     
-    # Step 5: Stage the changes
-    print("\nStep 5: Staging changes...")
-    try:
-        run_git_command(["add", "."], sandbox_path)
-        print("Changes staged successfully")
-    except Exception as e:
-        print(f"Error staging changes: {str(e)}")
-        return
-    
-    # Step 6: Commit the changes
-    print("\nStep 6: Committing changes...")
+    # Step 4: Create a branch, stage and commit the changes in one batch
+    print("\nStep 4: Creating a new branch and committing changes...")
     try:
-        run_git_command(["commit", "-m", commit_message], sandbox_path)
-        commit_hash = run_git_command(["rev-parse", "HEAD"], sandbox_path)
-        print(f"Changes committed successfully with message: '{commit_message}'")
-        print(f"Commit hash: {commit_hash}")
+        commit_hash = run_git_batch([
+            ["checkout", "-b", branch_name],
+            ["add", "."],
+            ["commit", "-m", commit_message],
+            ["rev-parse", "HEAD"],
+        ], sandbox_path)[-1]
+        print(f"Created and checked out branch: {branch_name}\n"
+              f"Changes committed successfully with message: '{commit_message}'\n"
+              f"Commit hash: {commit_hash}")
+        
+        # Read the file back from the commit, not the working tree
+        with GitCatFileSession(sandbox_path) as session:
+            committed_content = session.read_blob(f"{commit_hash}:{file_name}").decode("utf-8")
+        # Text mode writes \r\n on Windows, which git may or may not have converted
+        committed_content = committed_content.replace("\r\n", "\n")
+        if committed_content != file_content:
+            raise RuntimeError(f"Committed content of {file_name} does not match the written file")
+        print(f"Verified committed contents of {file_name}")
     except Exception as e:
-        print(f"Error committing changes: {str(e)}")
+        print(f"Error creating branch and committing changes: {str(e)}")
         return
     
-    # Step 7: Push the changes
-    print("\nStep 7: Pushing changes...")
+    # Step 5: Push the changes
+    print("\nStep 5: Pushing changes...")
     try:
-        run_git_command(["push", "origin", branch_name], sandbox_path)
+        try:
+            run_git_command(["push", "origin", branch_name], sandbox_path)
+        except RuntimeError as e:
+            if "shallow" not in str(e):
+                raise
+            # Some servers refuse pushes from shallow clones; fetch the history once and retry
+            print("Push from the shallow clone was rejected, fetching the full history...")
+            run_git_command(["fetch", "--unshallow"], sandbox_path)
+            run_git_command(["push", "origin", branch_name], sandbox_path)
         print("Changes pushed successfully")
     except Exception as e:
-        print(f"Error pushing changes: {str(e)}")
-        print("\nNote: This is expected without proper authentication.")
-        print("To push changes in a real scenario, you would need:")
-        print("1. Proper GitHub authentication")
-        print("2. Write access to the repository")
-        print("3. Possibly a personal access token or SSH key")
-    
-    # Step 8: Wait for 15 seconds
-    print("\nStep 8: Waiting for 15 seconds...")
-    for i in range(15, 0, -1):
-        print(f"Cleaning up in {i} seconds...", end="\r")
-        time.sleep(1)
-    print("\nWait complete.")
+        print(f"Error pushing changes: {str(e)}\n"
+              "\nNote: This is expected without proper authentication.\n"
+              "To push changes in a real scenario, you would need:\n"
+              "1. Proper GitHub authentication\n"
+              "2. Write access to the repository\n"
+              "3. Possibly a personal access token or SSH key")
     
-    # Step 9: Clean up the sandbox
-    print("\nStep 9: Cleaning up sandbox...")
-    try:
-        # Clean up function to handle read-only files
-        def handle_remove_readonly(func, path, exc):
-            excvalue = exc[1]
-            if func in (os.rmdir, os.remove, os.unlink) and excvalue.errno == errno.EACCES:
-                # Change the file to be readable, writable, and executable
-                os.chmod(path, stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)
-                # Retry the operation
-                func(path)
-            else:
-                print(f"Failed to remove {path}: {excvalue}")
-        
-        # First try to remove the .git directory separately (common source of issues)
-        git_dir = os.path.join(sandbox_path, '.git')
-        if os.path.exists(git_dir):
-            print(f"Removing Git directory: {git_dir}")
-            try:
-                # Try to force Git to release locks
-                os.chdir(os.path.dirname(sandbox_path))  # Move out of the directory
-                shutil.rmtree(git_dir, onerror=handle_remove_readonly)
-                print("Git directory removed successfully")
-            except Exception as git_err:
-                print(f"Warning: Could not fully remove Git directory: {str(git_err)}")
-                print("Continuing with cleanup...")
-        
-        # Now try to remove the entire sandbox directory
-        print(f"Removing sandbox directory: {sandbox_path}")
-        try:
-            shutil.rmtree(sandbox_path, onerror=handle_remove_readonly)
-            print("Sandbox cleaned up successfully.")
-        except Exception as rm_err:
-            print(f"Warning: Could not fully remove sandbox: {str(rm_err)}")
-            print("Some files may remain and need manual cleanup.")
-            
-    except Exception as e:
-        print(f"Error during cleanup: {str(e)}")
-        print("Sandbox may need manual cleanup.")
+    # Step 6: Start cleaning up the sandbox in the background
+    print("\nStep 6: Cleaning up sandbox in the background...")
+    cleanup_thread = threading.Thread(target=_do_cleanup, args=(sandbox_path,))
+    cleanup_thread.start()
+    
+    # Step 7: Wait while the cleanup runs (15 seconds unless CLEANUP_WAIT says otherwise, 0 skips it)
+    cleanup_wait = int(os.environ.get("CLEANUP_WAIT", "15"))
+    print(f"\nStep 7: Waiting for {cleanup_wait} seconds...")
+    if sys.stdout.isatty():
+        # Only show the countdown to someone watching; logs just get one sleep
+        for i in range(cleanup_wait, 0, -1):
+            print(f"Finishing in {i} seconds...", end="\r", flush=True)
+            time.sleep(1)
+    else:
+        time.sleep(cleanup_wait)
+    print("\nWait complete.")
+    cleanup_thread.join()
     
     print("\n===== GIT ORCHESTRATOR DIRECT WORKFLOW EXAMPLE COMPLETE =====\n")
 
@@ -1,4 +1,5 @@
 import logging
+import logging.handlers
 import sys
 import os
 from pathlib import Path
@@ -9,16 +10,22 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Import the config loader
 from context.config_loader import load_env_config
 
-# Configure logging
+# Configure logging; records are written to the log file in batches of 256 (errors are written at once)
+_log_handlers = [logging.handlers.MemoryHandler(
+    capacity=256, flushLevel=logging.ERROR, target=logging.FileHandler("orchestrator_run.log", encoding='utf-8')
+)]
+if sys.stdout.isatty():
+    # Only echo log records to a terminal; piped output gets the prints alone
+    _log_handlers.append(logging.StreamHandler(sys.stdout))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("orchestrator_run.log")
-    ]
+    handlers=_log_handlers
 )
 
+# Environment variables whose values are masked when displayed
+SENSITIVE_KEYS = frozenset({'GITHUB_TOKEN'})
+
 def main():
     print("\n===== GIT ORCHESTRATOR AGENT EXAMPLE =====\n")
     
@@ -32,11 +39,7 @@ def main():
     # Display loaded environment variables (with sensitive data masked)
     print("Loaded Environment Variables:")
     for var, value in env_vars.items():
-        if var == 'GITHUB_TOKEN':
-            masked_value = value[:4] + '****' if value else None
-            print(f"  {var}: {masked_value}")
-        else:
-            print(f"  {var}: {value}")
+        print(f"  {var}: {value[:4] + '****' if var in SENSITIVE_KEYS and value else value}")
     
     # Demonstrate accessing environment variables from both central and agent-specific .env files
     print("\nAccessing Environment Variables:")
@@ -1,11 +1,22 @@
+import asyncio
+import atexit
+import itertools
 import logging
+import logging.handlers
 import os
+import queue
+import socket
 import sys
+import uuid
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlsplit
+
+# Directory of this script, resolved once
+_HERE = Path(__file__).resolve().parent
 
 # Add the current directory to the path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(_HERE))
 
 # Import workflow steps
 from workflow_steps import utils
@@ -14,16 +25,24 @@ from workflow_steps import step2_clone_repository
 from workflow_steps import step3_commit_changes
 from workflow_steps import step4_wait
 from workflow_steps import step5_cleanup
-from workflow_steps import step6_code_changes
+import workflow_steps  # step 6 is imported lazily, on first use
 
-# Configure logging
+# Configure logging; the log file is written by a background thread so logging never waits on disk,
+# and records reach it in batches of 256 (errors are written at once)
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.handlers.MemoryHandler(
+    capacity=256, flushLevel=logging.ERROR, target=logging.FileHandler("orchestrator_full_workflow.log", encoding='utf-8')
+))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_log_handlers = [logging.handlers.QueueHandler(_log_queue)]
+if sys.stdout.isatty():
+    # Only echo log records to a terminal; piped output gets the prints alone
+    _log_handlers.append(logging.StreamHandler(sys.stdout))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("orchestrator_full_workflow.log")
-    ]
+    handlers=_log_handlers
 )
 
 logger = logging.getLogger(__name__)
@@ -54,8 +73,7 @@ def setup_workflow():
     # Generate workflow ID
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     # Generate a random ID (8 hexadecimal characters)
-    import random
-    random_id = ''.join(random.choice('0123456789abcdef') for _ in range(8))
+    random_id = uuid.uuid4().hex[:8]
     workflow_id = f"{timestamp}_{random_id}"
     print(f"Workflow ID: {workflow_id}")
     
@@ -82,7 +100,57 @@ def create_sandbox_environment():
     print(f"Sandbox created at: {sandbox_path}")
     return sandbox_path
 
-def clone_repository(sandbox_path, repo_url, git_config):
+async def _prefetch_dns(repo_url):
+    """
+    Resolve the repository's host ahead of the clone, warming the system resolver cache.
+    Failures are ignored; the clone reports any real connection problem.
+    
+    Args:
+        repo_url (str): URL of the repository
+    """
+    parts = urlsplit(repo_url)
+    if not parts.hostname:
+        return
+    try:
+        await asyncio.get_running_loop().getaddrinfo(parts.hostname, parts.port or 443, type=socket.SOCK_STREAM)
+    except OSError as e:
+        logger.debug(f"Could not resolve {parts.hostname}: {e}")
+
+async def _create_sandbox_and_resolve(repo_url):
+    """
+    Create the sandbox environment while the repository's host is being resolved.
+    
+    Args:
+        repo_url (str): URL of the repository
+        
+    Returns:
+        str or None: Path to the created sandbox, or None if creation failed
+    """
+    sandbox_path, _ = await asyncio.gather(
+        asyncio.to_thread(create_sandbox_environment),
+        _prefetch_dns(repo_url)
+    )
+    return sandbox_path
+
+async def _commit_while_waiting(repo_path, metadata, seconds):
+    """
+    Commit and push the changes while the wait before cleanup runs, instead of after it.
+    
+    Args:
+        repo_path (str): Path to the cloned repository
+        metadata (dict): Dictionary containing metadata for the commit
+        seconds (int): Number of seconds to wait before cleanup
+        
+    Returns:
+        Tuple[bool, Optional[str]]: Result of commit_changes
+    """
+    commit_result, _ = await asyncio.gather(
+        asyncio.to_thread(commit_changes, repo_path, metadata),
+        asyncio.to_thread(wait_before_cleanup, seconds)
+    )
+    return commit_result
+
+def clone_repository(sandbox_path, repo_url, git_config, persist=False):
     """
     Step 2: Clone the repository into the sandbox.
     
@@ -90,12 +158,17 @@ def clone_repository(sandbox_path, repo_url, git_config):
         sandbox_path (str): Path to the sandbox environment
         repo_url (str): URL of the repository to clone
         git_config (dict): Git configuration
+        persist (bool): Record the clone so later runs can reuse it
         
     Returns:
         tuple: (success, repo_path) where success is a boolean and repo_path is the path to the cloned repository
     """
     print("\nStep 2: Cloning repository...")
-    clone_success, repo_path = step2_clone_repository.clone_repository(sandbox_path, repo_url, git_config)
+    # The CoderAgent reads and edits files anywhere in the repository, so the whole tree
+    # is checked out; file contents of older commits are only fetched if needed
+    clone_success, repo_path = step2_clone_repository.clone_repository(
+        sandbox_path, repo_url, git_config, clone_mode="blobless", persist=persist
+    )
     if not clone_success:
         print("Failed to clone repository. Cleaning up and exiting workflow.")
         step2_clone_repository.cleanup_on_failure(sandbox_path)
@@ -126,7 +199,7 @@ def commit_changes(repo_path, metadata):
         print(f"\nCommitting changes to {file_name} on branch {branch_name}...")
         
         success, commit_hash = step3_commit_changes.commit_changes(
-            repo_path, branch_name, file_name, file_content, commit_message
+            repo_path, branch_name, [(file_name, file_content)], commit_message
         )
     else:
         # For the new workflow, we're committing existing changes
@@ -138,7 +211,7 @@ def commit_changes(repo_path, metadata):
         file_content = f"This commit contains code improvements made at {metadata.get('timestamp', 'unknown time')}\nCommit message: {commit_message}"
         
         success, commit_hash = step3_commit_changes.commit_changes(
-            repo_path, branch_name, file_name, file_content, commit_message
+            repo_path, branch_name, [(file_name, file_content)], commit_message
         )
     
     if success:
@@ -178,23 +251,19 @@ def apply_code_changes(repo_path, code_prompt):
         print(f"Error: Repository path does not exist: {repo_path}")
         return False
     
-    # Check if the repository contains Python files
-    python_files = []
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if file.endswith('.py'):
-                python_files.append(os.path.join(root, file))
-    
-    print(f"Found {len(python_files)} Python files in the repository")
+    # Show a few of the repository's Python files; the walk stops after the third
+    python_files = list(itertools.islice(utils.iter_python_files(repo_path), 3))
     if python_files:
         print("Example Python files:")
-        for file in python_files[:3]:  # Show up to 3 examples
+        for file in python_files:
             print(f"  - {os.path.relpath(file, repo_path)}")
+    else:
+        print("No Python files found in the repository")
     
     # Apply code changes
     try:
         print("\nApplying code changes with CoderAgent...")
-        success, results = step6_code_changes.apply_code_changes(repo_path, code_prompt)
+        success, results = workflow_steps.apply_code_changes(repo_path, code_prompt)
         
         if success and results:
             print(f"\nSuccess! Applied code changes to {results.get('files_changed', 0)} files")
@@ -202,7 +271,7 @@ def apply_code_changes(repo_path, code_prompt):
             # Show detailed results
             if "results" in results:
                 print("\nModified files:")
-                for file_path, success, message in results["results"]:
+                for file_path, success, message, _ in results["results"]:
                     status = "✓" if success else "✗"
                     rel_path = os.path.relpath(file_path, repo_path)
                     print(f"  {status} {rel_path}: {message}")
@@ -223,16 +292,21 @@ def apply_code_changes(repo_path, code_prompt):
         print(f"Exception while applying code changes: {str(e)}")
         return False
 
-def cleanup_sandbox(sandbox_path):
+def cleanup_sandbox(sandbox_path, persist=False):
     """
     Step 5: Clean up the sandbox environment.
     
     Args:
         sandbox_path (str): Path to the sandbox environment
+        persist (bool): Keep the sandbox for reuse by later runs
         
     Returns:
         bool: True if cleanup was successful, False otherwise
     """
+    if persist:
+        step5_cleanup.cleanup_sandbox(sandbox_path, persist=True)
+        print(f"\nKeeping sandbox at {sandbox_path} for the next run.")
+        return True
     print("\nStep 5: Cleaning up sandbox...")
     cleanup_success = step5_cleanup.cleanup_sandbox(sandbox_path)
     if cleanup_success:
@@ -252,19 +326,28 @@ def main():
     # Step 1: Setup workflow
     repo_url, git_config, metadata = setup_workflow()
     
+    # PERSIST_SANDBOX=1 keeps the clone after the run and reuses it on the next one
+    persist = os.environ.get("PERSIST_SANDBOX") == "1"
+    
     sandbox_path = None
     try:
-        # Step 2: Create sandbox environment
-        sandbox_path = create_sandbox_environment()
-        if not sandbox_path:
-            print("Failed to create sandbox environment. Exiting.")
-            return
-        
-        # Step 3: Clone repository
-        clone_success, repo_path = clone_repository(sandbox_path, repo_url, git_config)
-        if not clone_success:
-            print("Failed to clone repository. Cleaning up sandbox.")
-            return
+        repo_path = step2_clone_repository.find_reusable_clone(repo_url, git_config) if persist else None
+        if repo_path:
+            # Steps 2 and 3 are already done; the clone fills the whole sandbox
+            print(f"\nReusing the clone from an earlier run at: {repo_path}")
+            sandbox_path = repo_path
+        else:
+            # Step 2: Create sandbox environment (while resolving the repository host)
+            sandbox_path = asyncio.run(_create_sandbox_and_resolve(repo_url))
+            if not sandbox_path:
+                print("Failed to create sandbox environment. Exiting.")
+                return
+            
+            # Step 3: Clone repository
+            clone_success, repo_path = clone_repository(sandbox_path, repo_url, git_config, persist)
+            if not clone_success:
+                print("Failed to clone repository. Cleaning up sandbox.")
+                return
         
         # Step 4: Create a new branch using the git branch agent
         branch_name = f"feature/auto-improvements-{metadata['workflow_id']}"
@@ -281,15 +364,15 @@ def main():
         if not code_change_success:
             print("Failed to apply code changes. Continuing with workflow.")
         
-        # Step 6: Commit the changes and push to remote
+        # Step 6: Commit the changes and push to remote, overlapping the wait before cleanup
         print("\nStep 6: Committing and pushing changes...")
         commit_message = f"Auto-improvements: Added docstrings and type hints"
-        commit_success, commit_hash = commit_changes(repo_path, {
+        commit_success, commit_hash = asyncio.run(_commit_while_waiting(repo_path, {
             'branch_name': branch_name,
             'commit_message': commit_message,
             'author_name': git_config.get('user.name', 'AI Agent'),
             'author_email': git_config.get('user.email', 'ai.agent@example.com')
-        })
+        }, 5))
         
         if commit_success:
             print(f"Successfully committed changes with hash: {commit_hash}")
@@ -298,16 +381,13 @@ def main():
         else:
             print("Failed to commit changes. Continuing with workflow.")
         
-        # Wait a moment before cleanup
-        wait_before_cleanup(5)
-        
     except Exception as e:
         print(f"An error occurred during workflow execution: {str(e)}")
     finally:
         # Step 7: Always clean up sandbox if it was created
         if sandbox_path:
             print("\nCleaning up sandbox...")
-            cleanup_sandbox(sandbox_path)
+            cleanup_sandbox(sandbox_path, persist)
     
     print("\n===== GIT ORCHESTRATOR FULL WORKFLOW EXAMPLE COMPLETE =====\n")
 
@@ -1,24 +1,34 @@
 import logging
+import logging.handlers
 import os
 import sys
 import time
-import errno
+import subprocess
+from subprocess import DEVNULL, PIPE
 from pathlib import Path
 
+# Directory of this script, resolved once
+_HERE = Path(__file__).resolve().parent
+_BASE_SANDBOX = (_HERE / '..' / 'application-sandbox').resolve()
+
 # Add the current directory to the path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(str(_HERE))
 
 # Import the config loader
 from context.config_loader import load_env_config
+from workflow_steps.utils import fast_rmtree, write_file
 
-# Configure logging
+# Configure logging; records are written to the log file in batches of 256 (errors are written at once)
+_log_handlers = [logging.handlers.MemoryHandler(
+    capacity=256, flushLevel=logging.ERROR, target=logging.FileHandler("sandbox_clone_example.log", encoding='utf-8')
+)]
+if sys.stdout.isatty():
+    # Only echo log records to a terminal; piped output gets the prints alone
+    _log_handlers.append(logging.StreamHandler(sys.stdout))
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("sandbox_clone_example.log")
-    ]
+    handlers=_log_handlers
 )
 
 logger = logging.getLogger(__name__)
@@ -40,6 +50,20 @@ def main():
     }
     print(f"Using Git config: {git_config}")
     
+    # Pass the identity to git through its environment variables, instead of
+    # running `git config` once per setting (and changing the global config)
+    git_env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": git_config["user.name"],
+        "GIT_AUTHOR_EMAIL": git_config["user.email"],
+        "GIT_COMMITTER_NAME": git_config["user.name"],
+        "GIT_COMMITTER_EMAIL": git_config["user.email"],
+        "GIT_CONFIG_COUNT": str(len(git_config)),
+    }
+    for index, (key, value) in enumerate(git_config.items()):
+        git_env[f"GIT_CONFIG_KEY_{index}"] = key
+        git_env[f"GIT_CONFIG_VALUE_{index}"] = value
+    
     # Step 1: Create a unique sandbox directory for this run
     print("\nStep 1: Creating unique sandbox environment...")
     try:
@@ -47,12 +71,14 @@ def main():
         import datetime
         
         # Create a unique sandbox directory with timestamp and UUID
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Take the time once; the sandbox name and the new file are both formatted from it
+        now = datetime.datetime.now()
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
         unique_id = str(uuid.uuid4())[:8]  # Use first 8 chars of UUID
         sandbox_name = f"sandbox_{timestamp}_{unique_id}"
         
         # Create the unique sandbox directory inside application-sandbox
-        base_sandbox_dir = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'application-sandbox')))
+        base_sandbox_dir = _BASE_SANDBOX
         if not os.path.exists(base_sandbox_dir):
             os.makedirs(base_sandbox_dir)
             
@@ -66,28 +92,20 @@ def main():
     
     # Step 2: Clone the repository using git commands directly
     print("\nStep 2: Cloning repository...")
-    import subprocess
     try:
-        
-        # Change to the sandbox directory
-        os.chdir(sandbox_path)
-        
-        # Set Git configuration
-        for key, value in git_config.items():
-            subprocess.run(["git", "config", "--global", key, value], check=True)
-            print(f"Set Git config {key}={value}")
-        
-        # Clone the repository
+        # Clone only the tip of the default branch; the history is never read
         print(f"Cloning {repo_url} to {sandbox_path}...")
-        result = subprocess.run(["git", "clone", repo_url, "."], capture_output=True, text=True)
+        # Only stderr is read, on failure; --quiet also drops the progress meter
+        result = subprocess.run(["git", "clone", "--quiet", "--depth=1", "--single-branch", "--no-tags",
+                                 repo_url, str(sandbox_path)],
+                                cwd=sandbox_path.parent, env=git_env, stdout=DEVNULL, stderr=PIPE, text=True)
         
         if result.returncode == 0:
             print("Repository cloned successfully")
             
             # List the contents of the cloned repository
             print("\nContents of the cloned repository:")
-            for item in os.listdir(sandbox_path):
-                print(f"  - {item}")
+            print("\n".join(f"  - {item}" for item in os.listdir(sandbox_path)))
         else:
             print(f"Failed to clone repository: {result.stderr}")
             
@@ -99,8 +117,7 @@ def main():
     try:
         # Create a new file in the repository
         new_file_path = os.path.join(sandbox_path, 'hello_from_ganon.txt')
-        with open(new_file_path, 'w') as f:
-            f.write(f"Hello from GANON!\nThis file was created at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        write_file(new_file_path, f"Hello from GANON!\nThis file was created at {now:%Y-%m-%d %H:%M:%S}\n")
         print(f"Created new file: {new_file_path}")
         
         # Modify an existing file
@@ -115,16 +132,14 @@ def main():
     # Step 4: Commit changes
     print("\nStep 4: Committing changes...")
     try:
-        # Change to the repository directory
-        os.chdir(sandbox_path)
-        
         # Stage the changes
-        subprocess.run(["git", "add", "."], check=True)
+        subprocess.run(["git", "add", "."], cwd=sandbox_path, env=git_env, stdout=DEVNULL, check=True)
         print("Changes staged for commit")
         
         # Commit the changes
         commit_message = "Add hello_from_ganon.txt and update README.md"
-        result = subprocess.run(["git", "commit", "-m", commit_message], capture_output=True, text=True)
+        result = subprocess.run(["git", "commit", "-m", commit_message], cwd=sandbox_path,
+                                capture_output=True, text=True, env=git_env)
         
         if result.returncode == 0:
             print(f"Changes committed successfully: {commit_message}")
@@ -138,11 +153,11 @@ def main():
     print("\nStep 5: Pushing changes...\n(Note: This will likely fail without proper authentication)")
     try:
         # Attempt to push changes
-        result = subprocess.run(["git", "push", "origin", "main"], capture_output=True, text=True)
+        result = subprocess.run(["git", "push", "--quiet", "origin", "main"], cwd=sandbox_path,
+                                env=git_env, stdout=DEVNULL, stderr=PIPE, text=True)
         
         if result.returncode == 0:
             print("Changes pushed successfully")
-            print(result.stdout)
         else:
             print("Failed to push changes (expected without proper authentication):")
             print(result.stderr)
@@ -155,53 +170,24 @@ def main():
     
     # Step 6: Wait for 5 seconds before cleanup
     print("\nStep 6: Waiting for 5 seconds before cleanup...")
-    for i in range(5, 0, -1):
-        print(f"Cleaning up in {i} seconds...", end="\r")
-        time.sleep(1)
+    if sys.stdout.isatty():
+        # Only show the countdown to someone watching; logs just get one sleep
+        for i in range(5, 0, -1):
+            print(f"Cleaning up in {i} seconds...", end="\r", flush=True)
+            time.sleep(1)
+    else:
+        time.sleep(5)
     print("\nWait complete.")
     
     # Step 7: Clean up the sandbox
     print("\nStep 7: Cleaning up sandbox...")
     try:
-        import shutil
-        import stat
-        
-        def handle_remove_readonly(func, path, exc):
-            """Handle read-only files and directories when removing"""
-            excvalue = exc[1]
-            if func in (os.rmdir, os.remove, os.unlink) and excvalue.errno == errno.EACCES:
-                # Change the file to be readable, writable, and executable
-                os.chmod(path, stat.S_IRWXU | stat.S_IRWXG | stat.S_IRWXO)
-                # Retry the operation
-                func(path)
-            else:
-                print(f"Failed to remove {path}: {excvalue}")
-        
-        # First try to remove the .git directory separately (common source of issues)
-        git_dir = os.path.join(sandbox_path, '.git')
-        if os.path.exists(git_dir):
-            print(f"Removing Git directory: {git_dir}")
-            try:
-                # Try to force Git to release locks
-                os.chdir(os.path.dirname(sandbox_path))  # Move out of the directory
-                shutil.rmtree(git_dir, onerror=handle_remove_readonly)
-                print("Git directory removed successfully")
-            except Exception as git_err:
-                print(f"Warning: Could not fully remove Git directory: {str(git_err)}")
-                print("Continuing with cleanup...")
-        
-        # Now try to remove the entire sandbox directory
         print(f"Removing sandbox directory: {sandbox_path}")
-        try:
-            shutil.rmtree(sandbox_path, onerror=handle_remove_readonly)
-            print("Sandbox cleaned up successfully.")
-        except Exception as rm_err:
-            print(f"Warning: Could not fully remove sandbox: {str(rm_err)}")
-            print("Some files may remain and need manual cleanup.")
-            
+        fast_rmtree(sandbox_path)
+        print("Sandbox cleaned up successfully.")
     except Exception as e:
         print(f"Error during cleanup: {str(e)}")
-        print("Sandbox may need manual cleanup.")
+        print("Some files may remain and need manual cleanup.")
     
     print("\n===== GIT ORCHESTRATOR SANDBOX AND CLONE EXAMPLE COMPLETE =====\n")
 
@@ -0,0 +1,38 @@
+import os
+import sys
+import unittest
+
+# Add the agent directory to the path so we can import core and workflow_steps
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.agent import GitOrchestratorAgent
+
+
+class TestLoadAgents(unittest.TestCase):
+
+    def setUp(self):
+        GitOrchestratorAgent._AGENT_CACHE.clear()
+        self.addCleanup(GitOrchestratorAgent._AGENT_CACHE.clear)
+
+    def test_clone_agent_uses_its_own_tools(self):
+        # Test loading the sandbox agent first, whose tools package also has a sandbox_manager
+        self.assertIsNotNone(GitOrchestratorAgent._get_agent('git_sandbox_agent'))
+        clone_agent_class = GitOrchestratorAgent._get_agent('git_clone_agent')
+
+        # Verify
+        self.assertIsNotNone(clone_agent_class)
+        clone_agent_module = sys.modules[clone_agent_class.__module__]
+        self.assertTrue(hasattr(clone_agent_module.sandbox_manager, 'create_clone_directory'))
+
+    def test_commit_agent_loads_after_other_agents(self):
+        # Test loading the commit agent once other agents' tools packages have been imported
+        GitOrchestratorAgent._get_agent('git_sandbox_agent')
+        GitOrchestratorAgent._get_agent('git_clone_agent')
+        commit_agent_class = GitOrchestratorAgent._get_agent('git_commit_agent')
+
+        # Verify
+        self.assertIsNotNone(commit_agent_class)
+        self.assertEqual(commit_agent_class.__name__, 'GitCommitAgent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Add the agent directory to the path so we can import workflow_steps
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from workflow_steps import step3_commit_changes
+
+
+class TestCommitChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.commit_agent = MagicMock()
+        self.commit_agent.commit_hash = "abc123"
+        agent_class = MagicMock(return_value=self.commit_agent)
+        patchers = [
+            patch.object(step3_commit_changes, 'load_agent_class', return_value=agent_class),
+            patch.object(step3_commit_changes, 'write_file'),
+            patch.object(step3_commit_changes, 'get_default_branch', return_value="trunk"),
+            patch.object(step3_commit_changes, 'PYGIT2_AVAILABLE', True),
+            patch.object(step3_commit_changes, 'pygit2', create=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.mock_pygit2 = step3_commit_changes.pygit2
+        self.mock_pygit2.GitError = type('GitError', (Exception,), {})
+        self.repo = self.mock_pygit2.Repository.return_value
+
+    def test_dirty_working_tree_commits_with_git(self):
+        # Files edited before the commit, e.g. by the CoderAgent
+        self.repo.status.return_value = {"app.py": 256}
+
+        success, commit_hash = step3_commit_changes.commit_changes(
+            "/tmp/repo", "feature", [("commit_info.txt", "info")], "message"
+        )
+
+        # Verify the in-process commit was skipped
+        self.repo.create_commit.assert_not_called()
+        self.commit_agent.create_branch.assert_called_once_with("feature", "trunk")
+        self.commit_agent.stage_all.assert_called_once_with()
+        self.commit_agent.commit.assert_called_once_with("message")
+        self.assertEqual((success, commit_hash), (True, "abc123"))
+
+    def test_clean_working_tree_commits_in_process(self):
+        self.repo.status.return_value = {}
+        self.repo.create_commit.return_value = "def456"
+
+        success, commit_hash = step3_commit_changes.commit_changes(
+            "/tmp/repo", "feature", [("commit_info.txt", "info")], "message"
+        )
+
+        # Verify the commit is made on the default branch
+        self.repo.lookup_branch.assert_called_once_with("trunk")
+        base_commit = self.repo.lookup_branch.return_value.peel.return_value
+        self.assertEqual(self.repo.create_commit.call_args[0][-1], [base_commit.id])
+        self.commit_agent.commit.assert_not_called()
+        self.assertEqual((success, commit_hash), (True, "def456"))
+
+
+if __name__ == '__main__':
+    unittest.main()
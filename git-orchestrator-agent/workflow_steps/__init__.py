@@ -1 +1,17 @@
 # Git Orchestrator Workflow Steps module
+
+__all__ = ["apply_code_changes"]
+
+# Step functions imported on first access, so workflows that never reach them skip their imports
+_LAZY_ATTRS = {
+    "apply_code_changes": "step6_code_changes",
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        import importlib
+        module = importlib.import_module(f".{_LAZY_ATTRS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import logging
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# fcntl is POSIX-only; on Windows the state file is updated without a lock
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Clones kept for reuse by later runs, keyed by repository URL and Git configuration
+STATE_PATH = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'git-orchestrator' / 'state.json'
+
+def _state_key(repo_url: str, git_config: Dict[str, str]) -> str:
+    """
+    Build the state file key for a repository and Git configuration.
+
+    Args:
+        repo_url (str): URL of the repository
+        git_config (Dict[str, str]): Git configuration (user.name, user.email)
+
+    Returns:
+        str: Key of the clone in the state file
+    """
+    config_hash = hashlib.sha1(json.dumps(git_config, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    return f"{repo_url}#{config_hash}"
+
+@contextmanager
+def _locked_state() -> Iterator[Dict[str, str]]:
+    """
+    Open the state file for update, holding an exclusive lock until the block ends.
+    Changes made to the yielded dictionary are written back atomically.
+
+    Yields:
+        Dict[str, str]: Recorded clone paths by state key
+    """
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(STATE_PATH.with_suffix('.lock'), 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            state = json.loads(STATE_PATH.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            state = {}
+        before = dict(state)
+        yield state
+        if state != before:
+            temp_path = STATE_PATH.with_suffix('.tmp')
+            temp_path.write_text(json.dumps(state, indent=2), encoding='utf-8')
+            os.replace(temp_path, STATE_PATH)
+
+def find_clone(repo_url: str, git_config: Dict[str, str]) -> Optional[str]:
+    """
+    Find a clone of the repository recorded by an earlier run.
+    Entries whose clone no longer exists or is not a valid repository are dropped.
+
+    Args:
+        repo_url (str): URL of the repository
+        git_config (Dict[str, str]): Git configuration (user.name, user.email)
+
+    Returns:
+        Optional[str]: Path to the clone, or None if there is no usable clone
+    """
+    key = _state_key(repo_url, git_config)
+    with _locked_state() as state:
+        repo_path = state.get(key)
+        if not repo_path:
+            return None
+        if os.path.isdir(repo_path) and subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", "HEAD"], cwd=repo_path,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ).returncode == 0:
+            return repo_path
+        logger.info(f"Recorded clone at {repo_path} is gone, forgetting it")
+        del state[key]
+        return None
+
+def record_clone(repo_url: str, git_config: Dict[str, str], repo_path: str) -> None:
+    """
+    Record a clone so later runs with the same repository and configuration reuse it.
+
+    Args:
+        repo_url (str): URL of the repository
+        git_config (Dict[str, str]): Git configuration (user.name, user.email)
+        repo_path (str): Path to the clone
+    """
+    with _locked_state() as state:
+        state[_state_key(repo_url, git_config)] = str(repo_path)
+    logger.info(f"Recorded clone of {repo_url} at {repo_path} for reuse")
+
+def forget_clone(repo_path: str) -> None:
+    """
+    Remove every state entry that points at a clone, e.g. before deleting it.
+
+    Args:
+        repo_path (str): Path to the clone
+    """
+    with _locked_state() as state:
+        for key in [key for key, path in state.items() if path == str(repo_path)]:
+            del state[key]
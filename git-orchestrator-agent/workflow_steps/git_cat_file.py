@@ -0,0 +1,81 @@
+import logging
+import subprocess
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+class GitCatFileSession:
+    """
+    Reads git objects through one long-running `git cat-file --batch` process.
+
+    Every read is a request on the process's stdin instead of a new `git show`
+    process, so repeated reads from the same repository cost one process in total.
+    A session is not thread-safe; open one per worker thread.
+
+    Usage:
+        with GitCatFileSession(repo_path) as session:
+            content = session.read_blob("HEAD:README.md")
+    """
+
+    def __init__(self, repo_path: Union[str, Path]):
+        """
+        Initialize the session.
+
+        Args:
+            repo_path (str or Path): Path to the git repository
+        """
+        self.repo_path = Path(repo_path)
+        self._process = None
+
+    def __enter__(self):
+        """
+        Start the `git cat-file --batch` process.
+
+        Returns:
+            GitCatFileSession: The session instance
+        """
+        logger.info(f"Starting git cat-file session in {self.repo_path}")
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=self.repo_path,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Stop the `git cat-file --batch` process.
+        """
+        if self._process:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+    def read_blob(self, ref: str) -> bytes:
+        """
+        Read the contents of a git object.
+
+        Args:
+            ref (str): Object name, e.g. a SHA or "<rev>:<path>"
+
+        Returns:
+            bytes: Contents of the object
+
+        Raises:
+            RuntimeError: If the session is not open or the object does not exist
+        """
+        if not self._process:
+            raise RuntimeError("Git cat-file session is not open")
+
+        self._process.stdin.write(f"{ref}\n".encode("utf-8"))
+        self._process.stdin.flush()
+
+        # The header is "<sha> <type> <size>", or "<ref> missing" for unknown objects
+        header = self._process.stdout.readline().decode("utf-8").split()
+        if len(header) != 3:
+            raise RuntimeError(f"Git object not found: {ref}")
+        size = int(header[2])
+
+        # The contents are followed by a newline
+        return self._process.stdout.read(size + 1)[:-1]
@@ -1,9 +1,9 @@
-import os
-import sys
 import logging
 from pathlib import Path
 from typing import Optional
 
+from .utils import get_sandbox_manager
+
 logger = logging.getLogger(__name__)
 
 def create_sandbox() -> Optional[str]:
@@ -15,14 +15,7 @@ def create_sandbox() -> Optional[str]:
     """
     logger.info("Step 1: Creating sandbox environment...")
     try:
-        # Add the git-sandbox-agent directory to the Python path
-        sandbox_agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'git-sandbox-agent'))
-        if sandbox_agent_dir not in sys.path:
-            sys.path.insert(0, sandbox_agent_dir)
-            logger.info(f"Added {sandbox_agent_dir} to Python path")
-        
-        # Import the sandbox_manager
-        from tools import sandbox_manager
+        sandbox_manager = get_sandbox_manager()
         
         # Create a sandbox environment directly
         sandbox_path = sandbox_manager.create_sandbox()
@@ -1,12 +1,18 @@
 import os
 import sys
 import logging
+import subprocess
 from pathlib import Path
 from typing import Dict, Tuple, Optional, List
 
+from .utils import get_default_branch, get_sandbox_manager, load_agent_class
+from . import clone_state
+
 logger = logging.getLogger(__name__)
 
-def clone_repository(sandbox_path: str, repo_url: str, git_config: Dict[str, str]) -> Tuple[bool, Optional[str]]:
+def clone_repository(sandbox_path: str, repo_url: str, git_config: Dict[str, str],
+                     shallow: bool = True, depth: int = 1,
+                     clone_mode: Optional[str] = None, persist: bool = False) -> Tuple[bool, Optional[str]]:
     """
     Step 2: Clone a repository using the GitCloneAgent.
     
@@ -14,6 +20,12 @@ def clone_repository(sandbox_path: str, repo_url: str, git_config: Dict[str, str
         sandbox_path (str): Path to the sandbox environment
         repo_url (str): URL of the repository to clone
         git_config (Dict[str, str]): Git configuration (user.name, user.email)
+        shallow (bool): Make a shallow, partial, single-branch clone (the default).
+            Set to False for a full clone with all branches and history.
+        depth (int): Number of commits to fetch for a shallow clone
+        clone_mode (str, optional): "treeless", "shallow", "blobless" or "full", overriding shallow.
+            "treeless" suits workflows that only add files, since nothing existing is read.
+        persist (bool): Record the clone so later runs can reuse it with find_reusable_clone
         
     Returns:
         Tuple[bool, Optional[str]]: (success, repo_path) where success is True if the clone was successful,
@@ -21,38 +33,26 @@ def clone_repository(sandbox_path: str, repo_url: str, git_config: Dict[str, str
     """
     logger.info("Step 2: Cloning repository...")
     try:
-        # Use a more direct approach to import the GitCloneAgent
-        # Save the original path
-        path_copy = sys.path.copy()
-        
-        # Add the git-clone-agent directory to the Python path
-        clone_agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'git-clone-agent'))
-        
-        # Import using a direct import approach
-        sys.path.insert(0, clone_agent_dir)
-        logger.info(f"Added {clone_agent_dir} to Python path")
-        
-        # Import the core module directly
-        import core.agent as clone_agent_module
-        GitCloneAgent = clone_agent_module.GitCloneAgent
+        GitCloneAgent = load_agent_class('git-clone-agent', 'GitCloneAgent')
         
         # Clone the repository using the GitCloneAgent
         clone_agent = GitCloneAgent(working_dir=sandbox_path)
         success, repo_path = clone_agent.clone_repository(
             repo_url=repo_url,
-            git_config=git_config
+            git_config=git_config,
+            shallow=shallow,
+            depth=depth,
+            clone_mode=clone_mode,
+            use_mirror=True  # Reuse objects downloaded by earlier workflow runs
         )
         
-        # Restore the original path
-        sys.path = path_copy
-        
         if success:
             logger.info(f"Repository cloned successfully to: {repo_path}")
+            if persist:
+                clone_state.record_clone(repo_url, git_config, repo_path)
             
             # List the contents of the cloned repository
-            logger.info("Contents of the cloned repository:")
-            for item in os.listdir(repo_path):
-                logger.info(f"  - {item}")
+            logger.info("Contents of the cloned repository:\n  - %s", "\n  - ".join(os.listdir(repo_path)))
                 
             return True, repo_path
         else:
@@ -63,6 +63,37 @@ def clone_repository(sandbox_path: str, repo_url: str, git_config: Dict[str, str
         logger.error(f"Error cloning repository: {str(e)}")
         return False, None
 
+def find_reusable_clone(repo_url: str, git_config: Dict[str, str]) -> Optional[str]:
+    """
+    Find a clone kept by an earlier run (clone_repository with persist=True) and bring it
+    up to date, so steps 1 and 2 can be skipped. Only new objects are fetched; then the
+    remote's default branch is checked out and reset to origin's, dropping the branch and
+    changes the earlier run left, and untracked files are removed.
+    
+    Args:
+        repo_url (str): URL of the repository
+        git_config (Dict[str, str]): Git configuration (user.name, user.email)
+        
+    Returns:
+        Optional[str]: Path to the clone, or None if there is none to reuse
+    """
+    repo_path = clone_state.find_clone(repo_url, git_config)
+    if not repo_path:
+        return None
+    
+    logger.info(f"Reusing clone at {repo_path}")
+    default_branch = get_default_branch(repo_path)
+    for args in (["fetch", "--quiet", "origin"],
+                 # -B resets the branch to origin's and --force the index and working tree
+                 ["checkout", "--quiet", "--force", "-B", default_branch, f"origin/{default_branch}"],
+                 ["clean", "-fd", "--quiet"]):
+        result = subprocess.run(["git"] + args, cwd=repo_path, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            # The existing checkout is still usable, only possibly out of date
+            logger.warning(f"git {args[0]} failed in reused clone: {result.stderr.strip()}")
+    return repo_path
+
 def cleanup_on_failure(sandbox_path: str) -> None:
     """
     Clean up the sandbox if the clone operation failed.
@@ -71,16 +102,8 @@ def cleanup_on_failure(sandbox_path: str) -> None:
         sandbox_path (str): Path to the sandbox environment
     """
     try:
-        # Add the git-sandbox-agent directory to the Python path
-        sandbox_agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'git-sandbox-agent'))
-        if sandbox_agent_dir not in sys.path:
-            sys.path.insert(0, sandbox_agent_dir)
-        
-        # Import the sandbox_manager
-        from tools import sandbox_manager
-        
         # Clean up the sandbox
-        sandbox_manager.cleanup_sandbox(sandbox_path)
+        get_sandbox_manager().cleanup_sandbox(sandbox_path)
         logger.info("Sandbox cleaned up after clone failure")
     except Exception as e:
         logger.error(f"Error cleaning up sandbox: {str(e)}")
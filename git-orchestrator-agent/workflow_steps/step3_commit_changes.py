@@ -4,78 +4,133 @@ import logging
 from pathlib import Path
 from typing import Dict, Tuple, Optional, List, Any
 
+from .utils import get_default_branch, load_agent_class, write_file
+
+# pygit2 is optional; without it every commit goes through GitCommitAgent
+try:
+    import pygit2
+    PYGIT2_AVAILABLE = True
+except ImportError:
+    PYGIT2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
-def commit_changes(repo_path: str, branch_name: str, file_name: str, file_content: str, commit_message: str) -> Tuple[bool, Optional[str]]:
+def _commit_via_pygit2(repo_path: str, branch_name: str, base_branch: str, files: List[Tuple[str, str]],
+                       commit_message: str) -> str:
     """
-    Step 3: Create a branch, add a file, and commit changes using the GitCommitAgent.
+    Commit new top-level files onto a new branch in-process with pygit2.
+    The blobs, tree and commit are written straight to the object database and the
+    branch ref is created on the commit, without running git or touching the
+    working tree, index or HEAD. Only for clean working trees: other changes (e.g.
+    files edited by the CoderAgent) would not be part of the commit.
+    
+    Args:
+        repo_path (str): Path to the cloned repository
+        branch_name (str): Name of the branch to create at the new commit
+        base_branch (str): Branch whose last commit is the parent of the new commit; the
+            remote-tracking branch is used if there is no local branch of that name
+        files (List[Tuple[str, str]]): (file_name, file_content) pairs of the files to add
+        commit_message (str): Commit message
+        
+    Returns:
+        str: Hash of the new commit
+        
+    Raises:
+        ValueError: If the working tree has changes or a file is not at the top level
+        KeyError: If the base branch does not exist
+        pygit2.GitError: If the repository cannot be read or written
+    """
+    repo = pygit2.Repository(repo_path)
+    if repo.status():
+        raise ValueError("Working tree has uncommitted changes")
+    base = repo.lookup_branch(base_branch) or repo.lookup_branch(f"origin/{base_branch}", pygit2.GIT_BRANCH_REMOTE)
+    if base is None:
+        raise KeyError(f"Base branch not found: {base_branch}")
+    base_commit = base.peel(pygit2.Commit)
+    tree_builder = repo.TreeBuilder(base_commit.tree)
+    for file_name, file_content in files:
+        if '/' in file_name or os.sep in file_name:
+            raise ValueError(f"Not a top-level file: {file_name}")
+        blob_id = repo.create_blob(file_content.encode('utf-8'))
+        tree_builder.insert(file_name, blob_id, pygit2.GIT_FILEMODE_BLOB)
+    
+    # Author and committer come from user.name and user.email in the git config
+    signature = repo.default_signature
+    commit_id = repo.create_commit(f"refs/heads/{branch_name}", signature, signature,
+                                   commit_message, tree_builder.write(), [base_commit.id])
+    return str(commit_id)
+
+def commit_changes(repo_path: str, branch_name: str, files: List[Tuple[str, str]],
+                   commit_message: str) -> Tuple[bool, Optional[str]]:
+    """
+    Step 3: Create a branch, add files, and commit changes using the GitCommitAgent.
+    The branch starts at the remote's default branch (see utils.get_default_branch),
+    whatever is checked out. All files are written first, then staged and committed
+    with one git command each.
+    When pygit2 is installed and the working tree is clean, top-level files are committed
+    in-process instead and only the push runs git; the files are then in the new branch
+    but not in the working tree. Changes already in the working tree always go through git.
     
     Args:
         repo_path (str): Path to the cloned repository
         branch_name (str): Name of the branch to create
-        file_name (str): Name of the file to create
-        file_content (str): Content of the file to create
+        files (List[Tuple[str, str]]): (file_name, file_content) pairs of the files to create
         commit_message (str): Commit message
         
     Returns:
         Tuple[bool, Optional[str]]: (success, commit_hash) where success is True if all operations were successful,
                                    and commit_hash is the hash of the commit
     """
-    logger.info("Step 3: Creating branch, adding file, and committing changes...")
+    logger.info("Step 3: Creating branch, adding files, and committing changes...")
     try:
-        # Use a direct import approach to avoid path conflicts
-        commit_agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'git-commit-agent'))
-        commit_agent_core_file = os.path.join(commit_agent_dir, 'core', 'agent.py')
-        logger.info(f"Loading GitCommitAgent from {commit_agent_core_file}")
-        
-        # Use importlib to load the module directly from the file path
-        import importlib.util
-        spec = importlib.util.spec_from_file_location("git_commit_agent", commit_agent_core_file)
-        git_commit_agent_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(git_commit_agent_module)
-        
-        # Get the GitCommitAgent class from the loaded module
-        GitCommitAgent = git_commit_agent_module.GitCommitAgent
-        logger.info("Successfully imported GitCommitAgent class")
+        GitCommitAgent = load_agent_class('git-commit-agent', 'GitCommitAgent')
         
         # Create a new instance of the GitCommitAgent
-        commit_agent = GitCommitAgent(repo_path)
-        
-        # Restore the original path
-        sys.path = path_copy
-        
-        # Create a new branch
-        logger.info(f"Creating branch: {branch_name}")
-        if not commit_agent.create_branch(branch_name, "main"):
-            logger.error(f"Failed to create branch: {commit_agent.error_message}")
-            return False, None
-        logger.info(f"Branch '{branch_name}' created successfully")
+        commit_agent = GitCommitAgent(Path(repo_path))
         
-        # Create a new file
-        logger.info(f"Creating file: {file_name}")
-        file_path = os.path.join(repo_path, file_name)
-        with open(file_path, 'w') as f:
-            f.write(file_content)
-        logger.info(f"File created successfully")
+        base_branch = get_default_branch(repo_path)
+        commit_hash = None
+        if PYGIT2_AVAILABLE:
+            try:
+                commit_hash = _commit_via_pygit2(repo_path, branch_name, base_branch, files, commit_message)
+                logger.info(f"Branch '{branch_name}' created and committed in-process")
+            except (pygit2.GitError, KeyError, ValueError) as e:
+                logger.warning(f"In-process commit failed, falling back to git: {str(e)}")
         
-        # Stage the changes
-        logger.info("Staging changes...")
-        if not commit_agent.stage_all():
-            logger.error(f"Failed to stage changes: {commit_agent.error_message}")
-            return False, None
-        logger.info("Changes staged successfully")
+        if commit_hash is None:
+            # Create a new branch
+            logger.info(f"Creating branch: {branch_name} from {base_branch}")
+            if not commit_agent.create_branch(branch_name, base_branch):
+                logger.error(f"Failed to create branch: {commit_agent.error_message}")
+                return False, None
+            logger.info(f"Branch '{branch_name}' created successfully")
+            
+            # Write all files before staging, so a single git add covers them
+            for file_name, file_content in files:
+                logger.info(f"Creating file: {file_name}")
+                write_file(os.path.join(repo_path, file_name), file_content)
+            logger.info(f"Created {len(files)} file(s) successfully")
+            
+            # Stage the changes
+            logger.info("Staging changes...")
+            if not commit_agent.stage_all():
+                logger.error(f"Failed to stage changes: {commit_agent.error_message}")
+                return False, None
+            logger.info("Changes staged successfully")
+            
+            # Commit the changes
+            logger.info("Committing changes...")
+            if not commit_agent.commit(commit_message):
+                logger.error(f"Failed to commit changes: {commit_agent.error_message}")
+                return False, None
+            logger.info(f"Changes committed successfully with message: '{commit_message}'")
+            commit_hash = commit_agent.commit_hash
         
-        # Commit the changes
-        logger.info("Committing changes...")
-        if not commit_agent.commit(commit_message):
-            logger.error(f"Failed to commit changes: {commit_agent.error_message}")
-            return False, None
-        logger.info(f"Changes committed successfully with message: '{commit_message}'")
-        logger.info(f"Commit hash: {commit_agent.commit_hash}")
+        logger.info(f"Commit hash: {commit_hash}")
         
         # Push the changes
         logger.info("Pushing changes...")
-        if commit_agent.push():
+        if commit_agent.push(branch_name):
             logger.info("Changes pushed successfully")
         else:
             logger.warning(f"Failed to push changes: {commit_agent.error_message}")
@@ -85,7 +140,7 @@ def commit_changes(repo_path: str, branch_name: str, file_name: str, file_conten
             logger.info("2. Write access to the repository")
             logger.info("3. Possibly a personal access token or SSH key")
         
-        return True, commit_agent.commit_hash
+        return True, commit_hash
         
     except Exception as e:
         logger.error(f"Error in commit operations: {str(e)}")
@@ -1,3 +1,4 @@
+import sys
 import time
 import logging
 from typing import Optional
@@ -11,8 +12,13 @@ def wait(seconds: int = 15) -> None:
     Args:
         seconds (int): Number of seconds to wait
     """
-    logger.info(f"Step 4: Waiting for {seconds} seconds...")
-    for i in range(seconds, 0, -1):
-        logger.info(f"Cleaning up in {i} seconds...")
-        time.sleep(1)
+    logger.info("Step 4: Waiting for %d seconds...", seconds)
+    if sys.stdout.isatty():
+        # Show a countdown on the terminal only; logs just record the start and end
+        for i in range(seconds, 0, -1):
+            print(f"Cleaning up in {i} seconds...", end="\r", flush=True)
+            time.sleep(1)
+        print()
+    else:
+        time.sleep(seconds)
     logger.info("Wait complete.")
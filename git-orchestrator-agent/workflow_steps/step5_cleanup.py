@@ -1,33 +1,39 @@
-import os
-import sys
 import logging
 from pathlib import Path
 from typing import Optional
 
+from .utils import get_sandbox_git_ops, get_sandbox_manager
+from . import clone_state
+
 logger = logging.getLogger(__name__)
 
-def cleanup_sandbox(sandbox_path: str) -> bool:
+def cleanup_sandbox(sandbox_path: str, persist: bool = False) -> bool:
     """
     Step 5: Clean up the sandbox environment.
     
     Args:
         sandbox_path (str): Path to the sandbox environment
+        persist (bool): Keep the sandbox so later runs can reuse its clone
+            (see step2_clone_repository.find_reusable_clone)
         
     Returns:
         bool: True if the cleanup was successful, False otherwise
     """
+    if persist:
+        logger.info(f"Step 5: Keeping sandbox at {sandbox_path} for reuse")
+        return True
+    
     logger.info("Step 5: Cleaning up sandbox...")
     try:
-        # Add the git-sandbox-agent directory to the Python path
-        sandbox_agent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'git-sandbox-agent'))
-        if sandbox_agent_dir not in sys.path:
-            sys.path.insert(0, sandbox_agent_dir)
-        
-        # Import the sandbox_manager
-        from tools import sandbox_manager
+        sandbox_path = Path(sandbox_path)
+        clone_state.forget_clone(sandbox_path)
+        # A linked worktree (clone_mode="worktree") is unregistered from its mirror, and git
+        # deletes the checked-out files; the shared objects stay in the mirror for the next run
+        get_sandbox_git_ops().remove_worktree(sandbox_path)
         
         # Clean up the sandbox
-        sandbox_manager.cleanup_sandbox(sandbox_path)
+        if sandbox_path.exists():
+            get_sandbox_manager().cleanup_sandbox(sandbox_path)
         logger.info("Sandbox cleaned up successfully.")
         return True
         
@@ -1,12 +1,43 @@
 import os
 import sys
+import stat
 import logging
 import datetime
 import uuid
-from typing import Dict, Optional
+import subprocess
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Iterator, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Directory containing all agent directories (git-clone-agent, git-commit-agent, ...)
+AGENTS_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# This agent's directory, which holds the context package
+ORCHESTRATOR_DIR = AGENTS_ROOT / 'git-orchestrator-agent'
+
+# Directories that never hold the repository's own Python sources: VCS data,
+# caches, virtual environments, vendored packages and build output
+SKIPPED_DIRS = frozenset({
+    '.git', '__pycache__', '.mypy_cache', '.pytest_cache', '.tox',
+    'venv', '.venv', 'node_modules', 'build', 'dist',
+})
+
+# The sandbox agent's sandbox_manager and git_ops only use the standard library (pygit2 is
+# optional), so they can be loaded on their own
+SANDBOX_MANAGER_PATH = AGENTS_ROOT / 'git-sandbox-agent' / 'tools' / 'sandbox_manager.py'
+SANDBOX_GIT_OPS_PATH = AGENTS_ROOT / 'git-sandbox-agent' / 'tools' / 'git_ops.py'
+
+# Branch used as the default branch when a clone does not record origin's (origin/HEAD)
+FALLBACK_DEFAULT_BRANCH = 'main'
+
+# Format of the timestamp that starts every workflow ID
+WORKFLOW_ID_TIME_FORMAT = '%Y%m%d_%H%M%S'
+
 def generate_workflow_id() -> str:
     """
     Generate a unique workflow ID using timestamp and UUID.
@@ -15,13 +46,14 @@ def generate_workflow_id() -> str:
         str: Unique workflow ID
     """
     unique_id = str(uuid.uuid4())[:8]  # Use first 8 chars of UUID
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamp = datetime.datetime.now().strftime(WORKFLOW_ID_TIME_FORMAT)
     workflow_id = f"{timestamp}_{unique_id}"
     return workflow_id
 
-def get_workflow_metadata(workflow_id: str) -> Dict[str, str]:
+@lru_cache(maxsize=128)
+def _workflow_metadata(workflow_id: str) -> Dict[str, str]:
     """
-    Generate workflow metadata based on the workflow ID.
+    Build the workflow metadata for a workflow ID, once per ID.
     
     Args:
         workflow_id (str): Unique workflow ID
@@ -29,31 +61,264 @@ def get_workflow_metadata(workflow_id: str) -> Dict[str, str]:
     Returns:
         Dict[str, str]: Dictionary containing workflow metadata
     """
-    unique_id = workflow_id.split('_')[-1]
+    timestamp, _, unique_id = workflow_id.rpartition('_')
+    try:
+        # The file records when the workflow started, which the ID already encodes
+        started_at = datetime.datetime.strptime(timestamp, WORKFLOW_ID_TIME_FORMAT)
+    except ValueError:
+        started_at = datetime.datetime.now()
     
     return {
         "branch_name": f"feature/orchestrator-workflow-{unique_id}",
         "file_name": f"orchestrator_test_{unique_id}.txt",
-        "file_content": f"This file was created by the Git Orchestrator Agent.\nWorkflow ID: {workflow_id}\nTimestamp: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+        "file_content": f"This file was created by the Git Orchestrator Agent.\nWorkflow ID: {workflow_id}\nTimestamp: {started_at:%Y-%m-%d %H:%M:%S}\n",
         "commit_message": f"Add test file via orchestrator workflow {unique_id}"
     }
 
+def get_workflow_metadata(workflow_id: str) -> Dict[str, str]:
+    """
+    Generate workflow metadata based on the workflow ID.
+    The metadata only depends on the ID, so repeated calls reuse it.
+    
+    Args:
+        workflow_id (str): Unique workflow ID
+        
+    Returns:
+        Dict[str, str]: Dictionary containing workflow metadata
+    """
+    # Copy, so callers can change their metadata without affecting the cache
+    return dict(_workflow_metadata(workflow_id))
+
+@lru_cache(maxsize=1)
+def _get_config_loader() -> ModuleType:
+    """
+    Get the orchestrator's context.config_loader module, importing it on first use.
+    
+    Returns:
+        ModuleType: The config_loader module
+    """
+    module = sys.modules.get('context.config_loader')
+    if module is None:
+        # Add the git-orchestrator-agent directory to the Python path
+        orchestrator_dir = str(ORCHESTRATOR_DIR)
+        if orchestrator_dir not in sys.path:
+            sys.path.insert(0, orchestrator_dir)
+        from context import config_loader as module
+    return module
+
 def load_env_config() -> Dict[str, str]:
     """
     Load environment configuration for the workflow.
     
+    The config loader is imported once; it caches the parsed .env files itself
+    until they change, and hands out a fresh copy on every call.
+    
     Returns:
         Dict[str, str]: Dictionary containing environment configuration
     """
-    # Add the git-orchestrator-agent directory to the Python path
-    orchestrator_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    if orchestrator_dir not in sys.path:
-        sys.path.insert(0, orchestrator_dir)
+    return _get_config_loader().load_env_config()
+
+def iter_python_files(repo_path) -> Iterator[str]:
+    """
+    Yield the Python files in a repository, skipping SKIPPED_DIRS.
+    Files are found lazily, so callers that only need a few stop the walk early.
+    Entry types come from the cached os.scandir data, so no extra stat calls are made.
+    
+    Args:
+        repo_path (str or Path): Path to the repository
+        
+    Yields:
+        str: Path of each Python file found
+    """
+    stack = [repo_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                subdirs = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRS:
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith('.py'):
+                        yield entry.path
+        except OSError as e:
+            # Match os.walk, which skips directories it cannot read
+            logger.debug(f"Skipping unreadable directory: {e}")
+            continue
+        stack.extend(subdirs)
+
+def get_default_branch(repo_path) -> str:
+    """
+    Get the name of the remote's default branch, as recorded by git clone in origin/HEAD.
+    
+    Args:
+        repo_path (str or Path): Path to the repository
+        
+    Returns:
+        str: Branch name (e.g. 'main'), or FALLBACK_DEFAULT_BRANCH if origin/HEAD is not set
+    """
+    result = subprocess.run(["git", "symbolic-ref", "--quiet", "--short", "refs/remotes/origin/HEAD"],
+                            cwd=repo_path, capture_output=True, text=True)
+    remote_branch = result.stdout.strip()
+    if result.returncode == 0 and remote_branch.startswith("origin/"):
+        return remote_branch[len("origin/"):]
+    return FALLBACK_DEFAULT_BRANCH
+
+def write_file(path, content: Union[str, bytes]) -> None:
+    """
+    Create or overwrite a file with the given text or bytes.
     
-    # Import the config loader
-    from context.config_loader import load_env_config as load_config
+    The file is written with a single os.write on a raw descriptor instead of going
+    through open()'s text and buffer layers. Newlines are written as-is on every
+    platform, as git expects.
     
-    # Load environment variables
-    env_vars = load_config()
+    Args:
+        path (str or Path): Path of the file to write
+        content (str or bytes): Text to write, encoded as UTF-8, or bytes to write as-is
+    """
+    data = content if isinstance(content, bytes) else content.encode('utf-8')
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        # os.write may write less than asked for, e.g. when interrupted by a signal
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def _unlink_batch(paths: List[str]) -> None:
+    """
+    Remove a batch of files, clearing the read-only flag if needed (e.g. git objects on Windows).
+    
+    Args:
+        paths (List[str]): Paths of the files to remove
+    """
+    for path in paths:
+        try:
+            os.unlink(path)
+        except PermissionError:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+
+def fast_rmtree(path, max_workers: int = 8, batch_size: int = 1024) -> None:
+    """
+    Remove a directory tree with os.scandir, unlinking files on a thread pool.
+    The GIL is released during each unlink, so the syscalls overlap across cores.
+    
+    Args:
+        path (str or Path): Directory to remove
+        max_workers (int): Number of threads unlinking files
+        batch_size (int): Number of files handed to a thread at once
+    """
+    directories = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        batch = []
+        stack = [os.fspath(path)]
+        while stack:
+            directory = stack.pop()
+            directories.append(directory)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        batch.append(entry.path)
+                        if len(batch) >= batch_size:
+                            futures.append(executor.submit(_unlink_batch, batch))
+                            batch = []
+        if batch:
+            futures.append(executor.submit(_unlink_batch, batch))
+        for future in futures:
+            future.result()  # Re-raise the first error
+    
+    # Parents are listed before their children, so remove directories in reverse order
+    for directory in reversed(directories):
+        os.rmdir(directory)
+
+@lru_cache(maxsize=1)
+def get_sandbox_manager() -> ModuleType:
+    """
+    Get the git-sandbox-agent's sandbox_manager module, loading it on first use.
+    
+    The module is loaded from its file under its own name, so it does not depend on
+    sys.path and cannot be confused with another agent's tools package.
+    
+    Returns:
+        ModuleType: The sandbox_manager module
+    """
+    logger.info(f"Loading sandbox_manager from {SANDBOX_MANAGER_PATH}")
+    spec = importlib.util.spec_from_file_location("git_sandbox_agent_sandbox_manager", SANDBOX_MANAGER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@lru_cache(maxsize=1)
+def get_sandbox_git_ops() -> ModuleType:
+    """
+    Get the git-sandbox-agent's git_ops module, loading it on first use.
+    
+    Loaded like get_sandbox_manager, from its file under its own name.
+    
+    Returns:
+        ModuleType: The git_ops module
+    """
+    logger.info(f"Loading git_ops from {SANDBOX_GIT_OPS_PATH}")
+    spec = importlib.util.spec_from_file_location("git_sandbox_agent_git_ops", SANDBOX_GIT_OPS_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _load_module(name: str, path: Path, package_dir: Optional[Path] = None) -> ModuleType:
+    """
+    Load a module (or a package, when package_dir is given) from a file and register it in sys.modules.
+    
+    Args:
+        name (str): Name to register the module under
+        path (Path): Path to the module file (__init__.py for a package)
+        package_dir (Path, optional): Directory of the package, searched for its submodules
+        
+    Returns:
+        ModuleType: The loaded module
+    """
+    search_locations = [str(package_dir)] if package_dir else None
+    spec = importlib.util.spec_from_file_location(name, path, submodule_search_locations=search_locations)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@lru_cache(maxsize=None)
+def load_agent_class(agent_dir_name: str, class_name: str) -> type:
+    """
+    Load an agent class from <agent_dir>/core/agent.py, once per process.
+    
+    Every agent imports its helpers with `from tools import ...`, and each agent's
+    tools package is different. While an agent module loads, "tools" is bound to
+    that agent's own tools package (and any other agent's tools modules are set
+    aside), so the agents never pick up each other's helpers. sys.path is not changed.
+    
+    Args:
+        agent_dir_name (str): Name of the agent directory (e.g. 'git-clone-agent')
+        class_name (str): Name of the agent class (e.g. 'GitCloneAgent')
+        
+    Returns:
+        type: The agent class
+    """
+    agent_dir = AGENTS_ROOT / agent_dir_name
+    module_prefix = agent_dir_name.replace('-', '_')
+    logger.info(f"Loading {class_name} from {agent_dir}")
     
-    return env_vars
+    saved = {name: module for name, module in sys.modules.items() if name == 'tools' or name.startswith('tools.')}
+    for name in saved:
+        del sys.modules[name]
+    try:
+        tools_dir = agent_dir / 'tools'
+        _load_module('tools', tools_dir / '__init__.py', tools_dir)
+        agent_module = _load_module(f"{module_prefix}_core_agent", agent_dir / 'core' / 'agent.py')
+    finally:
+        # The agent module keeps its own references to its tools modules
+        for name in [name for name in sys.modules if name == 'tools' or name.startswith('tools.')]:
+            del sys.modules[name]
+        sys.modules.update(saved)
+    return getattr(agent_module, class_name)
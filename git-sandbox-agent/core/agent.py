@@ -1,5 +1,4 @@
 import logging
-import os
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
@@ -14,31 +13,41 @@ from tools import validation
 
 logger = logging.getLogger(__name__)
 
+# Shared default for missing validation results; never modified
+_EMPTY = {}
+
 class GitSandboxAgent:
     """
     Agent for running validation tasks in a clean sandbox environment.
     This agent only clones repositories and runs validation tasks.
     """
     
-    def __init__(self, working_dir: Optional[Path] = None):
+    def __init__(self, working_dir: Optional[Union[str, Path]] = None):
         """
         Initialize the GitSandboxAgent.
         
         Args:
-            working_dir (Optional[Path]): Custom working directory for the agent
+            working_dir (Optional[Union[str, Path]]): Custom working directory for the agent
                 If provided, this will be used instead of the default application-sandbox directory
         """
-        self.working_dir = working_dir
+        # Normalize once so the rest of the agent can rely on Path methods
+        self.working_dir = Path(working_dir) if working_dir else None
         self.sandbox_path = None
         self.validation_results = {}
     
-    def setup_sandbox(self, repo_url: str, branch: Optional[str] = None) -> Path:
+    def setup_sandbox(self, repo_url: str, branch: Optional[str] = None, use_cache: bool = False,
+                      full_history: bool = False, worktree: bool = False) -> Path:
         """
         Set up a sandbox environment with the specified repository.
         
         Args:
             repo_url (str): URL of the repository to clone
             branch (Optional[str]): Branch to clone (if specified)
+            use_cache (bool): Clone from a local mirror that is reused across sandboxes,
+                so only the first setup for a repository downloads all of it
+            full_history (bool): Clone the full history instead of only the latest commit
+            worktree (bool): Check out the cached mirror as a linked worktree instead of
+                cloning, so several sandboxes of one repository share its objects
             
         Returns:
             Path: Path to the sandbox directory
@@ -47,7 +56,7 @@ class GitSandboxAgent:
         if self.working_dir:
             # If working_dir is provided, use it directly
             self.sandbox_path = self.working_dir
-            os.makedirs(self.sandbox_path, exist_ok=True)
+            self.sandbox_path.mkdir(parents=True, exist_ok=True)
             logger.info(f"Using custom working directory for sandbox: {self.sandbox_path}")
         else:
             # Otherwise use the application-sandbox directory
@@ -55,7 +64,8 @@ class GitSandboxAgent:
             logger.info(f"Setting up sandbox for {repo_url} at {self.sandbox_path}")
         
         try:
-            git_ops.clone_repo(repo_url, self.sandbox_path, branch)
+            git_ops.clone_repo(repo_url, self.sandbox_path, branch, use_cache=use_cache,
+                               full_history=full_history, worktree=worktree)
             logger.info(f"Successfully cloned {repo_url} to sandbox")
             return self.sandbox_path
         except Exception as e:
@@ -66,7 +76,8 @@ class GitSandboxAgent:
     def run_validation(self, 
                        test_command: Optional[List[str]] = None,
                        linter_command: Optional[List[str]] = None,
-                       custom_scripts: Optional[List[Dict[str, Union[str, List[str]]]]] = None) -> Dict:
+                       custom_scripts: Optional[List[Dict[str, Union[str, List[str]]]]] = None,
+                       parallel: bool = True) -> Dict:
         """
         Run validation tasks in the sandbox environment.
         
@@ -74,6 +85,8 @@ class GitSandboxAgent:
             test_command (Optional[List[str]]): Custom test command to run
             linter_command (Optional[List[str]]): Custom linter command to run
             custom_scripts (Optional[List[Dict[str, Union[str, List[str]]]]]): List of custom scripts to run
+            parallel (bool): Run the tests, linter and custom scripts at the same time, each in
+                its own subprocess. Set to False if they modify the same files.
             
         Returns:
             Dict: Validation results
@@ -81,44 +94,9 @@ class GitSandboxAgent:
         if not self.sandbox_path:
             raise RuntimeError("Sandbox not set up. Call setup_sandbox first.")
         
-        results = {}
-        
-        # Run tests
-        try:
-            results["tests"] = validation.run_tests(self.sandbox_path, test_command)
-            logger.info(f"Test results: {results['tests']['success']}")
-        except Exception as e:
-            logger.error(f"Error running tests: {str(e)}")
-            results["tests"] = {"success": False, "error": str(e)}
-        
-        # Run linter
-        try:
-            results["linter"] = validation.run_linter(self.sandbox_path, linter_command)
-            logger.info(f"Linter results: {results['linter']['success']}")
-        except Exception as e:
-            logger.error(f"Error running linter: {str(e)}")
-            results["linter"] = {"success": False, "error": str(e)}
-        
-        # Run custom scripts
-        if custom_scripts:
-            results["custom_scripts"] = []
-            for script_config in custom_scripts:
-                script_path = script_config.get("path")
-                script_args = script_config.get("args", [])
-                
-                try:
-                    script_result = validation.run_custom_script(
-                        self.sandbox_path, script_path, script_args
-                    )
-                    results["custom_scripts"].append(script_result)
-                    logger.info(f"Custom script {script_path} results: {script_result['success']}")
-                except Exception as e:
-                    logger.error(f"Error running custom script {script_path}: {str(e)}")
-                    results["custom_scripts"].append({
-                        "path": script_path,
-                        "success": False,
-                        "error": str(e)
-                    })
+        results = validation.run_validation_parallel(
+            self.sandbox_path, test_command, linter_command, custom_scripts, parallel=parallel
+        )
         
         self.validation_results = results
         return results
@@ -133,30 +111,24 @@ class GitSandboxAgent:
         if not self.validation_results:
             return {"status": "No validation results available"}
         
-        report = {
-            "summary": {
-                "tests_passed": self.validation_results.get("tests", {}).get("success", False),
-                "linter_passed": self.validation_results.get("linter", {}).get("success", False),
-            },
-            "details": self.validation_results
+        results = self.validation_results
+        tests_passed = results.get("tests", _EMPTY).get("success", False)
+        linter_passed = results.get("linter", _EMPTY).get("success", False)
+        summary = {
+            "tests_passed": tests_passed,
+            "linter_passed": linter_passed,
+            "overall_success": tests_passed and linter_passed,
         }
         
-        # Calculate overall success
-        report["summary"]["overall_success"] = (
-            report["summary"]["tests_passed"] and 
-            report["summary"]["linter_passed"]
-        )
-        
         # Add custom scripts summary if available
-        custom_scripts = self.validation_results.get("custom_scripts", [])
+        custom_scripts = results.get("custom_scripts")
         if custom_scripts:
-            report["summary"]["custom_scripts_passed"] = all(
+            summary["custom_scripts_passed"] = all(
                 script.get("success", False) for script in custom_scripts
             )
-            report["summary"]["overall_success"] = (
-                report["summary"]["overall_success"] and 
-                report["summary"]["custom_scripts_passed"]
-            )
+            summary["overall_success"] = summary["overall_success"] and summary["custom_scripts_passed"]
+        
+        report = {"summary": summary, "details": results}
         
         return report
     
@@ -168,7 +140,13 @@ class GitSandboxAgent:
         if self.sandbox_path and not self.working_dir:
             # Only clean up automatically created sandboxes, not custom working directories
             logger.info(f"Cleaning up sandbox at {self.sandbox_path}")
-            sandbox_manager.cleanup_sandbox(self.sandbox_path)
+            try:
+                # A worktree is also recorded in the cached mirror it was checked out from
+                git_ops.remove_worktree(self.sandbox_path)
+            except RuntimeError as e:
+                logger.warning(f"Could not remove worktree at {self.sandbox_path}: {str(e)}")
+            if self.sandbox_path.exists():
+                sandbox_manager.cleanup_sandbox(self.sandbox_path)
             self.sandbox_path = None
         elif self.sandbox_path and self.working_dir:
             logger.info(f"Skipping cleanup of custom working directory: {self.sandbox_path}")
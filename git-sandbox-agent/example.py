@@ -6,6 +6,9 @@ from pathlib import Path
 # Use direct relative imports
 from core.agent import GitSandboxAgent
 
+# Directory for the custom working directory example, resolved once
+TEST_SANDBOX_DIR = Path(__file__).resolve().parent / 'test-sandbox'
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -86,34 +89,28 @@ def main():
         print("\n[EXAMPLE 2] Using custom working directory")
         print("-" * 60)
         
-        custom_dir = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), 'test-sandbox')))
+        custom_dir = TEST_SANDBOX_DIR
         
         # Clear the directory if it exists
         if custom_dir.exists():
             import shutil
             import stat
-            import time
-            
-            def handle_readonly_files(func, path, exc_info):
-                # Handle read-only files by making them writable first
-                if func in (os.unlink, os.rmdir) and exc_info[1].winerror == 5:  # Access denied
-                    try:
-                        os.chmod(path, stat.S_IWRITE)
-                        time.sleep(0.1)  # Small delay to ensure the change takes effect
-                        func(path)  # Try again
-                    except Exception as e:
-                        print(f"Still couldn't remove {path}: {e}")
             
             print(f"Clearing existing test-sandbox directory at: {custom_dir}")
             try:
-                shutil.rmtree(custom_dir, onerror=handle_readonly_files)
+                # git leaves read-only files in .git, which Windows refuses to delete;
+                # make every file writable in one pass so rmtree never has to retry
+                for root, _, files in os.walk(custom_dir):
+                    for name in files:
+                        os.chmod(os.path.join(root, name), stat.S_IWRITE | stat.S_IREAD)
+                shutil.rmtree(custom_dir)
             except Exception as e:
                 print(f"Warning: Could not fully clear directory: {e}")
                 # If we can't clear it, try to work with what's there
                 pass
             
         # Create fresh directory
-        os.makedirs(custom_dir, exist_ok=True)
+        custom_dir.mkdir(parents=True, exist_ok=True)
         print(f"Created test-sandbox directory at: {custom_dir}")
         
         with GitSandboxAgent(working_dir=custom_dir) as agent:
@@ -1,7 +1,6 @@
 import logging
 import os
 import sys
-import time
 from pathlib import Path
 
 # Use direct relative imports
@@ -47,9 +46,14 @@ def test_sandbox_lifecycle():
     else:
         print(f"ERROR: Root sandbox directory does not exist at: {root_dir}")
     
-    # Step 4: Wait a moment before cleanup
-    print("\nStep 4: Waiting 15 seconds before cleanup...")
-    time.sleep(5)
+    # Step 4: Verify the test file before cleanup; the write is complete once the file is
+    # closed, so there is nothing to wait for
+    print("\nStep 4: Verifying test file before cleanup...")
+    test_file = sandbox_path / "test_file.txt"
+    if test_file.exists() and test_file.read_text() == "This is a test file in the sandbox.":
+        print(f"Test file contents verified at: {test_file}")
+    else:
+        print(f"ERROR: Test file missing or incomplete at: {test_file}")
     
     # Step 5: Clean up the sandbox
     print("\nStep 5: Cleaning up sandbox...")
@@ -1,84 +1,204 @@
+import hashlib
+import subprocess
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, call, MagicMock
 from pathlib import Path
 
 from git_sandbox_agent.tools import git_ops
 
 
 class TestGitOps(unittest.TestCase):
-    
-    @patch('subprocess.run')
-    def test_run_git_command(self, mock_run):
+
+    def setUp(self):
+        # One subprocess.run patch per test; tests only set what it returns
+        self._subprocess_patcher = patch('subprocess.run')
+        self.mock_run = self._subprocess_patcher.start()
+        self.mock_process = MagicMock(spec=subprocess.CompletedProcess)
+        self.mock_run.return_value = self.mock_process
+
+    def tearDown(self):
+        self._subprocess_patcher.stop()
+
+    def test_run_git_command(self):
         # Setup mock
-        mock_process = MagicMock()
-        mock_process.returncode = 0
-        mock_process.stdout = "command output"
-        mock_run.return_value = mock_process
-        
+        self.mock_process.returncode = 0
+        self.mock_process.stdout = b"command output"
+
         # Test successful command
         cwd = Path('/tmp/sandbox')
         result = git_ops.run_git_command(["status"], cwd)
-        
+
         # Verify
-        mock_run.assert_called_once_with(
-            ["git", "status"], 
-            cwd=cwd, 
-            capture_output=True, 
-            text=True
+        self.mock_run.assert_called_once_with(
+            ["git", "status"],
+            cwd=str(cwd),
+            capture_output=True
         )
         self.assertEqual(result, "command output")
-    
-    @patch('subprocess.run')
-    def test_run_git_command_error(self, mock_run):
+
+    def test_run_git_command_error(self):
         # Setup mock for error
-        mock_process = MagicMock()
-        mock_process.returncode = 1
-        mock_process.stderr = "error message"
-        mock_run.return_value = mock_process
-        
+        self.mock_process.returncode = 1
+        self.mock_process.stderr = b"error message"
+
         # Test command that fails
         cwd = Path('/tmp/sandbox')
         with self.assertRaises(RuntimeError) as context:
             git_ops.run_git_command(["invalid-command"], cwd)
-        
+
         # Verify error message
         self.assertIn("error message", str(context.exception))
-    
-    @patch('git_sandbox_agent.tools.git_ops.run_git_command')
+
+    def test_run_git_command_cached(self):
+        # Setup mock
+        self.mock_process.returncode = 0
+        self.mock_process.stdout = b"abc123"
+
+        with tempfile.TemporaryDirectory() as repo_dir:
+            (Path(repo_dir) / ".git").mkdir()
+            (Path(repo_dir) / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+
+            # Test read-only command run twice, then again after a mutating command
+            self.assertEqual(git_ops.run_git_command(["rev-parse", "HEAD"], Path(repo_dir)), "abc123")
+            self.assertEqual(git_ops.run_git_command(["rev-parse", "HEAD"], Path(repo_dir)), "abc123")
+            self.assertEqual(self.mock_run.call_count, 1)
+
+            git_ops.run_git_command(["commit", "-m", "message"], Path(repo_dir))
+            git_ops.run_git_command(["rev-parse", "HEAD"], Path(repo_dir))
+
+        # Verify
+        self.assertEqual(self.mock_run.call_count, 3)
+
+    def test_run_git_command_not_cached_for_working_tree(self):
+        # Setup mock
+        self.mock_process.returncode = 0
+        self.mock_process.stdout = b""
+
+        with tempfile.TemporaryDirectory() as repo_dir:
+            (Path(repo_dir) / ".git").mkdir()
+            (Path(repo_dir) / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+
+            # Test ls-files listing untracked files, which only the working tree knows about
+            git_ops.run_git_command(["ls-files", "--others"], Path(repo_dir))
+            self.mock_process.stdout = b"new_file.py"
+            result = git_ops.run_git_command(["ls-files", "--others"], Path(repo_dir))
+
+        # Verify
+        self.assertEqual(result, "new_file.py")
+        self.assertEqual(self.mock_run.call_count, 2)
+
+
+@patch('git_sandbox_agent.tools.git_ops.PYGIT2_AVAILABLE', False)
+@patch('git_sandbox_agent.tools.git_ops.run_git_command', return_value="Cloning into 'repo'...")
+class TestCloneRepo(unittest.TestCase):
+
+    repo_url = "https://github.com/example/repo.git"
+    target_dir = Path('/tmp/sandbox')
+
     def test_clone_repo(self, mock_run_git_command):
-        # Setup
-        mock_run_git_command.return_value = "Cloning into 'repo'..."
-        repo_url = "https://github.com/example/repo.git"
-        target_dir = Path('/tmp/sandbox')
-        
         # Test without branch
-        result = git_ops.clone_repo(repo_url, target_dir)
-        
+        result = git_ops.clone_repo(self.repo_url, self.target_dir)
+
+        # Verify
+        mock_run_git_command.assert_called_once_with(
+            ["clone", "--depth=1", "--single-branch", "--filter=blob:none", self.repo_url, "."],
+            cwd=self.target_dir
+        )
+        self.assertEqual(result, "Cloning into 'repo'...")
+
+    def test_clone_repo_full_history(self, mock_run_git_command):
+        # Test with full history
+        result = git_ops.clone_repo(self.repo_url, self.target_dir, full_history=True)
+
         # Verify
         mock_run_git_command.assert_called_once_with(
-            ["clone", repo_url, "."], 
-            cwd=target_dir
+            ["clone", self.repo_url, "."],
+            cwd=self.target_dir
         )
         self.assertEqual(result, "Cloning into 'repo'...")
-    
-    @patch('git_sandbox_agent.tools.git_ops.run_git_command')
+
     def test_clone_repo_with_branch(self, mock_run_git_command):
-        # Setup
-        mock_run_git_command.return_value = "Cloning into 'repo'..."
-        repo_url = "https://github.com/example/repo.git"
-        target_dir = Path('/tmp/sandbox')
         branch = "feature-branch"
-        
+
         # Test with branch
-        result = git_ops.clone_repo(repo_url, target_dir, branch)
-        
+        result = git_ops.clone_repo(self.repo_url, self.target_dir, branch)
+
         # Verify
         mock_run_git_command.assert_called_once_with(
-            ["clone", repo_url, ".", "--branch", branch], 
-            cwd=target_dir
+            ["clone", "--depth=1", "--single-branch", "--filter=blob:none", self.repo_url, ".", "--branch", branch],
+            cwd=self.target_dir
         )
         self.assertEqual(result, "Cloning into 'repo'...")
 
+    def test_clone_repo_with_cache(self, mock_run_git_command):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch('git_sandbox_agent.tools.git_ops.CLONE_CACHE_DIR', Path(cache_dir)):
+            # Test first clone, which creates the mirror
+            result = git_ops.clone_repo(self.repo_url, self.target_dir, use_cache=True)
+
+            # Verify
+            mirror_dir = Path(cache_dir) / hashlib.sha256(self.repo_url.encode('utf-8')).hexdigest()
+            self.assertEqual(mock_run_git_command.call_args_list, [
+                call(["clone", "--mirror", self.repo_url, str(mirror_dir)], cwd=Path(cache_dir)),
+                call(["config", "--unset", "remote.origin.mirror"], cwd=mirror_dir),
+                call(["clone", str(mirror_dir), "."], cwd=self.target_dir),
+                call(["remote", "set-url", "origin", self.repo_url], cwd=self.target_dir),
+            ])
+            self.assertEqual(result, "Cloning into 'repo'...")
+
+
+@patch('git_sandbox_agent.tools.git_ops.PYGIT2_AVAILABLE', True)
+@patch('git_sandbox_agent.tools.git_ops.run_git_command')
+@patch('git_sandbox_agent.tools.git_ops.pygit2', create=True)
+class TestCloneRepoPygit2(unittest.TestCase):
+
+    repo_url = "https://github.com/example/repo.git"
+    target_dir = Path('/tmp/sandbox')
+
+    def test_clone_repo(self, mock_pygit2, mock_run_git_command):
+        # Test without branch
+        git_ops.clone_repo(self.repo_url, self.target_dir)
+
+        # Verify the clone ran in-process
+        mock_pygit2.clone_repository.assert_called_once_with(
+            self.repo_url, str(self.target_dir), checkout_branch=None, depth=1
+        )
+        mock_run_git_command.assert_not_called()
+
+    def test_clone_repo_falls_back_to_git(self, mock_pygit2, mock_run_git_command):
+        mock_pygit2.GitError = type('GitError', (Exception,), {})
+        mock_pygit2.clone_repository.side_effect = mock_pygit2.GitError("unsupported URL")
+
+        # Test with branch and full history
+        git_ops.clone_repo(self.repo_url, self.target_dir, "feature-branch", full_history=True)
+
+        # Verify
+        mock_run_git_command.assert_called_once_with(
+            ["clone", self.repo_url, ".", "--branch", "feature-branch"],
+            cwd=self.target_dir
+        )
+
+    def test_clone_repo_falls_back_to_git_on_old_pygit2(self, mock_pygit2, mock_run_git_command):
+        mock_pygit2.GitError = type('GitError', (Exception,), {})
+        mock_pygit2.clone_repository.side_effect = TypeError("unexpected keyword argument 'depth'")
+
+        with tempfile.TemporaryDirectory() as target_dir:
+            # Leftovers of the failed clone
+            (Path(target_dir) / ".git").mkdir()
+            (Path(target_dir) / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+            (Path(target_dir) / "README.md").write_text("partial checkout")
+
+            # Test
+            git_ops.clone_repo(self.repo_url, Path(target_dir))
+
+            # Verify git clones into an empty directory
+            self.assertEqual(list(Path(target_dir).iterdir()), [])
+            mock_run_git_command.assert_called_once_with(
+                ["clone", "--depth=1", "--single-branch", "--filter=blob:none", self.repo_url, "."],
+                cwd=Path(target_dir)
+            )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,14 +1,133 @@
+import os
+import shutil
+import hashlib
 import subprocess
 import logging
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# pygit2 is optional; without it every clone runs git
+try:
+    import pygit2
+    PYGIT2_AVAILABLE = True
+except ImportError:
+    PYGIT2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Mirrors of cloned repositories, reused by later clones of the same repository
+CLONE_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'git-sandbox-agent' / 'clones'
+
+# Number of mirrors to keep; the least recently used ones are removed first
+CLONE_CACHE_MAX_ENTRIES = int(os.environ.get('GIT_SANDBOX_CLONE_CACHE_MAX', '8'))
+
+# Commands whose output only depends on the commits, refs and index, so it can be reused
+# until one of those changes. Commands that look at the working tree (status, diff) are
+# not cached, since files can change without git knowing.
+CACHEABLE_GIT_VERBS = frozenset({"rev-parse", "log", "show", "ls-files", "ls-tree"})
+
+# ls-files options that list untracked, modified, deleted or killed files, which also
+# depends on the working tree, so ls-files with any of them is not cached either
+_LS_FILES_WORKTREE_OPTIONS = frozenset({"--others", "--modified", "--deleted", "--killed"})
+_LS_FILES_WORKTREE_FLAGS = frozenset("omdk")
+
+# Files and directories of a repository's .git whose modification times change with every
+# commit, ref update and index write
+_GIT_STATE_PATHS = ("HEAD", "index", "packed-refs", os.path.join("refs", "heads"), os.path.join("refs", "tags"))
+
+# Cached output of read-only git commands by repository and arguments, with the repository
+# state it was produced in
+_git_cache: Dict[str, Dict[Tuple[str, ...], Tuple[Tuple[Optional[int], ...], str]]] = {}
+_git_cache_lock = threading.Lock()
+
 def run_git_command(args: List[str], cwd: Path) -> str:
     """
     Runs a git command in the specified directory.
     
+    The output of read-only commands (CACHEABLE_GIT_VERBS, except ls-files listing
+    working tree changes) run at the top of a
+    repository is reused until a commit, ref or the index changes there, or until any
+    other command runs in it.
+    
+    Args:
+        args (List[str]): List of git command arguments
+        cwd (Path): Working directory to run the command in
+        
+    Returns:
+        str: Output of the git command
+        
+    Raises:
+        RuntimeError: If the git command fails
+    """
+    key = str(cwd)
+    cacheable = _is_cacheable(args)
+    state = _repo_state(key) if cacheable else None
+    with _git_cache_lock:
+        if state is not None:
+            cached = _git_cache.get(key, {}).get(tuple(args))
+            if cached is not None and cached[0] == state:
+                return cached[1]
+        elif not cacheable:
+            # Anything else may change what the cached commands would print
+            _git_cache.pop(key, None)
+    
+    output = _run_git(args, cwd)
+    if state is not None:
+        with _git_cache_lock:
+            _git_cache.setdefault(key, {})[tuple(args)] = (state, output)
+    return output
+
+def _is_cacheable(args: List[str]) -> bool:
+    """
+    Check whether the output of a git command only depends on the commits, refs and index.
+    
+    Args:
+        args (List[str]): List of git command arguments
+        
+    Returns:
+        bool: True if the output can be cached until those change
+    """
+    if not args or args[0] not in CACHEABLE_GIT_VERBS:
+        return False
+    if args[0] == "ls-files":
+        for arg in args[1:]:
+            if arg == "--":
+                break
+            if arg.startswith("--"):
+                if arg in _LS_FILES_WORKTREE_OPTIONS:
+                    return False
+            elif arg.startswith("-") and _LS_FILES_WORKTREE_FLAGS.intersection(arg[1:]):
+                # Short options can be combined, e.g. -om
+                return False
+    return True
+
+def _repo_state(cwd: str) -> Optional[Tuple[Optional[int], ...]]:
+    """
+    Get the modification times that identify the state of a repository's commits, refs and index.
+    
+    Args:
+        cwd (str): Top directory of the repository
+        
+    Returns:
+        Optional[Tuple[Optional[int], ...]]: Modification times, or None if cwd is not the top
+            of a repository with a .git directory (worktrees and subdirectories are not cached)
+    """
+    git_dir = os.path.join(cwd, ".git")
+    if not os.path.isdir(git_dir):
+        return None
+    state = []
+    for name in _GIT_STATE_PATHS:
+        try:
+            state.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+def _run_git(args: List[str], cwd: Path) -> str:
+    """
+    Runs a git command, without the output cache.
+    
     Args:
         args (List[str]): List of git command arguments
         cwd (Path): Working directory to run the command in
@@ -20,26 +139,186 @@ def run_git_command(args: List[str], cwd: Path) -> str:
         RuntimeError: If the git command fails
     """
     logger.debug(f"Running git command: git {' '.join(args)} in {cwd}")
-    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+    # Decoded once here rather than through a text-mode wrapper, and without newline translation.
+    # No shell, preexec_fn or session changes, so CPython starts git with vfork() and does not
+    # copy this process's page tables.
+    result = subprocess.run(["git"] + args, cwd=str(cwd), capture_output=True)
     if result.returncode != 0:
-        error_msg = f"Git command failed: {result.stderr}"
+        error_msg = f"Git command failed: {result.stderr.decode('utf-8', 'replace')}"
         logger.error(error_msg)
         raise RuntimeError(error_msg)
-    return result.stdout.strip()
+    return result.stdout.decode('utf-8', 'replace').strip()
 
-def clone_repo(repo_url: str, target_dir: Path, branch: Optional[str] = None) -> str:
+def clone_repo(repo_url: str, target_dir: Path, branch: Optional[str] = None, use_cache: bool = False,
+               full_history: bool = False, worktree: bool = False) -> str:
     """
     Clones a repository into the target directory.
     
+    When pygit2 is installed, clones that do not use the cache run in-process with
+    libgit2 instead of starting git; git is used if that fails.
+    
     Args:
         repo_url (str): URL of the repository to clone
         target_dir (Path): Directory to clone the repository into
         branch (Optional[str]): Branch to checkout after cloning
+        use_cache (bool): Clone from a local mirror in CLONE_CACHE_DIR, which is created
+            on first use and only fetches what changed afterwards. The clone hardlinks the
+            mirror's objects, so it does not depend on the mirror once it is made.
+        full_history (bool): Clone every commit and file version. By default only the
+            latest commit of the branch is fetched, with file contents downloaded as
+            they are checked out; set this when the history is needed (log, blame).
+            Clones from the cache always have the full history.
+        worktree (bool): Check out the cached mirror as a linked worktree (detached at
+            the branch, or the default branch) instead of cloning it. Nothing is copied,
+            so many sandboxes of one repository are cheap; remove them with
+            remove_worktree. Implies use_cache.
         
     Returns:
         str: Output of the git clone command
     """
-    clone_args = ["clone", repo_url, "."]
+    if worktree:
+        return add_worktree(_update_cached_mirror(repo_url), target_dir, branch or "HEAD")
+    
+    if PYGIT2_AVAILABLE and not use_cache:
+        try:
+            return _clone_via_pygit2(repo_url, target_dir, branch, full_history)
+        except (pygit2.GitError, ValueError, TypeError) as e:
+            # pygit2 before 1.14 has no depth argument and raises TypeError
+            logger.warning(f"In-process clone failed, falling back to git: {str(e)}")
+            # git clones into "." and refuses to if the failed clone left anything behind
+            _empty_dir(target_dir)
+    
+    if use_cache:
+        # A local clone hardlinks every object, so limiting the history would save nothing
+        clone_args = ["clone", str(_update_cached_mirror(repo_url)), "."]
+    elif full_history:
+        clone_args = ["clone", repo_url, "."]
+    else:
+        clone_args = ["clone", "--depth=1", "--single-branch", "--filter=blob:none", repo_url, "."]
     if branch:
         clone_args.extend(["--branch", branch])
-    return run_git_command(clone_args, cwd=target_dir)
+    output = run_git_command(clone_args, cwd=target_dir)
+    if use_cache:
+        # Point origin back at the real repository instead of the mirror
+        run_git_command(["remote", "set-url", "origin", repo_url], cwd=target_dir)
+    return output
+
+def _clone_via_pygit2(repo_url: str, target_dir: Path, branch: Optional[str], full_history: bool) -> str:
+    """
+    Clone a repository in-process with pygit2.
+    
+    libgit2 cannot fetch file contents on demand, so a clone without the full history
+    is a depth-1 clone with every file of that commit.
+    
+    Args:
+        repo_url (str): URL of the repository to clone
+        target_dir (Path): Directory to clone the repository into; it must be empty
+        branch (Optional[str]): Branch to check out, or None for the default branch
+        full_history (bool): Clone every commit instead of only the latest one
+        
+    Returns:
+        str: Description of the clone, in place of git's output
+        
+    Raises:
+        pygit2.GitError: If the clone fails
+    """
+    logger.debug(f"Cloning {repo_url} into {target_dir} with pygit2")
+    pygit2.clone_repository(repo_url, str(target_dir), checkout_branch=branch, depth=0 if full_history else 1)
+    return f"Cloned {repo_url} into {target_dir}"
+
+def _empty_dir(path: Path) -> None:
+    """
+    Remove everything inside a directory, keeping the directory itself.
+    
+    Args:
+        path (Path): Directory to empty; nothing is done if it does not exist
+    """
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.unlink(entry.path)
+
+def _update_cached_mirror(repo_url: str) -> Path:
+    """
+    Create or update the cached mirror of a repository.
+    
+    Args:
+        repo_url (str): URL of the repository
+        
+    Returns:
+        Path: Path to the bare mirror
+    """
+    mirror_dir = CLONE_CACHE_DIR / hashlib.sha256(repo_url.encode('utf-8')).hexdigest()
+    if (mirror_dir / 'HEAD').exists():
+        logger.info(f"Updating cached mirror of {repo_url} at {mirror_dir}")
+        run_git_command(["fetch", "--prune"], cwd=mirror_dir)
+        # The mtime marks the mirror as recently used
+        os.utime(mirror_dir)
+    else:
+        CLONE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _evict_cached_mirrors(CLONE_CACHE_MAX_ENTRIES - 1)
+        logger.info(f"Creating cached mirror of {repo_url} at {mirror_dir}")
+        run_git_command(["clone", "--mirror", repo_url, str(mirror_dir)], cwd=CLONE_CACHE_DIR)
+        # Keep fetching every ref, but let worktrees push single branches to origin
+        run_git_command(["config", "--unset", "remote.origin.mirror"], cwd=mirror_dir)
+    return mirror_dir
+
+def _evict_cached_mirrors(keep: int) -> None:
+    """
+    Remove the least recently used cached mirrors until at most `keep` remain.
+    
+    Args:
+        keep (int): Number of mirrors to keep
+    """
+    mirrors = sorted((entry for entry in os.scandir(CLONE_CACHE_DIR) if entry.is_dir()),
+                     key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in mirrors[max(keep, 0):]:
+        if os.path.isdir(os.path.join(entry.path, 'worktrees')):
+            # Sandboxes may still be checked out from this mirror; drop the records of
+            # removed ones and keep the mirror while any are left
+            try:
+                run_git_command(["worktree", "prune"], cwd=Path(entry.path))
+            except RuntimeError:
+                continue
+            if os.path.isdir(os.path.join(entry.path, 'worktrees')):
+                continue
+        logger.info(f"Removing cached mirror {entry.path}")
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+def add_worktree(mirror_dir: Path, target_dir: Path, ref: str = "HEAD") -> str:
+    """
+    Check out a commit of a local mirror into target_dir as a linked worktree.
+    
+    Args:
+        mirror_dir (Path): Bare repository to add the worktree to
+        target_dir (Path): Directory for the worktree; it must not exist yet or be empty
+        ref (str): Commit or branch to check out, detached
+        
+    Returns:
+        str: Output of the git worktree command
+    """
+    logger.info(f"Adding worktree of {mirror_dir} at {target_dir}")
+    return run_git_command(["worktree", "add", "--detach", str(target_dir), ref], cwd=mirror_dir)
+
+def remove_worktree(path: Path) -> bool:
+    """
+    Remove a linked worktree and its record in the repository it belongs to.
+    
+    Args:
+        path (Path): Directory of the worktree
+        
+    Returns:
+        bool: True if the worktree was removed, False if path is not a linked worktree
+    """
+    # A linked worktree has a .git file pointing at its repository instead of a .git directory
+    if not (Path(path) / '.git').is_file():
+        return False
+    common_dir = Path(path, run_git_command(["rev-parse", "--git-common-dir"], cwd=path)).resolve()
+    logger.info(f"Removing worktree at {path}")
+    run_git_command(["worktree", "remove", "--force", str(path)], cwd=common_dir)
+    return True
@@ -1,7 +1,8 @@
-import shutil
 import os
+import shutil
 import uuid
 import logging
+import threading
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -9,24 +10,73 @@ logger = logging.getLogger(__name__)
 # Root directory for all sandboxes
 ROOT_SANDBOX_DIR = Path(r'C:\Users\NUC01\github\sandbox')
 
+# Resolved root with a trailing separator, for checking that a path is inside it
+_ROOT_PREFIX = os.path.join(os.path.realpath(ROOT_SANDBOX_DIR), '')
+
+# Prefix of directories that are being deleted in the background
+TRASH_PREFIX = '.trash-'
+
+def _delete_in_background(path: Path) -> None:
+    """
+    Delete a directory tree in a daemon thread.
+    
+    Args:
+        path (Path): Directory to delete
+    """
+    threading.Thread(target=shutil.rmtree, args=(path,), kwargs={"ignore_errors": True}, daemon=True).start()
+
+def _move_aside(path: Path, trash: Path) -> bool:
+    """
+    Rename a directory to a trash path and delete it in the background.
+    
+    The rename is immediate, so the caller does not wait for every file to be unlinked.
+    Trash left behind when the process exits first is removed by a later
+    initialize_sandbox_root.
+    
+    Args:
+        path (Path): Directory to remove
+        trash (Path): New name for it, on the same filesystem
+        
+    Returns:
+        bool: True if the directory was moved aside, False if it could not be renamed
+    """
+    try:
+        os.rename(path, trash)
+    except OSError as e:
+        logger.warning(f"Could not move {path} aside for deletion: {e}")
+        return False
+    _delete_in_background(trash)
+    return True
+
 def initialize_sandbox_root() -> None:
     """
     Initializes the root application-sandbox directory.
     If the directory doesn't exist, it creates it.
     If the directory already exists, it deletes all files and folders inside it.
+    The old contents are moved aside at once and deleted in the background.
     """
+    # Trash left by an earlier process that exited before deleting it
+    for trash in ROOT_SANDBOX_DIR.parent.glob(f"{TRASH_PREFIX}{ROOT_SANDBOX_DIR.name}-*"):
+        _delete_in_background(trash)
+    
     if ROOT_SANDBOX_DIR.exists():
         logger.info(f"Cleaning up existing application-sandbox directory at {ROOT_SANDBOX_DIR}")
-        # Remove all contents but keep the directory
-        for item in ROOT_SANDBOX_DIR.iterdir():
-            if item.is_dir():
-                shutil.rmtree(item, ignore_errors=True)
-            else:
-                item.unlink()
+        trash = ROOT_SANDBOX_DIR.with_name(f"{TRASH_PREFIX}{ROOT_SANDBOX_DIR.name}-{uuid.uuid4().hex}")
+        if _move_aside(ROOT_SANDBOX_DIR, trash):
+            ROOT_SANDBOX_DIR.mkdir(parents=True, exist_ok=True)
+        else:
+            # Remove all contents but keep the directory; entry types come from the
+            # directory listing, so no extra stat per entry
+            with os.scandir(ROOT_SANDBOX_DIR) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.unlink(entry.path)
         logger.info(f"Cleaned up application-sandbox directory at {ROOT_SANDBOX_DIR}")
     else:
         logger.info(f"Creating application-sandbox directory at {ROOT_SANDBOX_DIR}")
-        os.makedirs(ROOT_SANDBOX_DIR, exist_ok=True)
+        ROOT_SANDBOX_DIR.mkdir(parents=True, exist_ok=True)
         logger.info(f"Created application-sandbox directory at {ROOT_SANDBOX_DIR}")
 
 def create_sandbox() -> Path:
@@ -42,7 +92,7 @@ def create_sandbox() -> Path:
     # Create a unique subdirectory for this sandbox instance
     sandbox_id = str(uuid.uuid4())[:8]  # Use first 8 chars of UUID for brevity
     path = ROOT_SANDBOX_DIR / f"sandbox-{sandbox_id}"
-    os.makedirs(path, exist_ok=True)
+    path.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Created sandbox at {path}")
     return path
@@ -54,10 +104,11 @@ def cleanup_sandbox(path: Path) -> None:
     Args:
         path (Path): Path to the sandbox directory to clean up
     """
-    if path.exists() and path.is_relative_to(ROOT_SANDBOX_DIR):
-        logger.info(f"Cleaning up sandbox at {path}")
-        shutil.rmtree(path, ignore_errors=True)
-    elif not path.is_relative_to(ROOT_SANDBOX_DIR):
+    if not os.path.realpath(path).startswith(_ROOT_PREFIX):
         logger.warning(f"Attempted to clean up directory outside of sandbox root: {path}")
+    elif path.exists():
+        logger.info(f"Cleaning up sandbox at {path}")
+        if not _move_aside(path, ROOT_SANDBOX_DIR / f"{TRASH_PREFIX}{uuid.uuid4().hex}"):
+            shutil.rmtree(path, ignore_errors=True)
     else:
         logger.warning(f"Attempted to clean up non-existent sandbox at {path}")
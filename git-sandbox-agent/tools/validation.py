@@ -1,14 +1,96 @@
+import os
+import atexit
+import selectors
 import subprocess
 import logging
+import threading
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# fcntl is POSIX-only; Windows uses subprocess.run in run_command anyway
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Output kept per stream of a command; older output is dropped
+MAX_OUTPUT_BYTES = 1024 * 1024
+
+# Pipe capacity requested for a command's output and the size of each read from it. A large
+# pipe lets a chatty command keep writing while the output is read in fewer, larger chunks.
+# Linux caps the capacity at /proc/sys/fs/pipe-max-size (1 MB by default) for normal users.
+PIPE_BUFFER_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 256 * 1024
+
+# Cores left free for the agent itself when pytest runs on several workers
+RESERVED_CPUS = 2
+
+# Threads shared by every parallel validation run, so they are started once per process.
+# The work happens in subprocesses, so the threads mostly wait.
+_VALIDATION_POOL = ThreadPoolExecutor(max_workers=max(4, os.cpu_count() or 1),
+                                      thread_name_prefix="validation")
+atexit.register(_VALIDATION_POOL.shutdown, wait=False)
+
+# Files whose change makes the next lint run cover the whole tree again
+LINTER_CONFIG_FILES = frozenset({".flake8", "setup.cfg", "tox.ini", ".pylintrc", "pylintrc", "pyproject.toml"})
+
+# State and result of the last detected-command lint run, by repository
+_last_lint: Dict[str, Tuple[Any, Dict[str, Union[bool, str]]]] = {}
+_last_lint_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def xdist_available() -> bool:
+    """
+    Check whether pytest-xdist is installed, once per process.
+    
+    Returns:
+        bool: True if pytest-xdist can be imported
+    """
+    return importlib.util.find_spec("xdist") is not None
+
+def add_xdist_args(test_command: List[str]) -> List[str]:
+    """
+    Make a pytest command spread its tests over several worker processes with pytest-xdist.
+    
+    The command is returned unchanged if it does not run pytest, pytest-xdist is not
+    installed, the command already chooses its workers (-n) or disables xdist, there
+    are too few cores to gain from it, or GIT_SANDBOX_NO_XDIST=1 is set.
+    
+    Args:
+        test_command (List[str]): Test command to run
+        
+    Returns:
+        List[str]: Test command to run, with the xdist options added if they apply
+    """
+    if test_command[:1] == ["pytest"]:
+        insert_at = 1
+    elif test_command[1:3] == ["-m", "pytest"]:
+        insert_at = 3
+    else:
+        return test_command
+    if os.environ.get("GIT_SANDBOX_NO_XDIST") == "1" or not xdist_available():
+        return test_command
+    if any(arg.startswith(("-n", "--numprocesses")) or arg.endswith("no:xdist")
+           for arg in test_command[insert_at:]):
+        return test_command
+    workers = (os.cpu_count() or 1) - RESERVED_CPUS
+    if workers < 2:
+        return test_command
+    return test_command[:insert_at] + ["-n", str(workers), "--dist=loadfile"] + test_command[insert_at:]
+
 def run_command(command: List[str], cwd: Path) -> Tuple[int, str, str]:
     """
     Runs a command in the specified directory.
     
+    The output is read as it is produced, and only the last MAX_OUTPUT_BYTES of stdout
+    and of stderr are kept, so long test runs do not pile up their whole log in memory.
+    
     Args:
         command (List[str]): Command and arguments to run
         cwd (Path): Working directory to run the command in
@@ -17,8 +99,107 @@ def run_command(command: List[str], cwd: Path) -> Tuple[int, str, str]:
         Tuple[int, str, str]: Return code, stdout, and stderr
     """
     logger.debug(f"Running command: {' '.join(command)} in {cwd}")
-    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
-    return result.returncode, result.stdout, result.stderr
+    if os.name == 'nt':
+        # select() cannot wait on pipes on Windows
+        result = subprocess.run(command, cwd=str(cwd), capture_output=True, text=True)
+        return result.returncode, result.stdout, result.stderr
+    
+    # No shell, preexec_fn or session changes, so CPython starts the command with vfork()
+    # and does not copy this process's page tables
+    with subprocess.Popen(command, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        outputs = {process.stdout: _OutputTail(), process.stderr: _OutputTail()}
+        if hasattr(fcntl, 'F_SETPIPE_SZ'):
+            for stream in outputs:
+                try:
+                    fcntl.fcntl(stream, fcntl.F_SETPIPE_SZ, PIPE_BUFFER_BYTES)
+                except OSError:
+                    # Over the system limit; keep the default capacity
+                    pass
+        with selectors.DefaultSelector() as selector:
+            for stream in outputs:
+                selector.register(stream, selectors.EVENT_READ)
+            while selector.get_map():
+                for key, _ in selector.select():
+                    chunk = os.read(key.fd, READ_CHUNK_BYTES)
+                    if chunk:
+                        outputs[key.fileobj].append(chunk)
+                    else:
+                        selector.unregister(key.fileobj)
+        return_code = process.wait()
+    return return_code, outputs[process.stdout].text(), outputs[process.stderr].text()
+
+class _OutputTail:
+    """
+    The last MAX_OUTPUT_BYTES (or a little more) of a command's output, kept as chunks.
+    """
+    
+    def __init__(self):
+        self.chunks = deque()
+        self.size = 0
+        self.truncated = False
+    
+    def append(self, chunk: bytes) -> None:
+        """
+        Add a chunk of output, dropping the oldest chunks that are no longer needed.
+        
+        Args:
+            chunk (bytes): Output read from the command
+        """
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        while self.size - len(self.chunks[0]) >= MAX_OUTPUT_BYTES:
+            self.size -= len(self.chunks.popleft())
+            self.truncated = True
+    
+    def text(self) -> str:
+        """
+        Decode the kept output.
+        
+        Returns:
+            str: The output, with a marker at the start if older output was dropped
+        """
+        text = b"".join(self.chunks).decode('utf-8', errors='replace')
+        return f"[... earlier output truncated ...]\n{text}" if self.truncated else text
+
+@lru_cache(maxsize=128)
+def _detect_test_command(cwd: str, mtime_ns: int) -> Tuple[str, ...]:
+    """
+    Detect the test framework of a repository and the command that runs it.
+    
+    Args:
+        cwd (str): Working directory of the repository
+        mtime_ns (int): Modification time of the directory, part of the cache key so
+            that adding or removing a configuration file detects again
+        
+    Returns:
+        Tuple[str, ...]: Test command to run
+    """
+    cwd = Path(cwd)
+    if (cwd / "pytest.ini").exists() or (cwd / "conftest.py").exists():
+        return ("pytest",)
+    if (cwd / "setup.py").exists():
+        return ("python", "setup.py", "test")
+    return ("python", "-m", "unittest", "discover")
+
+@lru_cache(maxsize=128)
+def _detect_linter_command(cwd: str, mtime_ns: int) -> Tuple[str, ...]:
+    """
+    Detect the linter configuration of a repository and the command that runs the linter.
+    
+    Args:
+        cwd (str): Working directory of the repository
+        mtime_ns (int): Modification time of the directory, part of the cache key so
+            that adding or removing a configuration file detects again
+        
+    Returns:
+        Tuple[str, ...]: Linter command to run
+    """
+    cwd = Path(cwd)
+    if (cwd / ".flake8").exists() or (cwd / "setup.cfg").exists():
+        return ("flake8",)
+    if (cwd / ".pylintrc").exists():
+        return ("pylint", ".")
+    return ("flake8", ".")  # Default to flake8
 
 def run_tests(cwd: Path, test_command: Optional[List[str]] = None) -> Dict[str, Union[bool, str]]:
     """
@@ -32,13 +213,8 @@ def run_tests(cwd: Path, test_command: Optional[List[str]] = None) -> Dict[str,
         Dict[str, Union[bool, str]]: Test results with success status and output
     """
     if not test_command:
-        # Try to detect test framework and run appropriate command
-        if (cwd / "pytest.ini").exists() or (cwd / "conftest.py").exists():
-            test_command = ["pytest"]
-        elif (cwd / "setup.py").exists():
-            test_command = ["python", "setup.py", "test"]
-        else:
-            test_command = ["python", "-m", "unittest", "discover"]
+        test_command = list(_detect_test_command(str(cwd), cwd.stat().st_mtime_ns))
+    test_command = add_xdist_args(test_command)
     
     logger.info(f"Running tests with command: {' '.join(test_command)}")
     return_code, stdout, stderr = run_command(test_command, cwd)
@@ -50,10 +226,74 @@ def run_tests(cwd: Path, test_command: Optional[List[str]] = None) -> Dict[str,
         "command": ' '.join(test_command)
     }
 
+def run_tests_sharded(cwd: Path, shards: Optional[int] = None) -> Dict[str, Union[bool, str]]:
+    """
+    Runs the pytest tests of the repository split over several pytest processes.
+    
+    The tests are collected once, grouped by file and the files spread over the shards
+    so that each gets about the same number of tests. The shards run at the same time
+    and their results are merged. Unlike pytest-xdist this needs no plugin in the
+    repository's environment. With one shard, or one test file, the tests run as a
+    single `pytest` command through run_tests.
+    
+    Args:
+        cwd (Path): Working directory of the repository
+        shards (Optional[int]): Number of pytest processes; defaults to the number of
+            CPUs minus RESERVED_CPUS
+        
+    Returns:
+        Dict[str, Union[bool, str]]: Test results with success status and output,
+            failing if any shard failed
+    """
+    if shards is None:
+        shards = max(1, (os.cpu_count() or 1) - RESERVED_CPUS)
+    
+    return_code, stdout, stderr = run_command(["pytest", "--collect-only", "-q"], cwd)
+    if return_code != 0:
+        # Collection errors are reported by a normal run
+        return run_tests(cwd, ["pytest"])
+    test_counts = {}
+    for line in stdout.splitlines():
+        if "::" in line:
+            test_file = line.split("::", 1)[0]
+            test_counts[test_file] = test_counts.get(test_file, 0) + 1
+    
+    shards = min(shards, len(test_counts))
+    if shards <= 1:
+        return run_tests(cwd, ["pytest"])
+    
+    # Largest files first, each to the shard with the fewest tests so far
+    shard_files = [[] for _ in range(shards)]
+    shard_sizes = [0] * shards
+    for test_file, count in sorted(test_counts.items(), key=lambda item: item[1], reverse=True):
+        index = shard_sizes.index(min(shard_sizes))
+        shard_files[index].append(test_file)
+        shard_sizes[index] += count
+    
+    # xdist workers inside every shard would only compete with the other shards
+    commands = [["pytest", "-p", "no:xdist"] + sorted(files) for files in shard_files]
+    logger.info(f"Running {sum(shard_sizes)} tests in {shards} pytest shards")
+    # Not the shared validation pool: this may itself run on one of its threads, and
+    # waiting there for tasks queued behind it could deadlock
+    with ThreadPoolExecutor(max_workers=shards, thread_name_prefix="pytest-shard") as executor:
+        outcomes = list(executor.map(lambda command: run_command(command, cwd), commands))
+    
+    return {
+        "success": all(return_code == 0 for return_code, _, _ in outcomes),
+        "output": "\n".join(stdout for _, stdout, _ in outcomes),
+        "error": "\n".join(stderr for _, _, stderr in outcomes if stderr),
+        "command": " & ".join(' '.join(command) for command in commands)
+    }
+
 def run_linter(cwd: Path, linter_command: Optional[List[str]] = None) -> Dict[str, Union[bool, str]]:
     """
     Runs a linter in the repository.
     
+    When the linter command is detected (not given) and the repository is a git
+    repository, runs are incremental: if nothing changed since the last run in the same
+    directory, its result is returned again, and after a clean run only the Python files
+    changed since then are linted. See _incremental_lint for the rules.
+    
     Args:
         cwd (Path): Working directory of the repository
         linter_command (Optional[List[str]]): Custom linter command to run
@@ -61,24 +301,111 @@ def run_linter(cwd: Path, linter_command: Optional[List[str]] = None) -> Dict[st
     Returns:
         Dict[str, Union[bool, str]]: Linter results with success status and output
     """
+    state = None
     if not linter_command:
-        # Try to detect linter configuration and run appropriate command
-        if (cwd / ".flake8").exists() or (cwd / "setup.cfg").exists():
-            linter_command = ["flake8"]
-        elif (cwd / ".pylintrc").exists():
-            linter_command = ["pylint", "."] 
-        else:
-            linter_command = ["flake8", "."]  # Default to flake8
+        linter_command = list(_detect_linter_command(str(cwd), cwd.stat().st_mtime_ns))
+        state = _lint_state(cwd)
+        if state is not None:
+            incremental = _incremental_lint(str(cwd), linter_command, state)
+            if isinstance(incremental, dict):
+                logger.info("Skipping linter, nothing changed since the last run")
+                return incremental
+            if incremental is not None:
+                linter_command = incremental
     
     logger.info(f"Running linter with command: {' '.join(linter_command)}")
     return_code, stdout, stderr = run_command(linter_command, cwd)
     
-    return {
+    result = {
         "success": return_code == 0,
         "output": stdout,
         "error": stderr,
         "command": ' '.join(linter_command)
     }
+    if state is not None:
+        with _last_lint_lock:
+            _last_lint[str(cwd)] = (state, result)
+    return result
+
+def _lint_state(cwd: Path) -> Optional[Tuple[str, Tuple[Tuple[str, Optional[int]], ...]]]:
+    """
+    Snapshot what a lint run sees: the HEAD commit and the changed and untracked files.
+    
+    Args:
+        cwd (Path): Working directory of the repository
+        
+    Returns:
+        Optional[Tuple[str, Tuple[Tuple[str, Optional[int]], ...]]]: HEAD commit and
+            (path, modification time) of every changed or untracked file, or None if
+            cwd is not a git repository
+    """
+    return_code, head, _ = run_command(["git", "rev-parse", "HEAD"], cwd)
+    if return_code != 0:
+        return None
+    return_code, status, _ = run_command(["git", "status", "--porcelain", "-z", "--untracked-files=all"], cwd)
+    if return_code != 0:
+        return None
+    dirty = []
+    entries = iter(status.split("\0"))
+    for entry in entries:
+        if not entry:
+            continue
+        paths = [entry[3:]]
+        if entry[0] in "RC":
+            # Renames and copies are followed by the original path
+            paths.append(next(entries, ""))
+        for path in paths:
+            try:
+                mtime = os.stat(cwd / path).st_mtime_ns
+            except OSError:
+                mtime = None
+            dirty.append((path, mtime))
+    return head.strip(), tuple(sorted(dirty))
+
+def _incremental_lint(cwd: str, linter_command: List[str],
+                      state: Tuple[str, Tuple[Tuple[str, Optional[int]], ...]]) -> Union[None, Dict, List[str]]:
+    """
+    Work out how little of the repository needs linting, given the last run in it.
+    
+    Args:
+        cwd (str): Working directory of the repository
+        linter_command (List[str]): Detected linter command, run on the whole tree
+        state (Tuple[str, Tuple[Tuple[str, Optional[int]], ...]]): Current state from _lint_state
+        
+    Returns:
+        Union[None, Dict, List[str]]: The last result if nothing changed; a command that
+            only lints the changed Python files if the last run passed; None if the
+            whole tree must be linted (no earlier run, it failed, a linter configuration
+            file changed, or the changes cannot be listed)
+    """
+    with _last_lint_lock:
+        last = _last_lint.get(cwd)
+    if last is None:
+        return None
+    last_state, last_result = last
+    if state == last_state:
+        return dict(last_result)
+    if not last_result["success"]:
+        return None
+    
+    last_head, last_dirty = last_state
+    head, dirty = state
+    # Files that differ from what was linted: committed since, changed now, or changed
+    # at the last run (and possibly reverted since)
+    changed = {path for path, _ in dirty} | {path for path, _ in last_dirty}
+    if head != last_head:
+        return_code, output, _ = run_command(["git", "diff", "--name-only", "-z", last_head, head], Path(cwd))
+        if return_code != 0:
+            return None
+        changed.update(path for path in output.split("\0") if path)
+    
+    if any(os.path.basename(path) in LINTER_CONFIG_FILES for path in changed):
+        return None
+    existing = sorted(path for path in changed
+                      if path.endswith(".py") and os.path.exists(os.path.join(cwd, path)))
+    if not existing:
+        return dict(last_result)
+    return [linter_command[0]] + existing
 
 def run_custom_script(cwd: Path, script_path: str, args: Optional[List[str]] = None) -> Dict[str, Union[bool, str]]:
     """
@@ -105,3 +432,67 @@ def run_custom_script(cwd: Path, script_path: str, args: Optional[List[str]] = N
         "error": stderr,
         "command": ' '.join(command)
     }
+
+def _guarded(name: str, task: Callable[[], Dict[str, Any]], **failure_fields: Any) -> Dict[str, Any]:
+    """
+    Run a validation task, turning an exception into a failed result.
+    
+    Args:
+        name (str): Name of the task, for logging
+        task (Callable[[], Dict[str, Any]]): Task to run
+        **failure_fields: Extra fields for the failed result, e.g. the script path
+        
+    Returns:
+        Dict[str, Any]: Result of the task
+    """
+    try:
+        result = task()
+        logger.info(f"{name} results: {result['success']}")
+        return result
+    except Exception as e:
+        logger.error(f"Error running {name}: {str(e)}")
+        return {**failure_fields, "success": False, "error": str(e)}
+
+def run_validation_parallel(cwd: Path,
+                            test_command: Optional[List[str]] = None,
+                            linter_command: Optional[List[str]] = None,
+                            custom_scripts: Optional[List[Dict[str, Union[str, List[str]]]]] = None,
+                            parallel: bool = True) -> Dict[str, Any]:
+    """
+    Runs the tests, the linter and any custom scripts at the same time.
+    
+    Each runs in its own subprocess, so threads are enough to overlap them and the
+    total time is that of the slowest one rather than the sum.
+    
+    Args:
+        cwd (Path): Working directory of the repository
+        test_command (Optional[List[str]]): Custom test command to run
+        linter_command (Optional[List[str]]): Custom linter command to run
+        custom_scripts (Optional[List[Dict[str, Union[str, List[str]]]]]): Custom scripts to run,
+            each with a "path" and optional "args"
+        parallel (bool): Run the tasks at the same time on the shared validation threads.
+            Set to False to run them one after the other, in order.
+        
+    Returns:
+        Dict[str, Any]: Results by task: "tests", "linter" and, if any were given,
+            "custom_scripts" in the order given
+    """
+    # Custom scripts are keyed by their position, so their results keep the given order
+    tasks = [("tests", partial(_guarded, "tests", partial(run_tests, cwd, test_command))),
+             ("linter", partial(_guarded, "linter", partial(run_linter, cwd, linter_command)))]
+    for index, script_config in enumerate(custom_scripts or []):
+        script_path = script_config.get("path")
+        script_task = partial(run_custom_script, cwd, script_path, script_config.get("args", []))
+        tasks.append((index, partial(_guarded, f"custom script {script_path}", script_task, path=script_path)))
+    
+    if parallel:
+        futures = {_VALIDATION_POOL.submit(task): key for key, task in tasks}
+        outcomes = {futures[future]: future.result() for future in as_completed(futures)}
+    else:
+        outcomes = {key: task() for key, task in tasks}
+    
+    results = {"tests": outcomes["tests"], "linter": outcomes["linter"]}
+    if custom_scripts:
+        results["custom_scripts"] = [outcomes[index] for index in range(len(custom_scripts))]
+    
+    return results